@@ -0,0 +1,150 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import hashlib
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from generate_npueval import assemble, kernels_dir, output_file, sweep_output_file
+
+# Builds kernels/*/kernel.json in a process pool and assembles npueval.jsonl.
+# Each worker imports numpy, ml_dtypes, CppHeaderParser and npueval once and then runs many
+# generate.py scripts. A kernel is only regenerated when the sources in its
+# directory or the dataset builder code change, the hash of the last build is
+# kept in kernels/<kernel>/.build_hash.
+#
+# With --sweep each kernel also writes the size variants of
+# PromptConstructor.sweep to kernel_sweep.jsonl, they are assembled into
+# npueval_sweep.jsonl.
+#
+# usage: python3 build_dataset.py [-j 8] [--force] [--vectors blob] [--sweep default]
+
+STAMP_FILE = ".build_hash"
+SOURCE_EXTENSIONS = (".py", ".cc", ".cpp", ".h")
+# Builder modules that shape every kernel.json
+BUILDER_MODULES = ("datasetbuilder.py", "vectors.py", "iron.py")
+package_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "npueval")
+
+def builder_hash():
+    h = hashlib.sha256()
+    for name in BUILDER_MODULES:
+        with open(os.path.join(package_dir, name), 'rb') as f:
+            h.update(name.encode() + b"\0" + f.read())
+    return h.hexdigest()
+
+def kernel_hash(kernel_path, builder):
+    """Hash of generate.py, canonical_scalar.cc and any other source next to
+    them, plus the builder hash and sweep settings."""
+    h = hashlib.sha256(builder.encode() + os.environ.get("NPUEVAL_SWEEP", "").encode())
+    for name in sorted(os.listdir(kernel_path)):
+        if name.endswith(SOURCE_EXTENSIONS):
+            with open(os.path.join(kernel_path, name), 'rb') as f:
+                h.update(name.encode() + b"\0" + f.read())
+    return h.hexdigest()
+
+def is_up_to_date(kernel_path, digest):
+    stamp = os.path.join(kernel_path, STAMP_FILE)
+    if not os.path.exists(os.path.join(kernel_path, 'kernel.json')) or not os.path.exists(stamp):
+        return False
+    with open(stamp, 'r') as f:
+        return f.read().strip() == digest
+
+def _init_worker():
+    # Pay the import cost once per worker instead of once per kernel
+    import numpy
+    import ml_dtypes
+    import CppHeaderParser
+    import npueval.datasetbuilder
+
+def generate_kernel(kernel_path, digest):
+    """Runs kernel_path/generate.py in this process, returns (kernel, seconds, error)."""
+    start = time.perf_counter()
+    kernel_path = os.path.abspath(kernel_path)
+    cwd = os.getcwd()
+    stamp = os.path.join(kernel_path, STAMP_FILE)
+    # A failed generate.py must not leave the previous record to be assembled
+    for stale in (stamp, os.path.join(kernel_path, 'kernel.json'), os.path.join(kernel_path, 'kernel_sweep.jsonl')):
+        if os.path.exists(stale):
+            os.remove(stale)
+    sys.path.insert(0, kernel_path)
+    try:
+        os.chdir(kernel_path)
+        runpy.run_path("generate.py", run_name="__main__")
+        if os.path.exists("kernel.json"):
+            with open(stamp, 'w') as f:
+                f.write(digest)
+        return os.path.basename(kernel_path), time.perf_counter() - start, None
+    except BaseException:
+        return os.path.basename(kernel_path), time.perf_counter() - start, traceback.format_exc()
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(kernel_path)
+
+def build_kernels(kernels_dir=kernels_dir, jobs=None, force=False, only=None):
+    """Regenerates the kernel.json of every out of date kernel, returns the
+    names of the kernels that failed."""
+    builder = builder_hash()
+    pending = []
+    for kernel in sorted(os.listdir(kernels_dir)):
+        kernel_path = os.path.join(kernels_dir, kernel)
+        if not os.path.isfile(os.path.join(kernel_path, 'generate.py')):
+            continue
+        if only and kernel not in only:
+            continue
+        digest = kernel_hash(kernel_path, builder)
+        if force or not is_up_to_date(kernel_path, digest):
+            pending.append((kernel_path, digest))
+
+    print(f"{len(pending)} kernels to generate")
+    failed = []
+    if not pending:
+        return failed
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        futures = [pool.submit(generate_kernel, path, digest) for path, digest in pending]
+        for i, future in enumerate(as_completed(futures)):
+            kernel, elapsed, error = future.result()
+            if error is not None:
+                status = "FAILED"
+            elif not os.path.exists(os.path.join(kernels_dir, kernel, 'kernel.json')):
+                status = "skipped, generate.py did not write kernel.json"
+            else:
+                status = "ok"
+            print(f"[{i + 1}/{len(pending)}] {kernel} {status} ({elapsed:.1f}s)")
+            if error is not None:
+                print(error)
+                failed.append(kernel)
+    print(f"Generated {len(pending) - len(failed)} kernels in {time.perf_counter() - start:.1f}s")
+    return sorted(failed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel, incremental NPUEval dataset build")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--force", action="store_true", help="regenerate every kernel")
+    parser.add_argument("--kernels", nargs="+", default=None, help="only (re)generate these kernels")
+    parser.add_argument("--no-assemble", action="store_true", help="don't write npueval.jsonl")
+    parser.add_argument("--vectors", choices=["inline", "npz", "blob"], default=None,
+                        help="test vector storage, defaults to NPUEVAL_VECTORS or inline")
+    parser.add_argument("--sweep", default=None,
+                        help="also build size sweep variants, 'default' or comma separated scales (NPUEVAL_SWEEP)")
+    parser.add_argument("--output", default=output_file)
+    args = parser.parse_args()
+    if args.sweep is not None:
+        # Inherited by the workers
+        os.environ["NPUEVAL_SWEEP"] = args.sweep
+
+    failed = build_kernels(kernels_dir, jobs=args.jobs, force=args.force, only=args.kernels)
+    if not args.no_assemble:
+        assemble(kernels_dir, args.output, args.vectors)
+        print(f"Wrote {args.output}")
+        if os.environ.get("NPUEVAL_SWEEP"):
+            assemble(kernels_dir, sweep_output_file, args.vectors, sweep=True)
+            print(f"Wrote {sweep_output_file}")
+    if failed:
+        print(f"Failed kernels: {', '.join(failed)}")
+        sys.exit(1)
@@ -1,24 +1,75 @@
 # Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
 # SPDX-License-Identifier: MIT
 
+import argparse
 import json
 import os
 
 kernels_dir = 'kernels/'
 output_file = 'npueval.jsonl'
+sweep_output_file = 'npueval_sweep.jsonl'
 
 def extract_number(folder_name):
     return int(folder_name.split('_')[0])
 
-# Get a list of folders and sort them based on preceding digit
-#folders = sorted(os.listdir(kernels_dir), key=extract_number)
-folders = sorted(os.listdir(kernels_dir))
-
-with open(output_file, 'w') as outfile:
-    for kernel_folder in folders:
-        kernel_json = os.path.join(kernels_dir, kernel_folder, 'kernel.json')
+def read_records(kernel_folder, sweep=False):
+    """Records of one kernel, its kernel.json or the variants of kernel_sweep.jsonl."""
+    if not sweep:
+        kernel_json = os.path.join(kernel_folder, 'kernel.json')
         if os.path.exists(kernel_json):
             with open(kernel_json, 'r') as infile:
-                data = json.load(infile)
-                json.dump(data, outfile)
-                outfile.write('\n')
+                yield json.load(infile)
+        return
+    sweep_jsonl = os.path.join(kernel_folder, 'kernel_sweep.jsonl')
+    if os.path.exists(sweep_jsonl):
+        with open(sweep_jsonl, 'r') as infile:
+            for line in infile:
+                if line.strip():
+                    yield json.loads(line)
+
+def assemble(kernels_dir=kernels_dir, output_file=output_file, vectors="inline", sweep=False):
+    """Collects kernels/*/kernel.json into output_file.
+
+    With sweep=True the size variants of kernels/*/kernel_sweep.jsonl (see
+    PromptConstructor.sweep) are collected instead.
+
+    With vectors="npz" or "blob" the test vectors are moved into a single
+    npueval.vectors.npz/npueval.vectors.bin next to output_file and the jsonl
+    only keeps prompts, metadata and references to them.
+    """
+    from npueval.vectors import (BlobWriter, is_inline, load_test_vectors, store_test_vectors,
+                                 vector_format, write_npz)
+    vectors = vector_format(vectors)
+    stem = os.path.splitext(output_file)[0]
+    npz_path, npz_arrays = f"{stem}.vectors.npz", {}
+    blob = BlobWriter(f"{stem}.vectors.bin") if vectors == "blob" else None
+
+    # Get a list of folders and sort them based on preceding digit
+    #folders = sorted(os.listdir(kernels_dir), key=extract_number)
+    folders = sorted(os.listdir(kernels_dir))
+
+    try:
+        with open(output_file, 'w') as outfile:
+            for kernel_folder in folders:
+                for data in read_records(os.path.join(kernels_dir, kernel_folder), sweep):
+                    if vectors != "inline" or not is_inline(data):
+                        arrays = load_test_vectors(data, base_dir=os.path.join(kernels_dir, kernel_folder))
+                        data = store_test_vectors(data, arrays, vectors, npz_path=npz_path, npz_arrays=npz_arrays,
+                                                  blob=blob, key_prefix=f"{data['kernel_name']}.")
+                    json.dump(data, outfile)
+                    outfile.write('\n')
+    finally:
+        if blob is not None:
+            blob.close()
+    if vectors == "npz":
+        write_npz(npz_path, npz_arrays)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assemble npueval.jsonl from kernels/*/kernel.json")
+    parser.add_argument("--vectors", choices=["inline", "npz", "blob"], default=None,
+                        help="test vector storage, defaults to NPUEVAL_VECTORS or inline")
+    parser.add_argument("--sweep", action="store_true", help="assemble the size sweep variants into npueval_sweep.jsonl")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+    output = args.output or (sweep_output_file if args.sweep else output_file)
+    assemble(kernels_dir, output, args.vectors, sweep=args.sweep)
@@ -13,9 +13,17 @@ from ml_dtypes import bfloat16
 from npueval.iron import build_app
 from npueval.tools import aie_compiler, build_single_kernel_app
 from npueval.executor import NPUExecutor
+from npueval.diagnostics import summarize_diagnostics
 
 from prompts import KERNEL_SYSTEM_PROMPT, REFERENCE_SYSTEM_PROMPT, RETRY_SYSTEM_PROMPT, get_reference_prompt, get_retry_prompt
 
+class KernelCompileError(RuntimeError):
+    """Kernel compilation failed, log holds the raw compiler output."""
+
+    def __init__(self, log: str):
+        super().__init__(f"Kernel compilation failed: {log}")
+        self.log = log
+
 class NPUKernelDemo:
     """Demo class for generating NPU kernels from prompts."""
     
@@ -120,8 +128,12 @@ class NPUKernelDemo:
         """
         print(f"Retrying kernel generation with compiler feedback...")
         
+        # Only feed back the deduplicated errors located in the kernel source
+        compiler_feedback = summarize_diagnostics(compiler_error, source=failed_code,
+                                                  source_file=f"{kernel_name}_wrapper.cc")
+        
         # Generate retry prompt with error context
-        retry_prompt = get_retry_prompt(original_prompt, failed_code, compiler_error, 
+        retry_prompt = get_retry_prompt(original_prompt, failed_code, compiler_feedback, 
                                       kernel_name, data_type, array_size)
         
         response = self.client.chat.completions.create(
@@ -301,7 +313,7 @@ extern "C" {{
         )
         
         if not compile_result.startswith('Compilation successful.'):
-            raise RuntimeError(f"Kernel compilation failed: {compile_result}")
+            raise KernelCompileError(compile_result)
         
         # Generate MLIR using numpy arrays directly
         tile_size = input_array.size
@@ -519,8 +531,9 @@ extern "C" {{
                 break
                 
             except Exception as e:
-                compiler_error = str(e)
-                print(f"❌ Compilation attempt {retry_count + 1} failed: {compiler_error}")
+                # The raw log, the diagnostics parser expects clang's line format
+                compiler_error = getattr(e, 'log', str(e))
+                print(f"❌ Compilation attempt {retry_count + 1} failed: {e}")
                 
                 # If we've exhausted retries, return error
                 if retry_count >= self.max_retries:
@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: MIT
 
 from .npueval import run_functional_tests
-from .tools import aie_compiler, build_single_kernel_app
+from .tools import aie_compiler, aie_syntax_check, build_single_kernel_app
 from .utils import extract_buffers, trace_to_json, report_peano_version
 from .dataset import dataset
 
@@ -4,11 +4,18 @@
 import os
 import re
 import json
-from typing import Dict, List, Optional
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 
 import openai
 from anthropic import Anthropic
 
+from .cache import ResponseCache
+from .context import ConversationWindow, estimate_tokens
+from .streaming import CodeFenceScanner
+from .diagnostics import summarize_diagnostics
 from .tools import aie_compiler
 
 SYSTEM_PROMPT = """You are a part of a code generation system for AIE (AI Engines).
@@ -19,23 +26,73 @@ SYSTEM_PROMPT = """You are a part of a code generation system for AIE (AI Engine
 * Name the function exactly as specified in the request, and output only the kernel (no main(), examples, explanations or extra code).
 """
 
+# aie_api constructs that indicate the kernel uses the vector unit
+VECTOR_API_RE = re.compile(r'\baie::(?:vector|accum|mask|load_v|store_v|load_unaligned_v|begin_vector|'
+                           r'begin_restrict_vector|mul|mac|msc|add|sub|max|min|reduce_\w+|abs|neg|'
+                           r'to_float|to_fixed|broadcast|select|lt|le|gt|ge|eq|neq|shuffle_\w+|'
+                           r'filter_\w+|interleave_\w+|concat|bitwise_\w+|sqrt|inv|invsqrt|div|exp2?|'
+                           r'tanh|sin|cos)\b')
+
+def static_vector_score(code: str) -> int:
+    """Cheap static vectorization signal: number of aie_api vector constructs used.
+    Only meant to rank candidates for the same task against each other."""
+    return len(VECTOR_API_RE.findall(code))
+
 class AIECoder:
-    """A basic agent that uses either OpenAI or Anthropic APIs to generate AIE kernels."""
+    """A basic agent that uses either OpenAI or Anthropic APIs to generate AIE kernels.
+
+    With max_history set, each request only carries the system prompt, the current
+    task and the last max_history attempt/diagnostic pairs (see ConversationWindow),
+    the estimated prompt tokens this avoids are tracked in token_usage.
+
+    strategy="best_of_n" replaces the serial repair loop with n_candidates samples
+    generated and compiled in parallel, see best_of_n.
+
+    With stream=True responses are streamed and the request is cut off as soon as
+    the first code block closes, since extract_codeblock ignores anything after it.
+    Time-to-first-token and time-to-code are recorded in stream_metrics.
+    """
     
     def __init__(self, model: str = "gpt-4",
                        temperature: float = 0.0,
                        top_p: float = 1.0,
                        attempts: int = 1,
                        base_url: Optional[str] = None,
-                       api_key: Optional[str] = None):
+                       api_key: Optional[str] = None,
+                       syntax_check: bool = False,
+                       max_diagnostics: Optional[int] = 5,
+                       cache: Optional[ResponseCache] = None,
+                       max_history: Optional[int] = None,
+                       summarize_history: bool = False,
+                       stream: bool = False,
+                       strategy: str = "sequential",
+                       n_candidates: int = 4,
+                       selection: str = "first",
+                       candidate_temperature_step: float = 0.25):
         self.system_prompt = SYSTEM_PROMPT
         self.messages = [{"role": "system", "content": self.system_prompt}]
         self.model = model
         self.temperature = temperature
         self.top_p = top_p
         self.attempts = attempts
+        self.syntax_check = syntax_check
+        self.max_diagnostics = max_diagnostics
         self.api_key = api_key
-        self.token_usage = {'completion_tokens': 0, 'prompt_tokens': 0, 'total_tokens': 0}
+        self.base_url = base_url
+        self.cache = cache
+        self.window = ConversationWindow(max_attempts=max_history, summarize=summarize_history)
+        self.stream = stream
+        self.stream_metrics = []
+        self.strategy = strategy
+        self.n_candidates = n_candidates
+        self.selection = selection
+        self.candidate_temperature_step = candidate_temperature_step
+        if strategy not in ("sequential", "best_of_n"):
+            raise ValueError(f"Unsupported strategy: {strategy}, choose 'sequential' or 'best_of_n'")
+        if selection not in ("first", "vector_score"):
+            raise ValueError(f"Unsupported selection: {selection}, choose 'first' or 'vector_score'")
+        self.task_start = 1
+        self.token_usage = {'completion_tokens': 0, 'prompt_tokens': 0, 'total_tokens': 0, 'prompt_tokens_saved': 0}
         
         # Determine if it's a reasoning model
         self.reasoning = model.startswith('o1')
@@ -43,7 +100,10 @@ class AIECoder:
         # Determine if we should use Anthropic
         self.use_anthropic = model.startswith('claude')
         
-        if self.use_anthropic:
+        if self.cache is not None and self.cache.replay:
+            # Replay never reaches the API, so it works offline without a key
+            self.client = None
+        elif self.use_anthropic:
             self.client = Anthropic()
         else:
             if self.api_key:
@@ -53,8 +113,20 @@ class AIECoder:
 
     def __call__(self, prompt: str) -> Dict:
         """Generate code based on the prompt, with optional compilation verification."""
+        self.task_start = len(self.messages)
         self.messages.append({"role": "user", "content": prompt})
 
+        start = time.perf_counter()
+        if self.strategy == "best_of_n":
+            result = self.best_of_n()
+        else:
+            result = self.sequential()
+        result['wall_time'] = time.perf_counter() - start
+        return result
+
+    def sequential(self) -> Dict:
+        """Generate, compile and feed errors back until a solution compiles or the
+        attempts run out."""
         if self.attempts == 1:
             response = self.generate_code()
             return {"response": response, "attempt": 0, "token_usage": self.token_usage, "history": self.messages}
@@ -67,7 +139,7 @@ class AIECoder:
                 self.messages.append({"role": "user", "content": "Expected a single codeblock but no code provided."})
                 continue
 
-            compilation_result = aie_compiler(code)
+            compilation_result = aie_compiler(code, output_dir=None, syntax_check=self.syntax_check)
             compile_pass = compilation_result.split('\n')[0] == 'Compilation successful.'
             
             if compile_pass:
@@ -78,6 +150,10 @@ class AIECoder:
                     "history": self.messages
                 }
             else:
+                if self.max_diagnostics:
+                    compilation_result = summarize_diagnostics(compilation_result, source=code,
+                                                               source_file="kernel.cc",
+                                                               max_errors=self.max_diagnostics)
                 self.messages.append({"role": "user", "content": f"Compilation failed with:\n{compilation_result}"})
 
         return {
@@ -87,54 +163,221 @@ class AIECoder:
             "history": self.messages
         }
 
+    def best_of_n(self) -> Dict:
+        """Samples n_candidates solutions concurrently and compiles each one as soon as
+        it arrives, in its own build sandbox.
+
+        Candidates differ in sampling temperature and seed. With selection="first" the
+        first candidate that compiles wins and candidates that haven't started are
+        cancelled. Requests already in flight can't be interrupted, they are awaited
+        (without compiling) so their tokens are counted, and they are reported as
+        late. With selection="vector_score" all candidates are awaited and the
+        compiling one with the highest static_vector_score wins.
+        """
+        messages, saved = self.window.select(self.messages, self.task_start)
+        self.token_usage['prompt_tokens_saved'] += saved
+        cancelled = threading.Event()
+
+        def candidate(i: int) -> Dict:
+            payload = self.build_request(list(messages))
+            if "temperature" in payload:
+                payload['temperature'] = min(1.0, self.temperature + self.candidate_temperature_step * i)
+            if "seed" in payload:
+                payload['seed'] = 42 + i
+            start = time.perf_counter()
+            response, usage = self.complete(payload)
+            code = self.extract_codeblock(response)
+            compiled = False
+            if code and not cancelled.is_set():
+                result = aie_compiler(code, kernel_name=f"kernel_{i}", output_dir=None,
+                                      syntax_check=self.syntax_check)
+                compiled = result.split('\n')[0] == 'Compilation successful.'
+            return {
+                "index": i,
+                "temperature": payload.get('temperature'),
+                "seed": payload.get('seed'),
+                "response": response,
+                "usage": usage,
+                "compiled": compiled,
+                "vector_score": static_vector_score(code) if code else 0,
+                "latency": time.perf_counter() - start,
+            }
+
+        executor = ThreadPoolExecutor(max_workers=self.n_candidates)
+        futures = [executor.submit(candidate, i) for i in range(self.n_candidates)]
+        finished = []
+        try:
+            for future in as_completed(futures):
+                try:
+                    finished.append(future.result())
+                except Exception as e:
+                    print(f"Candidate failed: {e}")
+                    continue
+                if self.selection == "first" and finished[-1]['compiled']:
+                    cancelled.set()
+                    break
+        finally:
+            # In flight requests still bill their tokens, wait for them
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        selected = {c['index'] for c in finished}
+        late = [f.result() for f in futures
+                if not f.cancelled() and f.exception() is None and f.result()['index'] not in selected]
+        for c in finished + late:
+            self.update_tokens(c['usage'])
+
+        passing = [c for c in finished if c['compiled']]
+        if passing:
+            best = max(passing, key=lambda c: c['vector_score']) if self.selection == "vector_score" else passing[0]
+        elif finished:
+            best = finished[0]
+        else:
+            raise RuntimeError("All best-of-n candidates failed")
+
+        self.messages.append({"role": "assistant", "content": best['response']})
+        return {
+            "response": best['response'],
+            "attempt": best['index'] if passing else self.n_candidates,
+            "token_usage": self.token_usage,
+            "history": self.messages,
+            "candidates": [{**{k: v for k, v in c.items() if k != "response"}, "late": c['index'] not in selected}
+                           for c in finished + late],
+            "cancelled_candidates": sum(f.cancelled() for f in futures),
+        }
+
     def generate_code(self) -> str:
         """Lightweight wrapper for OpenAI/Anthropic API."""
+        messages, saved = self.window.select(self.messages, self.task_start)
+        self.token_usage['prompt_tokens_saved'] += saved
+        response_text, usage = self.complete(self.build_request(messages))
+        self.update_tokens(usage)
+        self.messages.append({"role": "assistant", "content": response_text})
+        return response_text
+
+    def build_request(self, messages: Optional[List[Dict]] = None) -> Dict:
+        """Builds the request payload for the current conversation. Besides the API
+        arguments it names the provider and endpoint so it can serve as a cache key."""
+        messages = self.messages if messages is None else messages
+
         if self.use_anthropic:
-            system_message = next((msg['content'] for msg in self.messages if msg['role'] == 'system'), None)
-            user_messages = [msg for msg in self.messages if msg['role'] in ['user', 'assistant']]
-            
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=8192,
-                temperature=self.temperature,
-                system=system_message,
-                messages=[{"role": m["role"], "content": m["content"]} for m in user_messages]
-            )
-            
-            self.update_tokens({
+            system_message = next((msg['content'] for msg in messages if msg['role'] == 'system'), None)
+            user_messages = [msg for msg in messages if msg['role'] in ['user', 'assistant']]
+            return {
+                "provider": "anthropic",
+                "model": self.model,
+                "max_tokens": 8192,
+                "temperature": self.temperature,
+                "system": system_message,
+                "messages": [{"role": m["role"], "content": m["content"]} for m in user_messages]
+            }
+
+        if self.reasoning:
+            # Copies, the history and the window share these dicts
+            messages = [dict(m) for m in messages]
+            if messages[0]['role'] == "system":
+                messages[0]['role'] = "user"
+            return {
+                "provider": "openai",
+                "base_url": self.base_url,
+                "model": self.model,
+                "messages": messages,
+                "top_p": self.top_p,
+                "seed": 42
+            }
+
+        return {
+            "provider": "openai",
+            "base_url": self.base_url,
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "seed": 42
+        }
+
+    def complete(self, payload: Dict) -> Tuple[str, Dict]:
+        """Sends a request built by build_request, going through the response cache
+        if one is configured. Returns the response text and token usage.
+
+        Streamed responses stop at the end of the first code block, so they are
+        cached under their own key and never replayed to non-streaming callers.
+        """
+        key = None
+        if self.cache is not None and self.cache.enabled:
+            key = self.cache.key({**payload, "stream": "early_stop"} if self.stream else payload)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached['response'], cached['usage']
+
+        request = {k: v for k, v in payload.items() if k not in ("provider", "base_url")}
+        if self.stream:
+            response_text, usage = self._complete_stream(payload['provider'], request)
+        elif payload['provider'] == "anthropic":
+            response = self.client.messages.create(**request)
+            usage = {
                 'completion_tokens': response.usage.output_tokens,
                 'prompt_tokens': response.usage.input_tokens,
                 'total_tokens': response.usage.input_tokens + response.usage.output_tokens
-            })
+            }
             response_text = response.content[0].text
-            self.messages.append({"role": "assistant", "content": response_text})
-            
         else:
-            
-            if self.reasoning:
-                if self.messages[0]['role'] == "system":
-                    self.messages[0]['role'] = "user"
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=self.messages,
-                    top_p=self.top_p,
-                    seed=42
-                )
-            else:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=self.messages,
-                    temperature=self.temperature,
-                    top_p=self.top_p,
-                    seed=42
-                )
-            
+            response = self.client.chat.completions.create(**request)
             usage = response.usage.model_dump()
-            self.update_tokens(usage)
             response_text = response.choices[0].message.content
-            
-            self.messages.append({"role": "assistant", "content": response_text})
-        return response_text
+
+        if key is not None:
+            self.cache.put(key, response_text, usage)
+        return response_text, usage
+
+    def _complete_stream(self, provider: str, request: Dict) -> Tuple[str, Dict]:
+        """Streams a completion and stops reading once the first code block closes.
+
+        When the stream is cut short the API never reports usage, completion tokens
+        are then estimated from the received text and prompt tokens from the request.
+        """
+        scanner = CodeFenceScanner()
+        start = time.perf_counter()
+        first_token = None
+        usage = {}
+
+        if provider == "anthropic":
+            with self.client.messages.stream(**request) as stream:
+                for event in stream:
+                    if event.type == "message_start":
+                        usage['prompt_tokens'] = event.message.usage.input_tokens
+                    elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        first_token = first_token or time.perf_counter()
+                        if scanner.feed(event.delta.text):
+                            break
+                    elif event.type == "message_delta":
+                        usage['completion_tokens'] = event.usage.output_tokens
+        else:
+            stream = self.client.chat.completions.create(**request, stream=True,
+                                                         stream_options={"include_usage": True})
+            try:
+                for chunk in stream:
+                    if chunk.usage is not None:
+                        usage['prompt_tokens'] = chunk.usage.prompt_tokens
+                        usage['completion_tokens'] = chunk.usage.completion_tokens
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        first_token = first_token or time.perf_counter()
+                        if scanner.feed(chunk.choices[0].delta.content):
+                            break
+            finally:
+                stream.close()
+
+        end = time.perf_counter()
+        self.stream_metrics.append({
+            'time_to_first_token': (first_token - start) if first_token else None,
+            'time_to_code': (end - start) if scanner.closed else None,
+            'total_time': end - start,
+            'stopped_early': scanner.closed and 'completion_tokens' not in usage,
+        })
+
+        usage.setdefault('prompt_tokens', estimate_tokens(request.get('messages', [])))
+        usage.setdefault('completion_tokens', len(scanner.text) // 4)
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        return scanner.text, usage
 
     def update_tokens(self, usage: Dict) -> None:
         """Update token usage statistics."""
@@ -145,11 +388,12 @@ class AIECoder:
     @staticmethod
     def extract_codeblock(text: str) -> Optional[str]:
         """Extract code from markdown codeblocks."""
-        code_blocks = re.findall(r'```(?:[a-zA-Z0-9]+)?\n(.*?)```|```(.*?)```', text, re.DOTALL)
-        code_blocks = [block for match in code_blocks for block in match if block]
-        return code_blocks[0].strip() if code_blocks else None
+        scanner = CodeFenceScanner()
+        scanner.feed(text)
+        return scanner.code
 
     def reset_history(self) -> None:
         """Reset the conversation history and token usage statistics."""
         self.messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        self.token_usage = {'completion_tokens': 0, 'prompt_tokens': 0, 'total_tokens': 0}
+        self.task_start = 1
+        self.token_usage = {'completion_tokens': 0, 'prompt_tokens': 0, 'total_tokens': 0, 'prompt_tokens_saved': 0}
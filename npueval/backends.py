@@ -0,0 +1,386 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import ast
+import hashlib
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .trace import CORE_EVENT_SLOTS, encode_trace, write_trace_words
+
+# Backends behind aie_compiler, build_single_kernel_app, build_app and
+# NPUExecutor. The hardware backend runs peano/aiecc and the NPU, the
+# simulated backend stands in for all of them so the harness itself
+# (dataset loading, sanitizing, result bookkeeping, trace parsing) can be
+# profiled and load-tested on a machine without an NPU or the toolchain.
+#
+#   NPUEVAL_BACKEND=simulated python scripts/run_canonical.py
+#
+# The simulated backend is deterministic: artifacts are hashes of their
+# inputs, outputs come from the kernel's behavioral() in
+# dataset/kernels/<kernel>/generate.py and cycle counts from a linear model,
+# encoded as AIE2 trace packets (npueval.trace) and read back like a
+# hardware trace,
+#   NPUEVAL_SIM_CYCLES="fixed=400,per_element=0.5,vector=0.8"
+# Latencies in seconds can be added to each stage to mimic the real tools,
+#   NPUEVAL_SIM_LATENCY="compile=1.5,build=4,run=0.2"
+
+KERNELS_DIR = os.environ.get("NPUEVAL_KERNELS_DIR",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "dataset", "kernels"))
+
+def parse_options(spec: Optional[str], defaults: Dict[str, float]) -> Dict[str, float]:
+    """Parses "key=value,key=value" into defaults, unknown keys raise ValueError."""
+    options = dict(defaults)
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if key not in defaults:
+            raise ValueError(f"Unknown option {key}, expected one of {', '.join(defaults)}")
+        options[key] = float(value)
+    return options
+
+@lru_cache(maxsize=None)
+def load_behavioral(kernel: str, kernels_dir: str = KERNELS_DIR) -> Callable:
+    """behavioral() of a dataset kernel's generate.py, without building kernel.json."""
+    path = os.path.join(kernels_dir, kernel, "generate.py")
+    with open(path, 'r') as f:
+        tree = ast.parse(f.read(), filename=path)
+    # Keep imports, helpers and constants, drop the PromptConstructor/write_json part
+    tree.body = [node for node in tree.body
+                 if not any(isinstance(n, ast.Name) and n.id in ("PromptConstructor", "pc") for n in ast.walk(node))
+                 and not (isinstance(node, ast.ImportFrom) and node.module == "npueval.datasetbuilder")]
+    namespace = {"__name__": "behavioral", "__file__": path}
+    exec(compile(tree, path, "exec"), namespace)
+    return namespace['behavioral']
+
+class HardwareBackend:
+    """peano/aiecc toolchain and the NPU through XRT, the default."""
+
+    name = "hardware"
+    hardware = True
+
+    def device(self) -> str:
+        return os.environ['NPU']
+
+    def syntax_check(self, src: str, **kwargs) -> Dict:
+        from .tools import aie_syntax_check
+        return aie_syntax_check(src, **kwargs)
+
+    def compile(self, src: str, **kwargs) -> str:
+        from .tools import aie_compiler
+        return aie_compiler(src, **kwargs)
+
+    def build_app(self, kernel_name: str, in_buffers: list, out_buffer: np.ndarray, rtps: list, **kwargs):
+        from .iron import build_app
+        return build_app(kernel_name, in_buffers, out_buffer, rtps, **kwargs)
+
+    def build(self, mlir_file: str, kernel_file: str, **kwargs):
+        from .tools import build_single_kernel_app
+        return build_single_kernel_app(mlir_file, kernel_file, **kwargs)
+
+    def executor(self, xclbin: str, instr: str, test: Optional[Dict[str, Any]] = None,
+                 rtps: Optional[list] = None, **kwargs):
+        """NPUExecutor for the xclbin, test and rtps are only used by the simulated backend."""
+        from .executor import NPUExecutor
+        return NPUExecutor(xclbin=xclbin, instr=instr, **kwargs)
+
+    def trace_to_json(self, trace_file: str, mlir_file: str, output_name: str, dev: str = "npu1"):
+        from .utils import trace_to_json
+        return trace_to_json(trace_file, mlir_file, output_name, dev=dev)
+
+    def device_info(self) -> Dict[str, Any]:
+        from .utils import report_xdna_version
+        return report_xdna_version()
+
+class SimulatedBackend:
+    """Deterministic stand-in for the toolchain and the NPU.
+
+    Parameters
+    ----------
+    fixed_cycles : float
+        Cycles of a kernel call independent of its size.
+    cycles_per_element : float
+        Cycles per element of the largest input.
+    vector_fraction : float
+        Share of the per-element cycles reported as vector unit time.
+    latencies : dict, optional
+        Seconds to sleep in each stage: compile, build and run.
+    device : str
+        Device reported to the harness if NPU isn't set.
+    real_host : bool
+        Use the real iron.build_app and xrt-smi device info, only compile,
+        build and run are simulated. Needs mlir-aie and XRT but no NPU run,
+        so the host side of those stages can be profiled.
+    """
+
+    name = "simulated"
+    hardware = False
+
+    def __init__(self,
+                 fixed_cycles: float = 400,
+                 cycles_per_element: float = 0.5,
+                 vector_fraction: float = 0.8,
+                 latencies: Optional[Dict[str, float]] = None,
+                 device: str = "npu1",
+                 real_host: bool = False):
+        self.fixed_cycles = fixed_cycles
+        self.cycles_per_element = cycles_per_element
+        self.vector_fraction = vector_fraction
+        self.latencies = {"compile": 0.0, "build": 0.0, "run": 0.0, **(latencies or {})}
+        self._device = device
+        self.real_host = real_host
+
+    @classmethod
+    def from_env(cls):
+        cycles = parse_options(os.environ.get("NPUEVAL_SIM_CYCLES"),
+                               {"fixed": 400, "per_element": 0.5, "vector": 0.8})
+        latencies = parse_options(os.environ.get("NPUEVAL_SIM_LATENCY"),
+                                  {"compile": 0.0, "build": 0.0, "run": 0.0})
+        return cls(fixed_cycles=cycles['fixed'], cycles_per_element=cycles['per_element'],
+                   vector_fraction=cycles['vector'], latencies=latencies)
+
+    def _wait(self, stage: str, timeout: Optional[float] = None):
+        """Sleeps for the latency of stage, raises StageTimeout like the real
+        tools if that's longer than timeout."""
+        from .watchdog import StageTimeout
+        if timeout is not None and self.latencies[stage] > timeout:
+            time.sleep(timeout)
+            raise StageTimeout(stage, timeout)
+        if self.latencies[stage] > 0:
+            time.sleep(self.latencies[stage])
+
+    def device(self) -> str:
+        return os.environ.get('NPU', self._device)
+
+    def _check_source(self, src: str, kernel_name: str) -> List[str]:
+        """Errors clang would certainly report: unbalanced code or no wrapper."""
+        from .sanitizer import functions, parse_units
+        units = parse_units(src)
+        errors = [f"{kernel_name}.cc: error: expected unqualified-id" for u in units if u['kind'] == "stray"]
+        if not any(f['name'] == kernel_name for f in functions(units)):
+            errors.append(f"{kernel_name}.cc: error: use of undeclared identifier '{kernel_name}'")
+        return errors
+
+    def syntax_check(self, src: str, kernel_name: str = "kernel", **kwargs) -> Dict:
+        start = time.perf_counter()
+        errors = self._check_source(src, kernel_name)
+        log = "\n".join(errors)
+        return {'success': not errors, 'skipped': False, 'log': log, 'diagnostics': [],
+                'elapsed': time.perf_counter() - start}
+
+    def compile(self, src: str,
+                kernel_name: str = "kernel",
+                output_dir: Optional[str] = "output",
+                generate_assembly: bool = False,
+                timeout: Optional[float] = None,
+                **kwargs) -> str:
+        """Same contract as aie_compiler. The object file holds the hash of
+        the source, the assembly a .stack_sizes entry per function."""
+        self._wait("compile", timeout)
+        errors = self._check_source(src, kernel_name)
+        if output_dir is not None:
+            pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
+            with open(os.path.join(output_dir, kernel_name + ".cc"), "w") as f:
+                f.write(src)
+        if errors:
+            return "\n".join(errors) + f"\n{len(errors)} error{'s' if len(errors) > 1 else ''} generated.\n"
+        if output_dir is None:
+            return "Compilation successful."
+
+        digest = hashlib.sha256(src.encode()).hexdigest()
+        with open(os.path.join(output_dir, kernel_name + ".o"), "w") as f:
+            f.write(f"simulated object {digest}\n")
+        if generate_assembly:
+            from .sanitizer import functions, parse_units
+            with open(os.path.join(output_dir, kernel_name + ".s"), "w") as f:
+                for function in functions(parse_units(src)):
+                    f.write(f"\t.size\t{function['name']}, .Lfunc_end-{function['name']}\n"
+                            f"\t.section\t.stack_sizes,\"o\",@progbits,.text\n"
+                            f"\t.byte\t{32 * (1 + len(function['params']))}\n")
+        return f"Compilation successful.\nObject file generated at {output_dir}/{kernel_name}.o"
+
+    def build_app(self, kernel_name: str, in_buffers: list, out_buffer: np.ndarray, rtps: list,
+                  tile_size: int = 1024, trace_size: int = 0, dev: str = "npu1", verbose: bool = False):
+        """Same contract as iron.build_app, the MLIR is a description of the design."""
+        if self.real_host:
+            return HardwareBackend().build_app(kernel_name, in_buffers, out_buffer, rtps, tile_size=tile_size,
+                                               trace_size=trace_size, dev=dev, verbose=verbose)
+        # Output padded to 4 bytes like build_app
+        pad_bytes = (-out_buffer.nbytes) % 4
+        pad_elems = pad_bytes // out_buffer.dtype.itemsize
+        design = {
+            "kernel": kernel_name,
+            "device": dev,
+            "inputs": [[in_buffer.size, str(in_buffer.dtype)] for in_buffer in in_buffers],
+            "output": [out_buffer.size + pad_elems, str(out_buffer.dtype)],
+            "rtps": [[rtp.item(), str(rtp.dtype)] for rtp in rtps],
+            "tile_size": tile_size,
+            "trace_size": trace_size,
+        }
+        return f"// simulated design\n// {json.dumps(design)}\nmodule {{\n}}\n", pad_elems
+
+    def build(self, mlir_file: str, kernel_file: str, xclbin_name: str = "app", output_dir: str = "output",
+              timeout: Optional[float] = None, **kwargs):
+        """Same contract as build_single_kernel_app, writes xclbin_name.xclbin/.bin."""
+        self._wait("build", timeout)
+        digest = hashlib.sha256()
+        for path in (mlir_file, kernel_file):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
+        with open(os.path.join(output_dir, f"{xclbin_name}.xclbin"), "w") as f:
+            f.write(f"simulated xclbin {digest.hexdigest()}\n")
+        with open(os.path.join(output_dir, f"{xclbin_name}.bin"), "wb") as f:
+            f.write(digest.digest())
+        print(f"{xclbin_name}.xclbin, {xclbin_name}.bin built (simulated)")
+        return subprocess.CompletedProcess(args=["aiecc.py", mlir_file], returncode=0)
+
+    def executor(self, xclbin: str, instr: str, test: Optional[Dict[str, Any]] = None,
+                 rtps: Optional[list] = None, **kwargs):
+        kernel = None
+        if test is not None:
+            kernel = (test.get('sweep') or {}).get('base', test['kernel_name'])
+            if not os.path.isfile(os.path.join(KERNELS_DIR, kernel, "generate.py")):
+                kernel = None
+        return SimulatedExecutor(xclbin, instr, backend=self, kernel=kernel, rtps=rtps, **kwargs)
+
+    def cycles(self, elements: int) -> Dict[str, int]:
+        """total and vector cycles of one kernel call on elements elements."""
+        steady = self.cycles_per_element * elements
+        return {"total": int(round(self.fixed_cycles + steady)),
+                "vector": int(round(self.vector_fraction * steady))}
+
+    def trace_to_json(self, trace_file: str, mlir_file: str, output_name: str, dev: str = "npu1"):
+        """parse_trace.py on the real MLIR with real_host, otherwise the packets
+        are decoded by npueval.trace since the simulated MLIR has no trace setup."""
+        if self.real_host:
+            return HardwareBackend().trace_to_json(trace_file, mlir_file, output_name, dev=dev)
+        from .trace import trace_file_to_json
+        return trace_file_to_json(trace_file, output_name)
+
+    def device_info(self) -> Dict[str, Any]:
+        if self.real_host:
+            return HardwareBackend().device_info()
+        return {'device': f"simulated {self.device()}",
+                'os': platform.system(),
+                'kernel': platform.release(),
+                'xdna_version': None,
+                'xdna_hash': None,
+                'firmware_version': None,
+                'compiler_version': {}}
+
+class SimulatedExecutor:
+    """NPUExecutor stand-in, outputs are computed with the behavioral() of
+    kernel (or copied from the reference outputs when there is none) and the
+    trace packets are encoded from the backend's cycle model. behavioral() is
+    loaded in run, so the executor pickles for the run worker process."""
+
+    def __init__(self,
+                 xclbin: str,
+                 instr: str,
+                 backend: SimulatedBackend,
+                 kernel: Optional[str] = None,
+                 rtps: Optional[list] = None,
+                 xrt_kernel_name: str = "MLIR_AIE",
+                 atol: float = 1e-2,
+                 rtol: float = 1e-2,
+                 verbose: bool = False):
+        self.xclbin = xclbin
+        self.instr = instr
+        self.backend = backend
+        self.kernel = kernel
+        self.rtps = rtps or []
+        self.xrt_kernel_name = xrt_kernel_name
+        self.atol = atol
+        self.rtol = rtol
+        self.verbose = verbose
+
+    def run(self,
+            in_buffers: List[np.ndarray],
+            out_buffers: List[np.ndarray],
+            trace_size: int = 0,
+            trace_name: str = "",
+            padding: int = 0):
+        """Same contract as NPUExecutor.run."""
+        from .executor import evaluate_result, trace_cycles
+
+        for path in (self.xclbin, self.instr):
+            if not os.path.isfile(path):
+                raise FileNotFoundError(path)
+        self.backend._wait("run")
+
+        expected = out_buffers[0]
+        if self.kernel is not None:
+            outputs = load_behavioral(self.kernel)(*in_buffers, *[rtp.item() for rtp in self.rtps])
+            if isinstance(outputs, tuple):
+                outputs = outputs[0]
+            result = np.asarray(outputs).astype(expected.dtype)
+            if result.size != expected.size:
+                raise Exception(f"behavioral returned {result.size} elements, expected {expected.size}")
+            result = result.reshape(expected.shape)
+        else:
+            result = expected.copy()
+
+        if self.verbose:
+            print(f"Expected: {expected}")
+            print(f"Result: {result}")
+        eval_output = evaluate_result(result, expected, self.atol, self.rtol)
+
+        if trace_size > 0:
+            cycles = self.backend.cycles(max(in_buffer.size for in_buffer in in_buffers))
+            self.write_trace(trace_name, cycles)
+            dev = self.backend.device()
+            total_cycles, vector_cycles = trace_cycles(trace_name, self.xclbin, dev, convert=self.backend.trace_to_json)
+            return eval_output, total_cycles, vector_cycles
+        return eval_output
+
+    def _changes(self, cycles: Dict[str, int]):
+        """(cycle, active trace slots) of one kernel call: event0, the vector
+        unit busy for cycles['vector'] in the middle of the call, event1."""
+        slot = {name: i for i, name in enumerate(CORE_EVENT_SLOTS)}
+        start = 100
+        end = start + cycles['total']
+        vector_start = start + (cycles['total'] - cycles['vector']) // 2
+        return [(start, [slot["INSTR_EVENT_0"]]), (start + 1, []),
+                (vector_start, [slot["INSTR_VECTOR"]]), (vector_start + cycles['vector'], []),
+                (end, [slot["INSTR_EVENT_1"]]), (end + 1, [])]
+
+    def write_trace(self, trace_name: str, cycles: Dict[str, int]):
+        """Core trace packets of the compute tile (column 0, shifted by one on
+        npu1 like parse_trace.py's colshift, row 2) in write_out_trace's format."""
+        col = 1 if self.backend.device().startswith("npu1") else 0
+        write_trace_words(encode_trace(self._changes(cycles), col=col, row=2), trace_name)
+
+BACKENDS = {"hardware": HardwareBackend, "simulated": SimulatedBackend.from_env}
+
+_backend = None
+
+def set_backend(backend) -> None:
+    """Selects the backend by name ("hardware", "simulated") or instance,
+    None goes back to NPUEVAL_BACKEND."""
+    global _backend
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}, expected one of {', '.join(BACKENDS)}")
+        backend = BACKENDS[backend]()
+    _backend = backend
+
+def get_backend():
+    """The backend set with set_backend, else the one named by NPUEVAL_BACKEND
+    (defaults to hardware)."""
+    if _backend is not None:
+        return _backend
+    name = os.environ.get("NPUEVAL_BACKEND", "hardware")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown NPUEVAL_BACKEND {name}, expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
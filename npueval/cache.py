@@ -0,0 +1,128 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import json
+import time
+import pathlib
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+class CacheMiss(KeyError):
+    """Raised in replay mode when a request has no cached response."""
+
+class ResponseCache:
+    """Disk-backed cache of LLM responses keyed on the full request payload.
+
+    Requests are identified by a SHA-256 of their canonical JSON (provider,
+    endpoint, model, messages, sampling parameters, seed, and whether the
+    response was streamed with early stopping), so rerunning a sweep
+    after a crash or re-executing a notebook only pays for requests it hasn't
+    made before. Entries hold the response text and its token usage and are
+    evicted least-recently-used once the cache exceeds max_bytes.
+
+    Parameters
+    ----------
+    path : str, optional
+        SQLite database file, defaults to NPUEVAL_CACHE_DIR/responses.sqlite.
+    max_bytes : int, optional
+        Size limit for stored responses, None for unlimited.
+    mode : str, optional
+        "readwrite" (default) serves hits and stores misses, "replay" only serves
+        hits and raises CacheMiss otherwise, so pipelines can be reproduced offline
+        without an API key, "off" disables the cache.
+    """
+
+    MODES = ("readwrite", "replay", "off")
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None, mode: str = "readwrite"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported cache mode: {mode}, choose one of {self.MODES}")
+        if path is None:
+            root = os.environ.get("NPUEVAL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "npueval"))
+            path = os.path.join(root, "responses.sqlite")
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                    key TEXT PRIMARY KEY,
+                                    response TEXT NOT NULL,
+                                    usage TEXT NOT NULL,
+                                    size INTEGER NOT NULL,
+                                    created REAL NOT NULL,
+                                    accessed REAL NOT NULL)""")
+
+    @staticmethod
+    def key(payload: Dict[str, Any]) -> str:
+        """Canonical hash of a request payload."""
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns {"response": str, "usage": dict} for key, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT response, usage FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                if self.replay:
+                    raise CacheMiss(key)
+                return None
+            self.hits += 1
+            if not self.replay:
+                with self._db:
+                    self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        return {"response": row[0], "usage": json.loads(row[1])}
+
+    def put(self, key: str, response: str, usage: Dict[str, Any]):
+        if self.mode != "readwrite":
+            return
+        usage_json = json.dumps(usage)
+        size = len(response.encode()) + len(usage_json)
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, response, usage_json, size, now, now))
+            if self.max_bytes is not None:
+                self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        self._db.close()
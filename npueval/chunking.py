@@ -0,0 +1,284 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import re
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from .context import estimate_text_tokens
+from .rag import (CORPUS_DIR, DTYPE_ALIASES, LANES_RE, VECTOR_TYPE_RE,
+                  BM25Retriever, tokenize)
+from .sanitizer import code_structure
+
+# extern "C" and namespace blocks are containers, their contents are top level
+CONTAINER_RE = re.compile(r'^(?:extern\s*"C"|(?:inline\s+)?namespace(?:\s+[\w:]+)?)\s*$')
+AIE_OP_RE = re.compile(r'\baie::(\w+)')
+CONSTANT_RE = re.compile(r'\b(\w+)\s*=\s*(\d+)\s*;')
+SYMBOLIC_LANES_RE = re.compile(r'\b(?:vector|accum|mask|load_v|store_v|broadcast|zeros)\s*<\s*(?:\w+\s*,\s*)?(\w+)\s*>')
+DTYPES = frozenset(DTYPE_ALIASES.values())
+
+def _leading_comment(text: str, start: int, floor: int) -> int:
+    """Start of the comment block directly above start, not before floor."""
+    lines = text[floor:start].split("\n")
+    # The last element is the indentation before start
+    keep = 0
+    in_block = False
+    for line in reversed(lines[:-1]):
+        stripped = line.strip()
+        if in_block:
+            keep += 1
+            if stripped.startswith("/*"):
+                in_block = False
+            continue
+        if stripped.startswith("//"):
+            keep += 1
+        elif stripped.endswith("*/"):
+            keep += 1
+            in_block = not stripped.startswith("/*")
+        else:
+            break
+    return start - sum(len(l) + 1 for l in lines[len(lines) - 1 - keep:-1]) if keep else start
+
+def _unit_name(header: str) -> Tuple[str, str]:
+    header = re.sub(r'//[^\n]*|/\*.*?\*/', ' ', header, flags=re.DOTALL).strip()
+    kind = "template" if header.startswith("template") else "function"
+    header = re.sub(r'__attribute__\s*\(\(.*?\)\)', ' ', header, flags=re.DOTALL)
+    # Drop template parameter and argument lists, innermost first
+    while True:
+        stripped = re.sub(r'<[^<>]*>', ' ', header)
+        if stripped == header:
+            break
+        header = stripped
+    m = re.match(r'\s*(struct|class|union|enum)(?:\s+class)?\s+(\w+)', header)
+    if m:
+        return m.group(2), m.group(1)
+    paren = header.find("(")
+    names = re.findall(r'[A-Za-z_]\w*', header[:paren] if paren >= 0 else header)
+    return (names[-1] if names else ""), kind
+
+def unit_metadata(code: str) -> Dict[str, Any]:
+    """AIE API ops, dtypes and vector widths used by a code unit.
+
+    Symbolic lane counts (aie::vector<T, vec_factor>) are resolved when the unit
+    defines them as integer constants.
+    """
+    constants = dict(CONSTANT_RE.findall(code))
+    widths = {int(lanes) for _, _, lanes in VECTOR_TYPE_RE.findall(code)}
+    widths.update(int(lanes) for lanes in LANES_RE.findall(code))
+    for symbol in SYMBOLIC_LANES_RE.findall(code):
+        value = symbol if symbol.isdigit() else constants.get(symbol)
+        if value is not None:
+            widths.add(int(value))
+    return {
+        "ops": sorted(set(AIE_OP_RE.findall(code))),
+        "dtypes": sorted({t for t in tokenize(code) if t in DTYPES}),
+        "vector_widths": sorted(widths),
+    }
+
+def chunk_source(text: str, path: str = "") -> List[Dict[str, Any]]:
+    """Splits a C++ kernel source into top level function, template and struct
+    units.
+
+    Each unit keeps the comment block directly above it. Contents of extern "C"
+    and namespace blocks are treated as top level, preprocessor lines and
+    declarations without a body are dropped. If the braces can't be matched
+    the whole file is returned as a single unit.
+
+    Parameters
+    ----------
+    text : str
+        Source code.
+    path : str, optional
+        File name stored with each unit.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        One dictionary per unit with path, name, kind (function, template,
+        struct, class, union, enum or file), start_line, end_line, code, plus
+        the unit_metadata fields.
+    """
+    units = []
+    depth = 0
+    containers = []
+    start = None  # start of the current unit
+    floor = 0     # end of the previous unit, preprocessor line or container
+    pending_end = None
+    for c, i, end in code_structure(text):
+        if pending_end is not None:
+            # A closing brace followed by ; ends a struct/class definition
+            units[-1]['end'] = end if c == ";" and depth == 0 else pending_end
+            floor = units[-1]['end']
+            pending_end = None
+            if c == ";" and depth == 0:
+                continue
+        if c == "#":
+            if depth == 0:
+                floor, start = end, None
+            continue
+        if depth == 0 and start is None:
+            m = re.search(r'\S', text[floor:i + 1])
+            start = floor + m.start() if m else i
+            # Skip comments between the previous unit and this one
+            while text.startswith(("//", "/*"), start):
+                close = text.find("\n" if text.startswith("//", start) else "*/", start)
+                close = len(text) if close < 0 else close + (1 if text.startswith("//", start) else 2)
+                m = re.search(r'\S', text[close:i + 1])
+                start = close + m.start() if m else i
+        if c == "{":
+            if depth == 0 and CONTAINER_RE.match(text[start:i].strip()):
+                containers.append(depth)
+                floor, start = i + 1, None
+                continue
+            depth += 1
+        elif c == "}":
+            if depth == 0:
+                if not containers:
+                    break
+                containers.pop()
+                floor, start = i + 1, None
+                continue
+            depth -= 1
+            if depth == 0:
+                units.append({"start": start, "end": end})
+                pending_end = end
+                start = None
+        elif c == ";" and depth == 0:
+            # Declaration without a body
+            floor, start = end, None
+    else:
+        if pending_end is not None:
+            units[-1]['end'] = pending_end
+        if depth == 0 and not containers and units:
+            chunks = []
+            previous_end = 0
+            for unit in units:
+                begin = _leading_comment(text, unit['start'], previous_end)
+                code = text[begin:unit['end']]
+                name, kind = _unit_name(text[unit['start']:text.find("{", unit['start'])])
+                chunks.append({
+                    "path": path,
+                    "name": name,
+                    "kind": kind,
+                    "start_line": text.count("\n", 0, begin) + 1,
+                    "end_line": text.count("\n", 0, unit['end']) + 1,
+                    "code": code.strip("\n") + "\n",
+                    **unit_metadata(code),
+                })
+                previous_end = unit['end']
+            return chunks
+
+    return [{"path": path, "name": os.path.splitext(os.path.basename(path))[0], "kind": "file",
+             "start_line": 1, "end_line": text.count("\n") + 1, "code": text, **unit_metadata(text)}]
+
+def _fingerprint(code: str) -> str:
+    return hashlib.sha256(" ".join(code.split()).encode()).hexdigest()
+
+def _overlap(a: set, b: set) -> float:
+    return len(a & b) / max(1, min(len(a), len(b)))
+
+def assemble_context(candidates: List[Dict[str, Any]],
+                     max_tokens: int = 2048,
+                     max_units: Optional[int] = None,
+                     max_overlap: float = 0.8) -> List[Dict[str, Any]]:
+    """Greedily fills a token budget with the best candidates.
+
+    Candidates are taken in order (best first). Units that don't fit in the
+    remaining budget are skipped in favour of smaller ones further down, exact
+    duplicates (ignoring whitespace, e.g. mm.cc and mm_b_col_maj.cc share most
+    of their functions) and units whose token set overlaps an already selected
+    unit by more than max_overlap are dropped.
+
+    Parameters
+    ----------
+    candidates : List[Dict[str, Any]]
+        Units with code, in decreasing relevance.
+    max_tokens : int, optional
+        Token budget for the selected code.
+    max_units : int, optional
+        Maximum number of units, None for no limit.
+    max_overlap : float, optional
+        Token set overlap (relative to the smaller unit) above which a unit is
+        considered a near duplicate.
+    """
+    selected = []
+    seen = set()
+    token_sets = []
+    remaining = max_tokens
+    for unit in candidates:
+        if max_units is not None and len(selected) >= max_units:
+            break
+        text = format_unit(unit)
+        cost = estimate_text_tokens(text)
+        if cost > remaining:
+            continue
+        fingerprint = _fingerprint(unit['code'])
+        if fingerprint in seen:
+            continue
+        tokens = set(tokenize(unit['code']))
+        if any(_overlap(tokens, other) > max_overlap for other in token_sets):
+            continue
+        seen.add(fingerprint)
+        token_sets.append(tokens)
+        selected.append(unit)
+        remaining -= cost
+    return selected
+
+def format_unit(unit: Dict[str, Any]) -> str:
+    """Unit code with a comment line saying where it comes from."""
+    return f"// {unit['path']}:{unit['start_line']}-{unit['end_line']} {unit['name']}\n{unit['code']}"
+
+class ChunkRetriever(BM25Retriever):
+    """BM25 retriever over function/template units instead of whole files.
+
+    search ranks all units of the corpus and assembles the best of them into
+    max_tokens, so k is the maximum number of units rather than files and the
+    context size stays bounded however large the matching sources are.
+
+    Parameters
+    ----------
+    corpus_dir : str, optional
+        Reference kernels to index.
+    index_path : str, optional
+        Serialized index, defaults to default_index_path("bm25_chunks", corpus_dir).
+    max_tokens : int, optional
+        Token budget of the retrieved context.
+    max_overlap : float, optional
+        Near duplicate threshold, see assemble_context.
+    k1, b : float, optional
+        BM25 parameters.
+    """
+
+    backend = "bm25_chunks"
+
+    def __init__(self,
+                 corpus_dir: str = CORPUS_DIR,
+                 index_path: Optional[str] = None,
+                 max_tokens: int = 2048,
+                 max_overlap: float = 0.8,
+                 k1: float = 1.5,
+                 b: float = 0.75):
+        super().__init__(corpus_dir=corpus_dir, index_path=index_path, k1=k1, b=b)
+        self.max_tokens = max_tokens
+        self.max_overlap = max_overlap
+
+    def documents(self, name: str, text: str):
+        for unit in chunk_source(text, name):
+            meta = {key: value for key, value in unit.items() if key != "code"}
+            yield f"{name}:{unit['start_line']}", unit['code'], meta
+
+    def config(self) -> Dict[str, Any]:
+        return {**super().config(), "max_tokens": self.max_tokens, "max_overlap": self.max_overlap}
+
+    def units(self, query: str) -> List[Dict[str, Any]]:
+        """All units ranked for query, with their BM25 score."""
+        self.check()
+        index = self.index
+        return [{**index.meta[doc_id], "id": doc_id, "code": index.texts[doc_id], "score": score}
+                for doc_id, score in index.search(query, len(index))]
+
+    def search(self, query: str, k: int = 1) -> List[Tuple[str, str, float]]:
+        selected = assemble_context(self.units(query), max_tokens=self.max_tokens,
+                                    max_units=k, max_overlap=self.max_overlap)
+        return [(unit['id'], format_unit(unit), unit['score']) for unit in selected]
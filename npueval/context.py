@@ -0,0 +1,72 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+from typing import Dict, List, Optional, Tuple
+
+def estimate_text_tokens(text: str) -> int:
+    """Rough token count of a text (~4 characters per token)."""
+    return len(text) // 4
+
+def estimate_tokens(messages: List[Dict]) -> int:
+    """Rough token count of a message list, see estimate_text_tokens."""
+    return estimate_text_tokens("".join(m['content'] for m in messages))
+
+class ConversationWindow:
+    """Bounds the context an AIECoder repair loop sends to the model.
+
+    A repair loop grows as [system, task, response 1, diagnostics 1, response 2,
+    diagnostics 2, ...], so without a bound prompt tokens grow quadratically with
+    the number of attempts. The window keeps the system prompt, the original task
+    and the last max_attempts response/diagnostic pairs. Older pairs are dropped,
+    or with summarize=True condensed into a note appended to the task so the model
+    still knows which approaches already failed. Messages from earlier tasks in
+    the same conversation are never sent.
+
+    Parameters
+    ----------
+    max_attempts : int, optional
+        Number of most recent response/diagnostic pairs to keep, None keeps all.
+    summarize : bool, optional
+        Replace dropped pairs with a one line summary each.
+    """
+
+    def __init__(self, max_attempts: Optional[int] = None, summarize: bool = False):
+        self.max_attempts = max_attempts
+        self.summarize = summarize
+
+    @staticmethod
+    def _summarize(pairs: List[Dict]) -> str:
+        lines = []
+        for i in range(0, len(pairs), 2):
+            feedback = pairs[i + 1]['content'] if i + 1 < len(pairs) else ""
+            # First line after the "Compilation failed with:" header is the first error
+            detail = [l for l in feedback.splitlines()[1:] if l.strip()][:1] or feedback.splitlines()[:1]
+            lines.append(f"Attempt {i // 2 + 1}: {detail[0].strip() if detail else 'no feedback'}")
+        return "Summary of earlier failed attempts:\n" + "\n".join(lines)
+
+    def select(self, messages: List[Dict], task_start: int) -> Tuple[List[Dict], int]:
+        """Returns the messages to send and the estimated prompt tokens saved.
+
+        Parameters
+        ----------
+        messages : List[Dict]
+            Full conversation history, starting with the system prompt.
+        task_start : int
+            Index of the user message that started the current task.
+        """
+        if self.max_attempts is None:
+            return messages, 0
+
+        system = [m for m in messages[:1] if m['role'] == 'system']
+        task = dict(messages[task_start])
+        attempts = messages[task_start + 1:]
+
+        keep = 2 * self.max_attempts
+        dropped = attempts[:-keep] if keep else attempts
+        kept = attempts[-keep:] if keep else []
+
+        if dropped and self.summarize:
+            task['content'] = f"{task['content']}\n\n{self._summarize(dropped)}"
+
+        selected = system + [task] + kept
+        return selected, max(0, estimate_tokens(messages) - estimate_tokens(selected))
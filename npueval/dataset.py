@@ -3,18 +3,90 @@
 
 import json
 import os
+import re
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Iterator
+from typing import List, Dict, Any, Optional, Iterator, Callable, Union
+
+from .vectors import resolve_vector_paths
+
+INDEX_VERSION = 2
+
+# Op families of the dataset README, first match wins
+OP_FAMILIES = (
+    ("reduction", ("reduce", "argmax", "argmin", "norm", "dist", "loss", "variance", "max_abs")),
+    ("spatial", ("conv", "pool", "dotproduct", "matrix", "matmul", "gather")),
+    ("bitwise", ("bitwise", "bitcount", "compare", "cast", "pad", "shuffle")),
+)
+DTYPE_SUFFIX_RE = re.compile(r'_(?:u?int(?:8|16|32|64)|bfloat16|float32)(?:idx)?(?=_|$)')
+
+def op_family(kernel_name: str) -> str:
+    """Op family derived from the kernel name: reduction, spatial, bitwise
+    (including comparisons, casts and data movement) or elementwise."""
+    for family, keywords in OP_FAMILIES:
+        if any(keyword in kernel_name for keyword in keywords):
+            return family
+    return "elementwise"
+
+def _shape(value: Any) -> List[int]:
+    if isinstance(value, dict):
+        if 'shape' in value:
+            return list(value['shape'])
+        return []
+    shape = []
+    while isinstance(value, list):
+        shape.append(len(value))
+        value = value[0] if value else None
+    return shape
+
+def record_metadata(test: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary of a dataset record that doesn't need its test vectors."""
+    tv = test['test_vectors']
+    buffers = {}
+    for kind in ("inputs", "outputs"):
+        buffers[kind] = []
+        for entry in tv.get(kind, []):
+            name = next(k for k in entry if k != "dtype")
+            shape = _shape(entry[name])
+            size = 1
+            for dim in shape:
+                size *= dim
+            buffers[kind].append({"name": name, "dtype": entry['dtype'], "shape": shape, "size": size})
+    rtps = {}
+    for rtp in tv.get('rtps') or []:
+        name = next(k for k in rtp if k != "dtype")
+        rtps[name] = rtp[name]
+    metadata = {
+        "kernel_name": test['kernel_name'],
+        "op": DTYPE_SUFFIX_RE.sub("", test['kernel_name']),
+        "family": op_family(test['kernel_name']),
+        "dtypes": sorted({b['dtype'] for bufs in buffers.values() for b in bufs}),
+        "inputs": buffers['inputs'],
+        "outputs": buffers['outputs'],
+        "rtps": rtps,
+    }
+    if 'sweep' in test:
+        # Size variant of npueval_sweep.jsonl
+        metadata['sweep'] = test['sweep']
+        metadata['op'] = DTYPE_SUFFIX_RE.sub("", test['sweep']['base'])
+    return metadata
 
 class NPUEvalDataset:
-    """Dataset class for NPUEval benchmark data."""
-    
-    def __init__(self, jsonl_path: str = None):
+    """Dataset class for NPUEval benchmark data.
+
+    Records are parsed on demand. The first access builds an index of byte
+    offsets and per-record metadata (see record_metadata) which is cached next
+    to the JSONL file as <file>.index.json and rebuilt when the file changes,
+    so filtering and slicing never touch the test vectors of unrelated kernels.
+    """
+
+    def __init__(self, jsonl_path: str = None, cache_size: int = 32):
         """
         Initialize the dataset.
-        
+
         Args:
             jsonl_path: Path to the JSONL dataset file
+            cache_size: Number of parsed records kept in memory
         """
         if jsonl_path is None:
             # Get path relative to this module's location
@@ -22,63 +94,193 @@ class NPUEvalDataset:
             self.jsonl_path = package_dir / "dataset" / "npueval.jsonl"
         else:
             self.jsonl_path = Path(jsonl_path)
-        
+
+        self.cache_size = cache_size
+        self._index: Optional[Dict[str, Any]] = None
+        self._indices: Optional[List[int]] = None
+        self._by_name: Optional[Dict[str, int]] = None
+        self._records = OrderedDict()
         self._tests: Optional[List[Dict[str, Any]]] = None
-    
-    def load(self) -> List[Dict[str, Any]]:
+
+    @property
+    def index_path(self) -> Path:
+        return self.jsonl_path.with_name(self.jsonl_path.name + ".index.json")
+
+    def _build_index(self, size: int, mtime_ns: int) -> Dict[str, Any]:
+        entries = []
+        offset = 0
+        with open(self.jsonl_path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    entries.append({"offset": offset, "length": len(line),
+                                    **record_metadata(json.loads(line))})
+                offset += len(line)
+        index = {"version": INDEX_VERSION, "size": size, "mtime_ns": mtime_ns, "records": entries}
+        try:
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass # read-only install, keep the index in memory
+        return index
+
+    def build_index(self) -> Dict[str, Any]:
         """
-        Load the dataset from file.
-        
+        Load the offset index, building it if missing or out of date.
+
         Returns:
-            List of test cases as dictionaries
+            Index with the file size, mtime and one entry per record
         """
         if not os.path.exists(self.jsonl_path):
             raise FileNotFoundError(f"Dataset file not found: {self.jsonl_path}")
-        
-        with open(self.jsonl_path, 'r') as f:
-            self._tests = [json.loads(line) for line in f]
-        
-        return self._tests
-    
+        st = os.stat(self.jsonl_path)
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    index = json.load(f)
+                if (index.get('version'), index.get('size'), index.get('mtime_ns')) == (INDEX_VERSION, st.st_size, st.st_mtime_ns):
+                    return index
+            except (OSError, ValueError):
+                pass
+        return self._build_index(st.st_size, st.st_mtime_ns)
+
+    @property
+    def index(self) -> Dict[str, Any]:
+        if self._index is None:
+            self._index = self.build_index()
+        return self._index
+
+    @property
+    def indices(self) -> List[int]:
+        """Positions in the file of the records in this dataset (or view)."""
+        if self._indices is None:
+            return list(range(len(self.index['records'])))
+        return self._indices
+
+    @property
+    def metadata(self) -> List[Dict[str, Any]]:
+        """Metadata table, one row per record."""
+        records = self.index['records']
+        return [records[i] for i in self.indices]
+
+    @property
+    def names(self) -> List[str]:
+        return [row['kernel_name'] for row in self.metadata]
+
+    def _view(self, indices: List[int]) -> "NPUEvalDataset":
+        view = NPUEvalDataset.__new__(NPUEvalDataset)
+        view.jsonl_path = self.jsonl_path
+        view.cache_size = self.cache_size
+        view._index = self.index
+        view._indices = indices
+        view._by_name = None
+        view._records = self._records
+        view._tests = None
+        return view
+
+    def _record(self, position: int) -> Dict[str, Any]:
+        if position in self._records:
+            self._records.move_to_end(position)
+            return self._records[position]
+        entry = self.index['records'][position]
+        with open(self.jsonl_path, 'rb') as f:
+            f.seek(entry['offset'])
+            test = json.loads(f.read(entry['length']))
+        resolve_vector_paths(test, os.path.dirname(os.path.abspath(self.jsonl_path)))
+        self._records[position] = test
+        if len(self._records) > self.cache_size:
+            self._records.popitem(last=False)
+        return test
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        Load every test case of the dataset (or view) from file.
+
+        Returns:
+            List of test cases as dictionaries
+        """
+        return [self._record(i) for i in self.indices]
+
     @property
     def tests(self) -> List[Dict[str, Any]]:
-        """Get all test cases, loading if necessary."""
+        """Get all test cases, loading if necessary. Materializes every record,
+        prefer iteration, slicing or filter for large datasets."""
         if self._tests is None:
-            self.load()
+            self._tests = self.load()
         return self._tests
-    
+
     def __len__(self) -> int:
         """Return number of test cases."""
-        return len(self.tests)
-    
-    def __getitem__(self, index: int) -> Dict[str, Any]:
-        """Get a specific test case by index."""
-        return self.tests[index]
-    
+        return len(self.indices)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], "NPUEvalDataset"]:
+        """Get a specific test case by index, or a lazy view for a slice."""
+        if isinstance(index, slice):
+            return self._view(self.indices[index])
+        return self._record(self.indices[index])
+
     def __iter__(self) -> Iterator[Dict[str, Any]]:
-        """Make the dataset iterable."""
-        return iter(self.tests)
-    
+        """Make the dataset iterable, records are parsed one at a time."""
+        for i in self.indices:
+            yield self._record(i)
+
+    def filter(self, predicate: Optional[Callable[[Dict[str, Any]], bool]] = None, **criteria) -> "NPUEvalDataset":
+        """
+        Select test cases by metadata without parsing their records.
+
+        Args:
+            predicate: Optional function of a metadata row
+            **criteria: Metadata fields to match. dtype matches any buffer dtype,
+                other values are compared to the field, a list or tuple matches
+                any of its values and a callable is applied to the field
+
+        Returns:
+            A lazy view of the matching test cases, e.g.
+            dataset.filter(dtype="bfloat16", family="reduction")
+        """
+        def matches(row):
+            for key, expected in criteria.items():
+                value = row['dtypes'] if key == "dtype" else row[key]
+                if callable(expected):
+                    ok = expected(value)
+                elif key == "dtype":
+                    ok = any(e in value for e in (expected if isinstance(expected, (list, tuple)) else [expected]))
+                elif isinstance(expected, (list, tuple)):
+                    ok = value in expected
+                else:
+                    ok = value == expected
+                if not ok:
+                    return False
+            return predicate is None or predicate(row)
+
+        records = self.index['records']
+        return self._view([i for i in self.indices if matches(records[i])])
+
     def get_by_name(self, kernel_name: str) -> Optional[Dict[str, Any]]:
         """
         Get a test case by its name.
-        
+
         Args:
             kernel_name: The name of the test case to retrieve
-            
+
         Returns:
             Test case dictionary or None if not found
         """
-        for test in self.tests:
-            if test.get('kernel_name') == kernel_name:
-                return test
-        return None
-    
+        if self._by_name is None:
+            records = self.index['records']
+            self._by_name = {records[i]['kernel_name']: i for i in self.indices}
+        position = self._by_name.get(kernel_name)
+        return None if position is None else self._record(position)
+
     def reload(self) -> List[Dict[str, Any]]:
         """Force reload the dataset from file."""
+        self._index = None
+        self._by_name = None
         self._tests = None
+        self._records.clear()
         return self.load()
 
 
 # Create a default instance
-dataset = NPUEvalDataset()
\ No newline at end of file
+dataset = NPUEvalDataset()
@@ -4,9 +4,13 @@
 from CppHeaderParser import CppHeader
 from ml_dtypes import bfloat16
 import re
+import os
 import numpy as np
 import json
 
+from .sanitizer import extract_function_body
+from .vectors import BlobWriter, store_test_vectors, vector_format, write_npz
+
 C_TO_NUMPY_DTYPE = {
     "int8_t": "int8",
     "uint8_t": "uint8",
@@ -19,18 +23,69 @@ C_TO_NUMPY_DTYPE = {
     "bfloat16": "bfloat16"
 }
 
+# Default geometric sweep around the dataset size, see PromptConstructor.sweep
+SWEEP_SCALES = (0.25, 0.5, 1, 2, 4, 8, 16)
+MIN_SWEEP_ELEMENTS = 32
+
+def sweep_scales(spec=None):
+    """Parses a sweep spec: "default" or a comma separated list of size
+    scales. Defaults to NPUEVAL_SWEEP, returns () if sweeps are disabled."""
+    spec = spec if spec is not None else os.environ.get("NPUEVAL_SWEEP", "")
+    if isinstance(spec, (list, tuple)):
+        return tuple(float(s) for s in spec)
+    spec = spec.strip()
+    if not spec or spec in ("0", "off"):
+        return ()
+    if spec == "default":
+        return SWEEP_SCALES
+    return tuple(float(s) for s in spec.split(","))
+
+# Integer constant declarations, "constexpr int32_t N = 1024;", and #defines
+SIZE_CONSTANT_RE = re.compile(
+    r'(\b(?:(?:static|const|constexpr|unsigned|signed)\s+)*'
+    r'(?:int|long|short|size_t|unsigned|u?int(?:8|16|32|64)_t)\s+\w+\s*=\s*|#define\s+\w+\s+)'
+    r'(\d+)(?=\s*;|[ \t]*(?://.*)?$)', re.MULTILINE)
+
+def rescale_sizes(text, sizes):
+    """Replaces whole number literals of text according to sizes, {old: new}."""
+    return re.sub(r'(?<![\w.])(\d+)(?!\w|\.\d)', lambda m: str(sizes.get(int(m.group(1)), m.group(1))), text)
+
+def rescale_size_constants(source, sizes):
+    """Like rescale_sizes for C++ source, but only the values of integer
+    constant declarations and #defines are replaced. Other literals that
+    happen to equal a size, e.g. the clamp in "if (x < -128) x = -128;",
+    are left alone."""
+    return SIZE_CONSTANT_RE.sub(lambda m: m.group(1) + str(sizes.get(int(m.group(2)), m.group(2))), source)
+
+def _resample(arr, n, rng):
+    """arr resized to n elements, the original values come first and the rest
+    are drawn from them so the value distribution is unchanged."""
+    if n <= arr.size:
+        return arr[:n].copy()
+    return np.concatenate([arr, rng.choice(arr, n - arr.size)])
+
 def extract_canonical(src):
-    match = re.search(r'void\s+\w+\s*\(.*?\)\s*{(.*)}', src, re.DOTALL)
-    if match:
-        return match.group(1).strip() + "\n}"
-    else:
+    body = extract_function_body(src)
+    if body is None:
         raise Exception("Couldn't parse canonical solution.")
+    return body
 
 class PromptConstructor:
-    def __init__(self, source_path, description, behavioral, input_arrays, rtp_values=None, tolerances=None):
+    def __init__(self, source_path, description, behavioral, input_arrays, rtp_values=None, tolerances=None,
+                 source_code=None, kernel_name=None, sweep=None):
+        # Kept for sweep variants
+        self.source_path = source_path
+        self.description = description
+        self.behavioral = behavioral
+        self.input_arrays = input_arrays
+        self.rtp_values = rtp_values
+        self.tolerances = tolerances
+
         # --- Parse source + function ---
-        with open(source_path, "r") as f:
-            source_code = f.read()
+        if source_code is None:
+            with open(source_path, "r") as f:
+                source_code = f.read()
+        self.source_code = source_code
         parsedcpp = CppHeader(source_code, argType='string')
 
         if len(parsedcpp.functions) > 1:
@@ -38,35 +93,33 @@ class PromptConstructor:
 
         func = parsedcpp.functions[0]
         self.name = func['name']
+        # Dataset name, differs from the function name for sweep variants
+        self.kernel_name = kernel_name or self.name
         self.buffers = [p for p in func['parameters'] if p['pointer']]
         self.rtps = [p for p in func['parameters'] if not p['pointer']]
         self.signature = self._construct_signature()
         self.call = self._construct_call()
 
         # --- Extract canonical solution ---
-        with open(source_path, "r") as f:
-            src = f.read()
-        canonical_solution = extract_canonical(src)
+        canonical_solution = extract_canonical(source_code)
 
         # --- Generate test_vectors ---
         outputs = behavioral(*input_arrays, *rtp_values) if rtp_values else behavioral(*input_arrays)
         if not isinstance(outputs, tuple):
             outputs = (outputs,)
 
-        test_vectors = {"inputs": [], "outputs": []}
+        # Arrays are kept as numpy until written, see write_json
+        self.arrays = {"inputs": [], "outputs": []}
         for i, arr in enumerate(input_arrays):
-            buf_name = self.buffers[i]['name']
-            test_vectors["inputs"].append({
-                buf_name: arr.tolist(),
-                "dtype": str(arr.dtype)
-            })
+            self.arrays["inputs"].append((self.buffers[i]['name'], np.asarray(arr)))
         for i, out in enumerate(outputs):
             # assume last one because we only support 1 output buf
-            buf_name = self.buffers[-1]['name']
-            test_vectors["outputs"].append({
-                buf_name: out.tolist(),
-                "dtype": str(out.dtype)
-            })
+            self.arrays["outputs"].append((self.buffers[-1]['name'], np.asarray(out)))
+
+        test_vectors = {
+            kind: [{name: arr, "dtype": str(arr.dtype)} for name, arr in arrays]
+            for kind, arrays in self.arrays.items()
+        }
         if rtp_values:
             test_vectors["rtps"] = []
             for i, val in enumerate(rtp_values):
@@ -115,8 +168,8 @@ void {self.signature} {{
 }}
 """
 
-        self.sample = {
-            "kernel_name": self.name,
+        self._sample = {
+            "kernel_name": self.kernel_name,
             "prompt": prompt,
             "canonical_solution": canonical_solution,
             "program_code": program_code,
@@ -124,11 +177,143 @@ void {self.signature} {{
         }
 
         if tolerances:
-            self.sample['tolerances'] = tolerances
+            self._sample['tolerances'] = tolerances
+        if sweep:
+            self._sample['sweep'] = sweep
+
+    @property
+    def sample(self):
+        """The kernel.json record with inline test vectors."""
+        return store_test_vectors(self._sample, self.arrays, "inline")
+
+    def write_json(self, filepath, vectors=None):
+        """Writes the kernel record to filepath.
+
+        Parameters
+        ----------
+        filepath : str
+            Output json file.
+        vectors : str, optional
+            Test vector storage, "inline" (JSON lists), "npz" (numpy sidecar
+            next to filepath) or "blob" (raw binary sidecar with an offset
+            table), defaults to NPUEVAL_VECTORS or inline.
+        """
+        fmt = vector_format(vectors)
+        stem = os.path.splitext(filepath)[0]
+        if fmt == "npz":
+            npz_arrays = {}
+            sample = store_test_vectors(self._sample, self.arrays, fmt,
+                                        npz_path=f"{stem}.npz", npz_arrays=npz_arrays)
+            write_npz(f"{stem}.npz", npz_arrays)
+        elif fmt == "blob":
+            with BlobWriter(f"{stem}.vectors.bin") as blob:
+                sample = store_test_vectors(self._sample, self.arrays, fmt, blob=blob)
+        else:
+            sample = self.sample
+        with open(filepath, "w") as f:
+            json.dump(sample, f)
+
+        if sweep_scales():
+            self.write_sweep(f"{stem}_sweep.jsonl")
+
+    def sweep(self, scales=None, dev=None):
+        """Variants of this kernel at geometrically spaced sizes.
+
+        Inputs with the size of the first input are resized by each scale
+        (see _resample), smaller inputs like convolution weights are kept,
+        integer RTPs equal to the input size are set to the new size.
+
+        Kernels with such a size RTP are swept with a shared prompt: every
+        variant has the prompt and canonical solution of the dataset kernel
+        and is evaluated with its solution, so one generated kernel is
+        measured across sizes. The other kernels have their size built in,
+        their variants get the dataset sizes rescaled in the description and
+        in the size constants of the canonical solution (see
+        rescale_size_constants) and need a solution per size. Sizes whose
+        buffers don't fit in the compute tile of build_app, or that
+        behavioral can't handle, are skipped. Only kernels with 1D inputs
+        are swept.
+
+        Parameters
+        ----------
+        scales : str or tuple, optional
+            Size scales, see sweep_scales, defaults to NPUEVAL_SWEEP or SWEEP_SCALES.
+        dev : str, optional
+            Device whose tile memory limits the sizes, defaults to NPU or npu1.
+
+        Returns
+        -------
+        list
+            PromptConstructor for each size, named <kernel>_n<elements> with
+            a "sweep" entry {"base", "scale", "elements", "base_elements",
+            "shared"}.
+        """
+        from .iron import fits_in_tile
+        scales = sweep_scales(scales) or SWEEP_SCALES
+        dev = dev or os.environ.get("NPU", "npu1")
+        base_elements = np.size(self.input_arrays[0])
+        swept = [np.size(arr) == base_elements for arr in self.input_arrays]
+        if any(np.ndim(arr) != 1 for arr, s in zip(self.input_arrays, swept) if s):
+            print(f"Warning: {self.name} has multi-dimensional inputs, skipping sweep")
+            return []
+        base_out = self.arrays["outputs"][0][1].size
+        shared = bool(self.rtp_values) and any(isinstance(v, (int, np.integer)) and v == base_elements
+                                               for v in self.rtp_values)
+
+        rng = np.random.default_rng(0)
+        variants = []
+        for scale in sorted(scales):
+            n = int(round(base_elements * scale))
+            if n < MIN_SWEEP_ELEMENTS:
+                continue
+            inputs = [_resample(np.asarray(arr), n, rng) if s else arr for arr, s in zip(self.input_arrays, swept)]
+            # Size parameters like vector_size follow the inputs
+            rtp_values = [n if isinstance(v, (int, np.integer)) and v == base_elements else v
+                          for v in self.rtp_values] if self.rtp_values else self.rtp_values
+            try:
+                out = np.asarray(self.behavioral(*inputs, *rtp_values) if rtp_values else self.behavioral(*inputs))
+            except Exception as e:
+                print(f"Warning: {self.name} behavioral failed for {n} elements ({e}), skipping")
+                continue
+            if n != base_elements and out.size == base_out != 1:
+                print(f"Warning: {self.name} output size doesn't depend on the input size, skipping sweep")
+                return []
+            # Shim DMAs move 4 byte words, build_app pads the output itself
+            if any(np.asarray(arr).nbytes % 4 for arr in inputs):
+                continue
+            if not fits_in_tile(inputs, out, dev):
+                continue
+            sizes = {base_elements: n}
+            if base_out not in (base_elements, 1):
+                sizes[base_out] = out.size
+            variant = PromptConstructor(
+                self.source_path,
+                self.description if shared else rescale_sizes(self.description, sizes),
+                self.behavioral,
+                inputs,
+                rtp_values=rtp_values,
+                tolerances=self.tolerances,
+                source_code=self.source_code if shared else rescale_size_constants(self.source_code, sizes),
+                kernel_name=f"{self.name}_n{n}",
+                sweep={"base": self.kernel_name, "scale": scale, "elements": n, "base_elements": int(base_elements),
+                       "shared": shared},
+            )
+            if shared:
+                # The size only reaches the kernel through the RTP
+                variant._sample['prompt'] = self._sample['prompt']
+            variants.append(variant)
+        if len(variants) < 2:
+            print(f"Warning: {self.name} has less than two sweep sizes, skipping sweep")
+            return []
+        return variants
 
-    def write_json(self, filepath):
+    def write_sweep(self, filepath, scales=None, dev=None):
+        """Writes the sweep variants of this kernel to filepath as JSON lines
+        with inline test vectors."""
         with open(filepath, "w") as f:
-            json.dump(self.sample, f)
+            for variant in self.sweep(scales, dev):
+                json.dump(variant.sample, f)
+                f.write("\n")
 
     # Internal methods
     def _construct_signature(self):
@@ -146,7 +331,7 @@ void {self.signature} {{
         rtp = ", ".join([f"{r['type']} {r['name']}" for r in self.rtps])
         params = buf if not self.rtps else f"{buf}, {rtp}"
         return f"""extern "C" {{
-    void {self.name}_wrapper({params}) {{
+    void {self.kernel_name}_wrapper({params}) {{
         ::aie::set_rounding(aie::rounding_mode::positive_inf);
         event0();
         {self.call};
@@ -0,0 +1,160 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import re
+from typing import Dict, List, Optional
+
+# clang's "file:line:col: severity: message [-Wflag]" diagnostic lines, also
+# when a caller prefixed the log with its own "...: " message
+DIAGNOSTIC_RE = re.compile(
+    r'(?:^|(?<=: ))(?P<file>[^\s:][^:\n]*):(?P<line>\d+):(?P<column>\d+):'
+    r' (?P<severity>fatal error|error|warning|note|remark): (?P<message>.*)$'
+)
+
+def parse_diagnostics(log: str) -> List[Dict]:
+    """Parses a clang compile log into a list of diagnostics.
+
+    Parameters
+    ----------
+    log : str
+        Combined stdout/stderr of a clang invocation.
+
+    Returns
+    -------
+    List[Dict]
+        One dictionary per diagnostic line with file, line, column, severity and
+        message. Source excerpts and caret lines are skipped.
+    """
+    diagnostics = []
+    for text in log.splitlines():
+        m = DIAGNOSTIC_RE.search(text)
+        if m:
+            diagnostics.append({
+                'file': m.group('file'),
+                'line': int(m.group('line')),
+                'column': int(m.group('column')),
+                'severity': m.group('severity'),
+                'message': m.group('message'),
+            })
+    return diagnostics
+
+def count_errors(diagnostics: List[Dict]) -> int:
+    """Number of error and fatal error diagnostics."""
+    return sum(d['severity'] in ('error', 'fatal error') for d in diagnostics)
+
+def group_diagnostics(diagnostics: List[Dict]) -> List[Dict]:
+    """Groups parsed diagnostics into errors/warnings with their trailing notes.
+
+    clang prints the notes belonging to a diagnostic (candidates, "in instantiation
+    of ... requested here" backtraces) right after it, so every note is attached
+    to the closest preceding error or warning.
+    """
+    groups = []
+    for d in diagnostics:
+        if d['severity'] == 'note':
+            if groups:
+                groups[-1]['notes'].append(d)
+        else:
+            groups.append({**d, 'notes': []})
+    return groups
+
+def _is_source(d: Dict, source_file: Optional[str]) -> bool:
+    if source_file is None:
+        return True
+    return os.path.basename(d['file']) == os.path.basename(source_file)
+
+def summarize_diagnostics(log: str,
+                          source: Optional[str] = None,
+                          source_file: Optional[str] = None,
+                          line_offset: int = 0,
+                          max_errors: int = 5,
+                          max_notes: int = 3,
+                          max_chars: int = 4000) -> str:
+    """Condenses a clang compile log into a short report for an LLM repair prompt.
+
+    Errors are deduplicated on (message, location). Each error is reported at its
+    primary location in the kernel source. Errors in the source are reported where
+    clang puts them, notes pointing elsewhere in the source stay notes. When clang
+    points into a header
+    (typically deep inside aie_api templates), the innermost location in
+    source_file from the note chain is used instead and the header location is
+    kept as a note. At most max_notes notes are kept per error, and the source
+    line is quoted so the model doesn't have to count lines.
+
+    Parameters
+    ----------
+    log : str
+        Raw compiler output.
+    source : str, optional
+        The kernel source the locations refer to, used to quote offending lines.
+    source_file : str, optional
+        Name of the compiled source file, only its basename is compared. Locations
+        in other files are treated as headers. If None every location is a source
+        location.
+    line_offset : int, optional
+        Number of lines prepended to source before compiling, subtracted from
+        reported line numbers.
+    max_errors : int, optional
+        Maximum number of distinct errors to report.
+    max_notes : int, optional
+        Maximum number of notes per error.
+    max_chars : int, optional
+        Hard limit on the length of the returned report.
+
+    Returns
+    -------
+    str
+        The condensed report, or the truncated raw log if it contains no
+        parseable diagnostics (e.g. linker or driver failures).
+    """
+    groups = [g for g in group_diagnostics(parse_diagnostics(log))
+              if g['severity'] in ('error', 'fatal error')]
+    if not groups:
+        return log if len(log) <= max_chars else log[:max_chars] + "\n... (truncated)"
+
+    source_lines = source.splitlines() if source is not None else []
+
+    def location(d):
+        line = d['line'] - line_offset if _is_source(d, source_file) else d['line']
+        name = os.path.basename(d['file'])
+        return f"{name}:{line}:{d['column']}"
+
+    def quote(d):
+        line = d['line'] - line_offset
+        if _is_source(d, source_file) and 0 < line <= len(source_lines):
+            return f"    {line} | {source_lines[line - 1].strip()}\n"
+        return ""
+
+    seen = set()
+    report = []
+    for g in groups:
+        chain = [g] + g['notes']
+        primary = g
+        if not _is_source(g, source_file):
+            primary = next((d for d in reversed(chain) if _is_source(d, source_file)), g)
+        key = (g['message'], primary['file'], primary['line'], primary['column'])
+        if key in seen:
+            continue
+        seen.add(key)
+
+        entry = f"error: {g['message']} ({location(primary)})\n" + quote(primary)
+        notes = [d for d in chain if d is not primary]
+        for note in notes[:max_notes]:
+            severity = "note" if note['severity'] == 'note' else "at"
+            entry += f"  {severity}: {note['message']} ({location(note)})\n"
+        if len(notes) > max_notes:
+            entry += f"  ... {len(notes) - max_notes} more notes omitted\n"
+        report.append(entry)
+
+    summary = "".join(report[:max_errors])
+    omitted = len(report) - max_errors
+    if omitted > 0:
+        summary += f"... {omitted} more errors omitted\n"
+    summary += f"{len(report)} distinct errors"
+    if len(groups) > len(report):
+        summary += f" ({len(groups) - len(report)} duplicates removed)"
+
+    if len(summary) > max_chars:
+        summary = summary[:max_chars] + "\n... (truncated)"
+    return summary
@@ -0,0 +1,229 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .aiecoder import AIECoder
+from .cache import ResponseCache
+from .context import estimate_text_tokens
+from .utils import write_json_atomic
+
+# Statuses worth retrying: rate limiting, timeouts and server side failures
+RETRYABLE_STATUS = (408, 409, 429, 500, 502, 503, 504, 529)
+
+def provider_of(model: str, base_url: Optional[str] = None) -> str:
+    """Provider key used for rate limiting, mirrors the client selection in AIECoder."""
+    if model.startswith('claude'):
+        return "anthropic"
+    return base_url or "openai"
+
+def is_retryable(e: Exception) -> bool:
+    """True for rate limit, 5xx and connection errors from the OpenAI/Anthropic clients."""
+    status = getattr(e, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(e).__name__ in ("APIConnectionError", "APITimeoutError", "RateLimitError",
+                                "InternalServerError", "TimeoutError", "ConnectionError")
+
+class TokenBucket:
+    """Tokens-per-minute limiter. Requests reserve their estimated token count up
+    front and the reservation is corrected once the real usage is known."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: int):
+        # A single request larger than the bucket would wait forever, cap it
+        tokens = min(tokens, self.capacity)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def settle(self, reserved: int, used: int):
+        """Return over-reserved tokens or charge the shortfall."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + min(reserved, self.capacity) - used)
+
+class GenerationEngine:
+    """Runs many AIECoder prompts concurrently with per-provider limits.
+
+    Each job gets its own AIECoder (so repair loops never share history) running
+    in a worker thread. Concurrency and tokens-per-minute are limited per provider,
+    failed jobs are retried with jittered exponential backoff on 429/5xx, and every
+    result is written atomically as soon as it arrives.
+
+    Parameters
+    ----------
+    limits : Dict[str, Dict], optional
+        Per-provider limits, e.g. {"openai": {"concurrency": 16, "tpm": 2_000_000}}.
+        The provider key is "openai", "anthropic" or the base_url for other
+        OpenAI-compatible servers, see provider_of.
+    concurrency : int, optional
+        Concurrency for providers without an explicit limit.
+    max_retries : int, optional
+        How many times a failed job is retried before giving up.
+    backoff_base : float, optional
+        First retry delay in seconds, doubled on every retry.
+    backoff_max : float, optional
+        Upper bound on a single retry delay.
+    completion_tokens_estimate : int, optional
+        Completion tokens reserved per attempt against the TPM budget.
+    coder_factory : Callable, optional
+        Builds the coder for a job, defaults to AIECoder.
+    cache : ResponseCache, optional
+        Response cache shared by all coders.
+    """
+
+    def __init__(self,
+                 limits: Optional[Dict[str, Dict]] = None,
+                 concurrency: int = 8,
+                 max_retries: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0,
+                 completion_tokens_estimate: int = 2048,
+                 coder_factory: Callable[..., AIECoder] = AIECoder,
+                 cache: Optional[ResponseCache] = None):
+        self.limits = limits or {}
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self.coder_factory = coder_factory
+        self.cache = cache
+        self._semaphores = {}
+        self._buckets = {}
+        self._executor = None
+
+    def _concurrency(self, provider: str) -> int:
+        return self.limits.get(provider, {}).get('concurrency', self.concurrency)
+
+    def _limiters(self, provider: str):
+        if provider not in self._semaphores:
+            limit = self.limits.get(provider, {})
+            self._semaphores[provider] = asyncio.Semaphore(self._concurrency(provider))
+            self._buckets[provider] = TokenBucket(limit['tpm']) if limit.get('tpm') else None
+        return self._semaphores[provider], self._buckets[provider]
+
+    def _estimate_tokens(self, job: Dict) -> int:
+        attempts = job.get('attempts', 1)
+        return (estimate_text_tokens(job['prompt']) + self.completion_tokens_estimate) * attempts
+
+    def _coder_kwargs(self, job: Dict) -> Dict:
+        keys = ('model', 'temperature', 'top_p', 'attempts', 'base_url', 'api_key', 'syntax_check',
+                'max_history', 'summarize_history', 'stream', 'strategy', 'n_candidates', 'selection')
+        kwargs = {k: job[k] for k in keys if k in job}
+        if self.cache is not None:
+            kwargs['cache'] = self.cache
+        return kwargs
+
+    def _generate(self, job: Dict) -> Dict:
+        """Blocking part of a job, runs in a worker thread."""
+        coder = self.coder_factory(**self._coder_kwargs(job))
+        response = coder(job['prompt'])
+        result = {
+            "code": coder.extract_codeblock(response['response']),
+            "stats": {"token_usage": response['token_usage'],
+                      "history": response['history']}
+        }
+        if coder.stream_metrics:
+            result['stats']['stream_metrics'] = coder.stream_metrics
+        return result
+
+    async def _run_job(self, job: Dict, on_result) -> Dict:
+        provider = provider_of(job.get('model', 'gpt-4'), job.get('base_url'))
+        semaphore, bucket = self._limiters(provider)
+        reserved = self._estimate_tokens(job)
+
+        for retry in range(self.max_retries + 1):
+            async with semaphore:
+                if bucket:
+                    await bucket.acquire(reserved)
+                try:
+                    start = time.perf_counter()
+                    result = await asyncio.get_running_loop().run_in_executor(self._executor, self._generate, job)
+                    result['stats']['wall_time'] = time.perf_counter() - start
+                    result['stats']['retries'] = retry
+                    if bucket:
+                        bucket.settle(reserved, result['stats']['token_usage']['total_tokens'])
+                except Exception as e:
+                    if bucket:
+                        bucket.settle(reserved, 0)
+                    if not is_retryable(e) or retry == self.max_retries:
+                        print(f"Generation failed for {job.get('output_path')}: {e}")
+                        return {"error": str(e), "job": job}
+                else:
+                    if job.get('output_path'):
+                        write_json_atomic(job['output_path'], result)
+                    # Still holding the provider slot, a slow consumer throttles generation
+                    if on_result is not None:
+                        await on_result(job, result)
+                    return result
+            # Full jitter backoff, outside the semaphore so other jobs can proceed
+            delay = min(self.backoff_max, self.backoff_base * 2 ** retry)
+            await asyncio.sleep(random.uniform(0, delay))
+
+    async def run(self,
+                  jobs: List[Dict],
+                  on_result: Optional[Callable[[Dict, Dict], Awaitable[None]]] = None,
+                  skip_existing: bool = True) -> List[Dict]:
+        """Runs all jobs and returns one result per job, in job order. Jobs
+        skipped because their output exists get {"skipped": True, "job": job}.
+
+        Parameters
+        ----------
+        jobs : List[Dict]
+            Each job has a prompt and the AIECoder arguments (model, attempts,
+            temperature, top_p, base_url, api_key), plus an optional output_path the
+            result JSON is written to.
+        on_result : Callable, optional
+            Coroutine awaited with (job, result) after each result is written, e.g.
+            to feed a downstream queue. It runs while the job still holds its
+            provider slot, so blocking on a full queue applies backpressure.
+        skip_existing : bool, optional
+            Don't rerun jobs whose output_path already exists.
+        """
+        # Limiters are bound to the running event loop
+        self._semaphores, self._buckets = {}, {}
+
+        skipped = [skip_existing and bool(job.get('output_path')) and os.path.isfile(job['output_path'])
+                   for job in jobs]
+        for job, skip in zip(jobs, skipped):
+            if skip:
+                print(f"{job['output_path']} already exists, skipping...")
+        pending = [job for job, skip in zip(jobs, skipped) if not skip]
+        print(f"Generating {len(pending)} completions ({len(jobs) - len(pending)} already done)")
+
+        # Own pool sized to the provider limits, the loop's default executor
+        # (min(32, cpus + 4) threads) would cap concurrency below them
+        providers = {provider_of(job.get('model', 'gpt-4'), job.get('base_url')) for job in pending}
+        workers = max(1, sum(self._concurrency(provider) for provider in providers))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generate")
+        try:
+            results = iter(await asyncio.gather(*(self._run_job(job, on_result) for job in pending)))
+        finally:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        return [{"skipped": True, "job": job} if skip else next(results) for job, skip in zip(jobs, skipped)]
+
+    def run_sync(self, jobs: List[Dict], **kwargs) -> List[Dict]:
+        """Blocking convenience wrapper around run."""
+        return asyncio.run(self.run(jobs, **kwargs))
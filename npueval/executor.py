@@ -3,16 +3,56 @@
 
 import os
 import traceback
-from typing import List, Dict, Optional, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 
-from aie.utils.xrt import AIE_Application, write_out_trace
-
 from .utils import (trace_to_json, 
                     get_cycles, 
                     get_vector_time)
 
+def evaluate_result(expected, result, atol: float, rtol: float) -> Dict[str, Any]:
+    """Compares a kernel output against the reference, success if every element
+    is within atol + rtol * |expected|."""
+    expected = expected.astype(np.float32)
+    result = result.astype(np.float32)
+
+    # Calculate absolute and relative errors
+    abs_errors = np.abs(expected - result)
+    rel_errors = np.abs((expected - result) / (expected + np.finfo(float).eps))
+
+    # Find maximum error locations
+    max_abs_idx = int(np.argmax(abs_errors))
+    max_rel_idx = int(np.argmax(rel_errors))
+
+    # Check if results are within tolerances
+    within_tolerance = bool(np.all(abs_errors <= (atol + rtol * np.abs(expected))))
+
+    return {
+        'success': within_tolerance,
+        'stats': {
+            # Maximum errors
+            'max_absolute_error': float(np.max(abs_errors)),
+            'max_relative_error': float(np.max(rel_errors)),
+            'max_abs_error_idx': max_abs_idx,
+            'max_rel_error_idx': max_rel_idx,
+            # Stats
+            'abs_error_mean': float(np.mean(abs_errors)),
+            'abs_error_std': float(np.std(abs_errors)),
+            'rel_error_mean': float(np.mean(rel_errors)),
+            'rel_error_std': float(np.std(rel_errors))
+        }
+    }
+
+def trace_cycles(trace_name: str, xclbin: str, dev: str, convert: Callable = trace_to_json) -> Tuple[float, float]:
+    """Converts the trace written to trace_name to json next to xclbin and
+    returns its total and vector cycles. convert is trace_to_json, or the
+    simulated backend's stand-in for parse_trace.py."""
+    base = os.path.splitext(xclbin)[0]
+    trace_json_path = f"{base}_trace.json"
+    convert(trace_name, f"{base}.mlir", trace_json_path, dev=dev)
+    return get_cycles(trace_json_path), get_vector_time(trace_json_path, return_score=False)
+
 class NPUExecutor:
     """Handles execution and validation of kernels on the NPU."""
     
@@ -58,7 +98,9 @@ class NPUExecutor:
         bool
             Whether execution was successful
         """
-        
+        # Imported here so the module loads without the aie python package
+        from aie.utils.xrt import AIE_Application, write_out_trace
+
         try:
             self.app = AIE_Application(self.xclbin, self.instr, self.xrt_kernel_name)
             
@@ -96,16 +138,7 @@ class NPUExecutor:
                 write_out_trace(trace_buffer.view(np.uint32), trace_name)
                 
                 # Process trace data
-                mlir_path = f"{self.xclbin.strip('.xclbin')}.mlir"
-                trace_json_path = f"{self.xclbin.strip('.xclbin')}_trace.json"
-                trace_to_json(
-                    trace_name,
-                    mlir_path,
-                    trace_json_path,
-                    dev = os.environ['NPU']
-                )
-                total_cycles = get_cycles(trace_json_path)
-                vector_cycles = get_vector_time(trace_json_path, return_score=False)
+                total_cycles, vector_cycles = trace_cycles(trace_name, self.xclbin, os.environ['NPU'])
             else:
                 if data_size == 1:
                     result = entire_buffer[0:1]
@@ -131,35 +164,7 @@ class NPUExecutor:
             return eval_output
     
     def evaluate_result(self, expected, result):
-        expected = expected.astype(np.float32)
-        result = result.astype(np.float32)
-        
-        # Calculate absolute and relative errors
-        abs_errors = np.abs(expected - result)
-        rel_errors = np.abs((expected - result) / (expected + np.finfo(float).eps))
-        
-        # Find maximum error locations
-        max_abs_idx = int(np.argmax(abs_errors))
-        max_rel_idx = int(np.argmax(rel_errors))
-        
-        # Check if results are within tolerances
-        within_tolerance = bool(np.all(abs_errors <= (self.atol + self.rtol * np.abs(expected))))
-        
-        return {
-            'success': within_tolerance,
-            'stats': {
-                # Maximum errors
-                'max_absolute_error': float(np.max(abs_errors)),
-                'max_relative_error': float(np.max(rel_errors)),
-                'max_abs_error_idx': max_abs_idx,
-                'max_rel_error_idx': max_rel_idx,
-                # Stats
-                'abs_error_mean': float(np.mean(abs_errors)),
-                'abs_error_std': float(np.std(abs_errors)),
-                'rel_error_mean': float(np.mean(rel_errors)),
-                'rel_error_std': float(np.std(rel_errors))
-            }
-        }
+        return evaluate_result(expected, result, self.atol, self.rtol)
     
     def cleanup(self):
         """Clean up NPU resources."""
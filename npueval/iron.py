@@ -20,6 +20,25 @@ def _get_device(dev: str):
     else:
         raise Exception("Unsupported device")
 
+# Data memory of a compute tile and the default core stack that lives in it
+TILE_MEMORY_BYTES = {"npu1": 64 * 1024, "npu2": 64 * 1024}
+STACK_BYTES = 1024
+
+def tile_memory_usage(in_buffers: list, out_buffer: np.ndarray, buffer_depth: int = 2) -> int:
+    """Bytes of compute tile memory build_app allocates for the object fifos.
+
+    Each buffer is moved to the tile whole and buffer_depth times (double
+    buffering), the output is padded to 4 bytes like in build_app.
+    """
+    out_bytes = out_buffer.nbytes + (-out_buffer.nbytes) % 4
+    return buffer_depth * (sum(in_buffer.nbytes for in_buffer in in_buffers) + out_bytes)
+
+def fits_in_tile(in_buffers: list, out_buffer: np.ndarray, dev: str = "npu1", buffer_depth: int = 2,
+                 reserved: int = STACK_BYTES) -> bool:
+    """True if the buffers of a build_app graph fit in the data memory of a
+    compute tile of dev, leaving reserved bytes for the stack."""
+    return tile_memory_usage(in_buffers, out_buffer, buffer_depth) + reserved <= TILE_MEMORY_BYTES[dev]
+
 def _prepare_output_buffer(out_buffer: np.ndarray):
     """Helper function to prepare output buffer with padding if needed (e.g. for reduce ops)."""
     pad_elems = 0
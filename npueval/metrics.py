@@ -0,0 +1,149 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .utils import extract_buffers
+
+# Throughput metrics derived from the cycle count of a kernel call (event0 to
+# event1 in the trace) and the buffers it processed, plus a roofline style
+# classification into compute bound and data movement bound kernels.
+#
+# The peaks are nominal figures for an AIE2 compute tile core (npu1,
+# Phoenix/Hawk), not measured ones, and every metric below is relative to
+# them. They are used for every device: AIE2P (npu2, Strix/Krackan) figures
+# aren't modeled, so npu2 results are measured against the AIE2 roofline
+# and only comparable with each other.
+#
+# * Vector width: 512-bit vector registers, so the peak is 512 / bits lanes
+#   per cycle: 64 for int8, 32 for int16/bfloat16, 16 for int32/float32. One
+#   vector operation per cycle is assumed. MAC rates and multi-cycle ops
+#   (division, transcendentals emulated with several ops) aren't modeled,
+#   so such kernels can't reach 100%.
+# * Data movement: the core can do two 256-bit loads and one 256-bit store
+#   per cycle from tile data memory, i.e. 64 bytes/cycle in and 32 out. The
+#   buffers are in tile memory when event0 fires, so shim DMA and stream
+#   bandwidth aren't part of the measured cycles.
+
+VECTOR_BITS = 512
+LOAD_BYTES_PER_CYCLE = 64
+STORE_BYTES_PER_CYCLE = 32
+
+def peak_lanes(dtype) -> int:
+    """Nominal elements per cycle of one vector operation on dtype."""
+    return VECTOR_BITS // (8 * np.dtype(dtype).itemsize)
+
+def _buffer_metrics(buffer: np.ndarray, cycles: float) -> Dict[str, Any]:
+    return {"dtype": str(buffer.dtype),
+            "elements": int(buffer.size),
+            "elements_per_cycle": buffer.size / cycles,
+            "bytes_per_cycle": buffer.nbytes / cycles}
+
+def compute_metrics(in_buffers: List[np.ndarray],
+                    out_buffers: List[np.ndarray],
+                    total_cycles: Optional[float]) -> Optional[Dict[str, Any]]:
+    """Throughput and roofline metrics of one kernel call.
+
+    The work of a kernel is taken as the elements of its largest input, in
+    that input's dtype. The memory ceiling is the elements/cycle at which
+    loading the inputs or storing the output saturates tile memory
+    bandwidth. The kernel is "compute" bound if the vector peak is the lower
+    of the two ceilings, otherwise "data movement" bound.
+
+    Parameters
+    ----------
+    in_buffers : List[np.ndarray]
+        Input buffers, as returned by extract_buffers.
+    out_buffers : List[np.ndarray]
+        Output buffers.
+    total_cycles : float or None
+        Cycles between event0 and event1.
+
+    Returns
+    -------
+    Dict[str, Any] or None
+        Per buffer elements/bytes per cycle, elements_per_cycle,
+        peak_elements_per_cycle, memory_ceiling, attainable (the lower
+        ceiling), efficiency (vs the vector peak), roofline_efficiency (vs
+        attainable), arithmetic_intensity (elements per byte moved) and
+        bound. None without a usable cycle count.
+    """
+    if not total_cycles or not math.isfinite(total_cycles) or total_cycles <= 0:
+        return None
+    main = max(in_buffers, key=lambda b: b.size)
+    elements = main.size
+    in_bytes = sum(b.nbytes for b in in_buffers)
+    out_bytes = sum(b.nbytes for b in out_buffers)
+
+    peak = peak_lanes(main.dtype)
+    ceilings = [LOAD_BYTES_PER_CYCLE * elements / in_bytes if in_bytes else math.inf,
+                STORE_BYTES_PER_CYCLE * elements / out_bytes if out_bytes else math.inf]
+    memory_ceiling = min(ceilings)
+    attainable = min(peak, memory_ceiling)
+    elements_per_cycle = elements / total_cycles
+    return {
+        "inputs": [_buffer_metrics(b, total_cycles) for b in in_buffers],
+        "outputs": [_buffer_metrics(b, total_cycles) for b in out_buffers],
+        "elements_per_cycle": elements_per_cycle,
+        "bytes_per_cycle": (in_bytes + out_bytes) / total_cycles,
+        "peak_elements_per_cycle": peak,
+        "memory_ceiling": memory_ceiling,
+        "attainable": attainable,
+        "efficiency": elements_per_cycle / peak,
+        "roofline_efficiency": elements_per_cycle / attainable,
+        "arithmetic_intensity": elements / (in_bytes + out_bytes),
+        "bound": "compute" if peak <= memory_ceiling else "data movement",
+    }
+
+def roofline_report(tests: List[Dict[str, Any]],
+                    results_path: str,
+                    verbose: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Metrics of every passing kernel in results_path, printed as a table
+    sorted by roofline efficiency.
+
+    Parameters
+    ----------
+    tests : List[Dict[str, Any]]
+        Dataset records of the results.
+    results_path : str
+        Result jsons written by run_functional_tests.
+    verbose : bool
+        Print the table.
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Per kernel the compute_metrics output plus total_cycles.
+    """
+    report = {}
+    for test in tests:
+        result_file = os.path.join(results_path, f"{test['kernel_name']}_wrapper.json")
+        if not os.path.isfile(result_file):
+            continue
+        with open(result_file, 'r') as f:
+            result = json.load(f)
+        if result.get('result') != 'Pass':
+            continue
+        in_buffers, out_buffers, _ = extract_buffers(test)
+        metrics = compute_metrics(in_buffers, out_buffers, result.get('total_cycles'))
+        if metrics is None:
+            continue
+        metrics['total_cycles'] = result['total_cycles']
+        report[test['kernel_name']] = metrics
+
+    if verbose:
+        print(f"{'kernel':40s} {'cycles':>8s} {'elem/cyc':>9s} {'B/cyc':>7s} {'peak':>5s} {'ceiling':>8s} "
+              f"{'eff':>6s} {'roofline':>8s}  bound")
+        for kernel, m in sorted(report.items(), key=lambda kv: kv[1]['roofline_efficiency']):
+            print(f"{kernel:40s} {m['total_cycles']:8.0f} {m['elements_per_cycle']:9.3f} {m['bytes_per_cycle']:7.2f} "
+                  f"{m['peak_elements_per_cycle']:5d} {m['memory_ceiling']:8.1f} {m['efficiency']:6.1%} "
+                  f"{m['roofline_efficiency']:8.1%}  {m['bound']}")
+        bounds = [m['bound'] for m in report.values()]
+        print(f"\n{len(report)} kernels: {bounds.count('compute')} compute bound, "
+              f"{bounds.count('data movement')} data movement bound")
+    return report
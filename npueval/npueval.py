@@ -7,13 +7,14 @@ import pathlib
 import traceback
 from typing import List, Dict, Optional, Any
 
-from .executor import NPUExecutor
-from .iron import build_app
+from .backends import get_backend
+from .metrics import compute_metrics
+from .profiling import StageTimer
 from .tools import aie_compiler, build_single_kernel_app
 from .utils import (extract_buffers, 
                     get_kernel_code, 
-                    parse_stack_sizes,
-                    report_xdna_version)
+                    parse_stack_sizes)
+from .watchdog import StageTimeout, call_with_timeout, stage_timeouts
 
 def save_results(result: dict, results_path: str, results_filename: str):
     """Helper function to save current result status to a json file in results_path."""
@@ -21,28 +22,31 @@ def save_results(result: dict, results_path: str, results_filename: str):
     with open(f"{results_path}/{results_filename}", 'w') as file:
         json.dump(result, file, indent=4)
 
-def run_functional_tests(tests: List[Dict[str, Any]],
+class DriverError(RuntimeError):
+    """The NPU driver is in an unstable state, no further kernels can be evaluated."""
+
+def run_functional_test(test: Dict[str, Any],
                         solutions: Optional[str] = None,
                         results_path: str = "results/evaluations",
-                        allow_continue: bool = True,
-                        overwrite: bool = False,
                         verbose: bool = False,
                         generate_assembly: bool = False,
-                        compiler: str = "peano"):
-    """Run functional tests for AIE kernels.
-    
+                        compiler: str = "peano",
+                        graph_cache: Optional[str] = None,
+                        use_pch: bool = False,
+                        syntax_check: bool = False,
+                        trace_size: int = 8192,
+                        timer: Optional[StageTimer] = None,
+                        timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Compile, build and run a single kernel on the NPU and save its result json.
+
     Parameters
     ----------
-    tests : List[Dict[str, Any]]
-        List of test configurations
+    test : Dict[str, Any]
+        Test configuration, i.e. one entry of the dataset
     solutions : Optional[str]
         Path to solutions directory
     results_path : str
         Where to store results
-    allow_continue : bool
-        Skip existing results unless overwrite is True
-    overwrite : bool
-        Force overwrite of existing results
     verbose : bool
         Enable verbose output
     generate_assembly : bool
@@ -50,64 +54,96 @@ def run_functional_tests(tests: List[Dict[str, Any]],
         stack size extraction
     compiler : str
         Options are peano or chess
+    graph_cache : Optional[str]
+        Directory for cached graph-level build artifacts, see
+        build_single_kernel_app. Useful when sweeping many solutions
+        of the same kernels, "" selects the default cache location
+    use_pch : bool
+        Compile against the cached aie_api precompiled header (peano only)
+    syntax_check : bool
+        Screen each kernel with the front-end only aie_syntax_check before
+        generating the object, failing kernels are rejected faster
+    trace_size : int
+        Trace buffer size, large default that doesn't change between kernels
+    timer : Optional[StageTimer]
+        Accumulates the wall time of each stage (code, compile, build, run, ...)
+    timeouts : Optional[Dict[str, float]]
+        Seconds allowed for the compile, build and run stages, see
+        watchdog.stage_timeouts for the defaults
+
+    Returns
+    -------
+    Dict[str, Any]
+        The saved results, 'result' is 'Pass', 'Fail' or 'Timeout' (with the
+        stage that timed out in 'stage')
+
+    Raises
+    ------
+    DriverError
+        If the driver ended up in an unstable state and evaluation should stop
     """
-    trace_size = 8192 # large default, won't change between kernels
+    kernel_name = f"{test['kernel_name']}_wrapper"
+    results = {'result': 'Fail'}
+    print(f"\nKernel: {kernel_name}")
+    backend = get_backend()
+    timer = timer or StageTimer()
+    timeouts = stage_timeouts(timeouts)
     
-    passed = 0
-    for test in tests:
-        kernel_name = f"{test['kernel_name']}_wrapper"
-        
-        if allow_continue:
-            if os.path.isfile(f"{results_path}/{kernel_name}.json") and not overwrite:
-                print(f"{results_path}/{kernel_name}.json already exists, skipping...")
-                continue
-        
-        results = {'result': 'Fail'}
-        print(f"\nKernel: {kernel_name}")
-        
-        try:
-            # Get and validate kernel code
+    try:
+        # Get and validate kernel code
+        with timer.stage("code"):
             if solutions is None:
                 print("Using canonical solution...")
                 kernel_code = test['prompt'][:-2] + test['canonical_solution'] + test['program_code']
             else:
-                kernel_code = get_kernel_code(test, solutions) + test['program_code']
-            
-            if not kernel_code:
+                kernel_code = get_kernel_code(test, solutions)
+                if kernel_code:
+                    kernel_code += test['program_code']
+        if not kernel_code:
+            results['Error'] = "No code available"
+            with timer.stage("save"):
                 save_results(results, results_path, f"{kernel_name}.json")
-                continue
-            
-            # Compile kernel
+            return results
+        
+        # Compile kernel
+        with timer.stage("compile"):
             compile_result = aie_compiler(kernel_code, 
                                         kernel_name=kernel_name,
                                         output_dir=results_path,
                                         compiler=compiler,
-                                        dev=os.environ['NPU'],
+                                        dev=backend.device(),
                                         generate_assembly=generate_assembly,
-                                        verbose_output=verbose)
-            if compile_result.split('\n')[0] != 'Compilation successful.':
-                print("Failed to compile kernel")
-                results['Error'] = compile_result
+                                        verbose_output=verbose,
+                                        use_pch=use_pch,
+                                        syntax_check=syntax_check,
+                                        timeout=timeouts['compile'])
+        if compile_result.split('\n')[0] != 'Compilation successful.':
+            print("Failed to compile kernel")
+            results['Error'] = compile_result
+            with timer.stage("save"):
                 save_results(results, results_path, f"{kernel_name}.json")
-                continue
+            return results
 
-            if generate_assembly:
-                if verbose:
-                    print("stack size (bytes): ", parse_stack_sizes(f"{results_path}/{kernel_name}.s"))
+        if generate_assembly:
+            with timer.stage("assembly"):
                 stack_sizes = parse_stack_sizes(f"{results_path}/{kernel_name}.s")
-                results['stack_size'] = stack_sizes
-            
-            # Generate MLIR
+            if verbose:
+                print("stack size (bytes): ", stack_sizes)
+            results['stack_size'] = stack_sizes
+        
+        # Generate MLIR
+        with timer.stage("buffers"):
             in_buffers, out_buffers, rtps = extract_buffers(test)
-            
-            # Calculate tile size based on largest input buffer
-            tile_size = max(in_buffer.size for in_buffer in in_buffers)
+        
+        # Calculate tile size based on largest input buffer
+        tile_size = max(in_buffer.size for in_buffer in in_buffers)
 
-            mlir, padding = build_app(
+        with timer.stage("mlir"):
+            mlir, padding = backend.build_app(
                 kernel_name, in_buffers, out_buffers[0], rtps,
                 tile_size=tile_size,
                 trace_size=trace_size,
-                dev=os.environ['NPU']
+                dev=backend.device()
             )
             
             if mlir:
@@ -117,39 +153,51 @@ def run_functional_tests(tests: List[Dict[str, Any]],
             else:
                 print("Failed to generate MLIR")
                 raise Exception("MLIR generation failed")
-            
-            # Build application
+        
+        # Build application
+        with timer.stage("build"):
             build_result = build_single_kernel_app(
                 f"{results_path}/{kernel_name}.mlir",
                 f"{results_path}/{kernel_name}.o",
                 output_dir=results_path,
                 xclbin_name=kernel_name,
-                compiler_backend=compiler
+                compiler_backend=compiler,
+                graph_cache=graph_cache,
+                timeout=timeouts['build']
             )
-            if build_result.returncode != 0:
-                raise Exception(f"Build failed with return code {build_result.returncode}")
-            
-            # Run on NPU and validate
-            # Use specific tolerance in test set if exists
-            if "tolerances" in test:
-                atol = test['tolerances']['atol']
-                rtol = test['tolerances']['rtol']
-            
-                executor = NPUExecutor(
-                    xclbin=f"{results_path}/{kernel_name}.xclbin",
-                    instr=f"{results_path}/{kernel_name}.bin",
-                    verbose=verbose,
-                    atol=atol,
-                    rtol=rtol
-                )
-            else:
-                executor = NPUExecutor(
-                    xclbin=f"{results_path}/{kernel_name}.xclbin",
-                    instr=f"{results_path}/{kernel_name}.bin",
-                    verbose=verbose
-                )
-            
-            outputs = executor.run(
+        if build_result.returncode != 0:
+            raise Exception(f"Build failed with return code {build_result.returncode}")
+        
+        # Run on NPU and validate
+        # Use specific tolerance in test set if exists
+        if "tolerances" in test:
+            atol = test['tolerances']['atol']
+            rtol = test['tolerances']['rtol']
+        
+            executor = backend.executor(
+                xclbin=f"{results_path}/{kernel_name}.xclbin",
+                instr=f"{results_path}/{kernel_name}.bin",
+                test=test,
+                rtps=rtps,
+                verbose=verbose,
+                atol=atol,
+                rtol=rtol
+            )
+        else:
+            executor = backend.executor(
+                xclbin=f"{results_path}/{kernel_name}.xclbin",
+                instr=f"{results_path}/{kernel_name}.bin",
+                test=test,
+                rtps=rtps,
+                verbose=verbose
+            )
+        
+        with timer.stage("run"):
+            # With a run deadline this runs in a child process that is killed
+            # on timeout, which releases the hardware context of a kernel
+            # that never finishes
+            outputs = call_with_timeout(
+                executor.run, timeouts['run'], "run",
                 in_buffers=in_buffers,
                 out_buffers=out_buffers,
                 trace_size=trace_size,
@@ -157,37 +205,125 @@ def run_functional_tests(tests: List[Dict[str, Any]],
                 padding=padding
             )
 
-            if isinstance(outputs, tuple):
-                eval_output, total_cycles, vector_cycles = outputs
-            else:
-                eval_output = outputs
-                total_cycles = None
-                vector_cycles = None
-            
-            results['stats'] = eval_output['stats']
-            results['total_cycles'] = total_cycles
-            results['vector_cycles'] = vector_cycles
-            results['vector_score'] = vector_cycles/total_cycles
-            if eval_output['success']:
-                results['result'] = 'Pass'
-                passed += 1
-            
-            if verbose:
-                print(results['stats'])
-                
-        except Exception as e:
-            error_msg = str(e)
-            if "qds_device::wait() unexpected command state" in error_msg or "Failed to open KMQ device" in error_msg:
-                print("Driver in unstable state")
-                print("Stopping execution")
-                return
-            print(f"Test failed: {error_msg}")
-            results['Error'] = error_msg
-            results['Trace'] = traceback.format_exc()
+        if isinstance(outputs, tuple):
+            eval_output, total_cycles, vector_cycles = outputs
+        else:
+            eval_output = outputs
+            total_cycles = None
+            vector_cycles = None
+        
+        results['stats'] = eval_output['stats']
+        results['total_cycles'] = total_cycles
+        results['vector_cycles'] = vector_cycles
+        results['vector_score'] = vector_cycles/total_cycles
+        if eval_output['success']:
+            results['result'] = 'Pass'
+            results['metrics'] = compute_metrics(in_buffers, out_buffers, total_cycles)
+        
+        if verbose:
+            print(results['stats'])
             
-        results['xdna_info'] = report_xdna_version()
+    except StageTimeout as e:
+        print(f"Test timed out: {e}")
+        results['result'] = 'Timeout'
+        results['stage'] = e.stage
+        results['Error'] = str(e)
+    except Exception as e:
+        error_msg = str(e)
+        if "qds_device::wait() unexpected command state" in error_msg or "Failed to open KMQ device" in error_msg:
+            raise DriverError(error_msg)
+        print(f"Test failed: {error_msg}")
+        results['Error'] = error_msg
+        results['Trace'] = traceback.format_exc()
+        
+    with timer.stage("device_info"):
+        results['xdna_info'] = backend.device_info()
 
-        print(f"Result: {results['result']}")
+    print(f"Result: {results['result']}")
+    with timer.stage("save"):
         save_results(results, results_path, f"{kernel_name}.json")
-    print(f"Passed: {passed}/{len(tests)}")
+    return results
+
+def run_functional_tests(tests: List[Dict[str, Any]],
+                        solutions: Optional[str] = None,
+                        results_path: str = "results/evaluations",
+                        allow_continue: bool = True,
+                        overwrite: bool = False,
+                        verbose: bool = False,
+                        generate_assembly: bool = False,
+                        compiler: str = "peano",
+                        graph_cache: Optional[str] = None,
+                        use_pch: bool = False,
+                        syntax_check: bool = False,
+                        timer: Optional[StageTimer] = None,
+                        timeouts: Optional[Dict[str, float]] = None):
+    """Run functional tests for AIE kernels.
+    
+    Parameters
+    ----------
+    tests : List[Dict[str, Any]]
+        List of test configurations
+    solutions : Optional[str]
+        Path to solutions directory
+    results_path : str
+        Where to store results
+    allow_continue : bool
+        Skip existing results unless overwrite is True
+    overwrite : bool
+        Force overwrite of existing results
+    verbose : bool
+        Enable verbose output
+    generate_assembly : bool
+        Requires 2nd compiler run, but enables microcode and
+        stack size extraction
+    compiler : str
+        Options are peano or chess
+    graph_cache : Optional[str]
+        Directory for cached graph-level build artifacts, see
+        build_single_kernel_app. Useful when sweeping many solutions
+        of the same kernels, "" selects the default cache location
+    use_pch : bool
+        Compile against the cached aie_api precompiled header (peano only)
+    syntax_check : bool
+        Screen each kernel with the front-end only aie_syntax_check before
+        generating the object, failing kernels are rejected faster
+    timer : Optional[StageTimer]
+        Accumulates the wall time of each stage over all kernels
+    timeouts : Optional[Dict[str, float]]
+        Seconds allowed for the compile, build and run stages of each kernel,
+        a kernel that exceeds them is recorded as 'Timeout' and the run continues
+    """
+    trace_size = 8192 # large default, won't change between kernels
+    
+    passed = 0
+    timed_out = 0
+    for test in tests:
+        kernel_name = f"{test['kernel_name']}_wrapper"
+        
+        if allow_continue:
+            if os.path.isfile(f"{results_path}/{kernel_name}.json") and not overwrite:
+                print(f"{results_path}/{kernel_name}.json already exists, skipping...")
+                continue
+        
+        try:
+            results = run_functional_test(test, solutions,
+                                          results_path=results_path,
+                                          verbose=verbose,
+                                          generate_assembly=generate_assembly,
+                                          compiler=compiler,
+                                          graph_cache=graph_cache,
+                                          use_pch=use_pch,
+                                          syntax_check=syntax_check,
+                                          trace_size=trace_size,
+                                          timer=timer,
+                                          timeouts=timeouts)
+        except DriverError:
+            print("Driver in unstable state")
+            print("Stopping execution")
+            return
 
+        if results['result'] == 'Pass':
+            passed += 1
+        elif results['result'] == 'Timeout':
+            timed_out += 1
+    print(f"Passed: {passed}/{len(tests)}" + (f", timed out: {timed_out}" if timed_out else ""))
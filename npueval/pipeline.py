@@ -0,0 +1,222 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import sys
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from .engine import GenerationEngine
+from .npueval import DriverError, run_functional_test
+
+class PipelineProgress:
+    """Single status line shared by the generation and evaluation stages."""
+
+    def __init__(self, total: int, queue_size: int):
+        self.total = total
+        self.queue_size = queue_size
+        self.generated = 0
+        self.generation_failed = 0
+        self.evaluated = 0
+        self.evaluation_failed = 0
+        self.passed = 0
+        self.deferred = 0
+        self.queued = 0
+        self.start = time.perf_counter()
+
+    def line(self) -> str:
+        elapsed = int(time.perf_counter() - self.start)
+        line = (f"[pipeline {elapsed // 3600:02d}:{elapsed // 60 % 60:02d}:{elapsed % 60:02d}] "
+                f"generated {self.generated}/{self.total}")
+        if self.generation_failed:
+            line += f" ({self.generation_failed} failed)"
+        line += (f" | queue {self.queued}/{self.queue_size}"
+                 f" | evaluated {self.evaluated}/{self.total}, passed {self.passed}")
+        if self.evaluation_failed:
+            line += f" ({self.evaluation_failed} errors)"
+        if self.deferred:
+            line += f" | {self.deferred} deferred"
+        return line
+
+    def show(self):
+        print(self.line(), flush=True)
+
+class Pipeline:
+    """Streams LLM completions straight into NPU evaluation.
+
+    Generation runs on a GenerationEngine and every solution is put on a bounded
+    queue as soon as it is written. A single consumer compiles and runs the
+    queued solutions on the NPU, so the device works while the LLM is still
+    generating. When the queue is full, jobs hold on to their provider slot until
+    the evaluator catches up, which keeps generation at most max_queue solutions
+    ahead of the NPU.
+
+    Results use the same layout as the batch scripts, solutions go to
+    {results_root}/solutions/{name} and evaluations to
+    {results_root}/evaluations/{name}. A rerun resumes where the previous one
+    stopped: kernels with an evaluation are skipped, solutions without one are
+    evaluated without regenerating them. If the driver becomes unstable the
+    remaining solutions are still generated but their evaluation is deferred to
+    the next run. Any other error while evaluating a solution is reported and
+    the solution is left for the next run as well.
+
+    Parameters
+    ----------
+    tests : List[Dict[str, Any]]
+        Dataset entries to generate and evaluate.
+    configs : List[Dict[str, Any]]
+        One dictionary per sweep configuration with a unique "name" and the
+        GenerationEngine job arguments (model, attempts, temperature, ...). An
+        optional "prompts" dictionary maps kernel_name to a prompt that replaces
+        the dataset prompt, e.g. with retrieved context.
+    engine : GenerationEngine, optional
+        Engine used for generation, a default one is created if None.
+    max_queue : int, optional
+        Number of solutions allowed to wait for evaluation.
+    results_root : str, optional
+        Root directory for solutions and evaluations.
+    eval_kwargs : Dict[str, Any], optional
+        Extra keyword arguments for run_functional_test (verbose, compiler,
+        graph_cache, use_pch, syntax_check, ...).
+    """
+
+    def __init__(self,
+                 tests: List[Dict[str, Any]],
+                 configs: List[Dict[str, Any]],
+                 engine: Optional[GenerationEngine] = None,
+                 max_queue: int = 8,
+                 results_root: str = "results",
+                 eval_kwargs: Optional[Dict[str, Any]] = None):
+        names = [c['name'] for c in configs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Pipeline config names must be unique: {names}")
+        self.tests = tests
+        self.configs = configs
+        self.engine = engine or GenerationEngine()
+        self.max_queue = max_queue
+        self.results_root = results_root
+        self.eval_kwargs = eval_kwargs or {}
+        self.driver_failed = False
+        self.summary = {}
+
+    def solutions_path(self, name: str) -> str:
+        return os.path.join(self.results_root, "solutions", name)
+
+    def evaluations_path(self, name: str) -> str:
+        return os.path.join(self.results_root, "evaluations", name)
+
+    def _plan(self):
+        """Splits the sweep into finished kernels, solutions waiting for evaluation
+        and generation jobs."""
+        ready, jobs = [], []
+        for config in self.configs:
+            name = config['name']
+            self.summary[name] = {"evaluated": 0, "passed": 0, "skipped": 0, "errors": 0}
+            prompts = config.get('prompts', {})
+            job_args = {k: v for k, v in config.items() if k not in ('name', 'prompts')}
+            for test in self.tests:
+                evaluation = os.path.join(self.evaluations_path(name), f"{test['kernel_name']}_wrapper.json")
+                solution = os.path.join(self.solutions_path(name), f"{test['kernel_name']}.json")
+                if os.path.isfile(evaluation):
+                    self.summary[name]['skipped'] += 1
+                elif os.path.isfile(solution):
+                    ready.append((name, test))
+                else:
+                    jobs.append({**job_args,
+                                 "prompt": prompts.get(test['kernel_name'], test['prompt']),
+                                 "output_path": solution,
+                                 "pipeline": (name, test)})
+        return ready, jobs
+
+    async def _evaluate(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            self.progress.queued = queue.qsize()
+            name, test = item
+            if self.driver_failed:
+                self.progress.deferred += 1
+                self.progress.show()
+                continue
+            try:
+                results = await asyncio.to_thread(run_functional_test, test,
+                                                  self.solutions_path(name),
+                                                  results_path=self.evaluations_path(name),
+                                                  **self.eval_kwargs)
+            except DriverError as e:
+                print(f"Driver in unstable state ({e}), deferring remaining evaluations")
+                self.driver_failed = True
+                self.progress.deferred += 1
+                self.progress.show()
+                continue
+            except Exception as e:
+                # e.g. device_info or a missing NPU variable, keep the queue moving
+                print(f"Evaluation of {name}/{test['kernel_name']} failed: {type(e).__name__}: {e}",
+                      file=sys.stderr)
+                self.progress.evaluation_failed += 1
+                self.summary[name]['errors'] += 1
+                self.progress.show()
+                continue
+            self.progress.evaluated += 1
+            self.summary[name]['evaluated'] += 1
+            if results['result'] == 'Pass':
+                self.progress.passed += 1
+                self.summary[name]['passed'] += 1
+            self.progress.show()
+
+    async def run(self) -> Dict[str, Dict[str, int]]:
+        """Runs the pipeline and returns evaluated/passed/skipped/errors counts per config."""
+        ready, jobs = self._plan()
+        skipped = sum(s['skipped'] for s in self.summary.values())
+        self.progress = PipelineProgress(len(ready) + len(jobs), self.max_queue)
+        self.progress.generated = len(ready)
+        print(f"Pipeline: {len(jobs)} to generate, {len(ready)} awaiting evaluation, {skipped} already evaluated")
+
+        queue = asyncio.Queue(maxsize=self.max_queue)
+
+        async def enqueue(item):
+            await queue.put(item)
+            self.progress.queued = queue.qsize()
+
+        async def on_result(job, result):
+            self.progress.generated += 1
+            self.progress.show()
+            await enqueue(job['pipeline'])
+
+        async def enqueue_ready():
+            for item in ready:
+                await enqueue(item)
+
+        evaluator = asyncio.create_task(self._evaluate(queue))
+        producers = asyncio.ensure_future(asyncio.gather(
+            enqueue_ready(), self.engine.run(jobs, on_result=on_result, skip_existing=False)))
+        try:
+            # The evaluator only returns after the producers are done, if it stops
+            # first it failed and the producers would block on the full queue
+            await asyncio.wait({evaluator, producers}, return_when=asyncio.FIRST_COMPLETED)
+            if evaluator.done():
+                producers.cancel()
+                evaluator.result()
+            results = producers.result()
+            self.progress.generation_failed = sum('error' in r for r in results[1])
+            await queue.put(None)
+            await evaluator
+        finally:
+            producers.cancel()
+            evaluator.cancel()
+            await asyncio.gather(producers, evaluator, return_exceptions=True)
+
+        self.progress.queued = 0
+        self.progress.show()
+        for name, s in self.summary.items():
+            errors = f", {s['errors']} failed to evaluate" if s['errors'] else ""
+            print(f"{name}: passed {s['passed']}/{s['evaluated']} evaluated ({s['skipped']} from previous runs{errors})")
+        if self.driver_failed or self.progress.generation_failed or self.progress.evaluation_failed:
+            print("Some kernels were not evaluated, rerun the pipeline to resume", file=sys.stderr)
+        return self.summary
+
+    def run_sync(self) -> Dict[str, Dict[str, int]]:
+        """Blocking convenience wrapper around run."""
+        return asyncio.run(self.run())
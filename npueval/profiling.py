@@ -0,0 +1,60 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import resource
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Wall time of the stages of run_functional_test. With the simulated backend
+# (npueval.backends) the toolchain and the NPU take a known time, so what's
+# left is the host overhead of the harness itself, see
+# scripts/benchmark_harness.py.
+
+STAGES = ("code", "compile", "assembly", "buffers", "mlir", "build", "run", "device_info", "save")
+
+class StageTimer:
+    """Accumulates the wall time of named stages over many kernels.
+
+    >>> timer = StageTimer()
+    >>> with timer.stage("compile"):
+    ...     ...
+    """
+
+    def __init__(self):
+        self.times: Dict[str, List[float]] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times.setdefault(name, []).append(time.perf_counter() - start)
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds spent in each stage, in STAGES order."""
+        order = {name: i for i, name in enumerate(STAGES)}
+        return {name: sum(self.times[name]) for name in sorted(self.times, key=lambda n: order.get(n, len(order)))}
+
+    def summary(self, kernels: int) -> Dict[str, Dict[str, float]]:
+        """Per stage total seconds, calls and milliseconds per kernel."""
+        return {name: {"total": total, "calls": len(self.times[name]), "ms_per_kernel": 1e3 * total / max(kernels, 1)}
+                for name, total in self.totals().items()}
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Peak resident set size of this process in MB, or with children=True
+    of its largest terminated child (e.g. the NPU run worker)."""
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / 2**20 if os.uname().sysname == "Darwin" else rss / 2**10
+
+def directory_usage(path: str) -> Dict[str, int]:
+    """Number of files and bytes under path."""
+    files, size = 0, 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(root, name))
+    return {"files": files, "bytes": size}
@@ -0,0 +1,582 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import re
+import gzip
+import json
+import math
+import hashlib
+import pathlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils import write_json_atomic
+
+# Resolved against the repository, not the working directory, so notebooks
+# and scripts find the same corpus wherever they run
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "rag", "kernels")
+CORPUS_EXTENSIONS = (".cc", ".cpp")
+
+def _hash(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+def _cache_root() -> str:
+    return os.environ.get("NPUEVAL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "npueval"))
+
+def default_index_path(backend: str, corpus_dir: str = CORPUS_DIR) -> str:
+    """Index file of a retriever backend under NPUEVAL_CACHE_DIR/rag, next to the
+    retrieval cache and out of the source tree. Each corpus directory gets its
+    own file so indexes of different corpora don't overwrite each other."""
+    corpus = hashlib.sha256(os.path.realpath(corpus_dir).encode()).hexdigest()[:12]
+    return os.path.join(_cache_root(), "rag", f"{backend}_{corpus}.json.gz")
+
+def corpus_files(corpus_dir: str = CORPUS_DIR) -> List[str]:
+    """Sorted paths of the reference kernels in corpus_dir, relative to it."""
+    files = []
+    for root, _, names in os.walk(corpus_dir):
+        for name in names:
+            if name.endswith(CORPUS_EXTENSIONS):
+                files.append(os.path.relpath(os.path.join(root, name), corpus_dir))
+    return sorted(files)
+
+class StaleIndexError(RuntimeError):
+    """The retrieval index was built from a different version of the corpus."""
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# corpus_dir -> (stat signature, manifest), so unchanged corpora aren't rehashed
+_manifests = {}
+
+def corpus_manifest(corpus_dir: str = CORPUS_DIR) -> Dict[str, str]:
+    """{relative path: sha256} of every reference kernel in corpus_dir.
+
+    Files are only rehashed when their size or modification time changes.
+    """
+    names = corpus_files(corpus_dir)
+    signature = []
+    for name in names:
+        st = os.stat(os.path.join(corpus_dir, name))
+        signature.append((name, st.st_size, st.st_mtime_ns))
+    cached = _manifests.get(corpus_dir)
+    if cached is not None and cached[0] == signature:
+        return dict(cached[1])
+    manifest = {name: _file_hash(os.path.join(corpus_dir, name)) for name in names}
+    _manifests[corpus_dir] = (signature, manifest)
+    return dict(manifest)
+
+def diff_manifest(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, List[str]]:
+    """Files added, changed and removed between two manifests."""
+    return {
+        "added": sorted(set(new) - set(old)),
+        "changed": sorted(name for name in set(new) & set(old) if new[name] != old[name]),
+        "removed": sorted(set(old) - set(new)),
+    }
+
+def corpus_hash(corpus_dir: str = CORPUS_DIR) -> str:
+    """Content hash of the reference kernel corpus, changes whenever a file is
+    added, removed, renamed or edited."""
+    h = hashlib.sha256()
+    for name, digest in sorted(corpus_manifest(corpus_dir).items()):
+        h.update(name.encode() + b"\0")
+        h.update(bytes.fromhex(digest))
+    return h.hexdigest()
+
+def format_context(texts: List[str]) -> str:
+    """Retrieved examples in the format appended to prompts."""
+    return "Reference vectorized code:\n" + "".join(texts)
+
+# Identifiers including aie:: qualified names, and integers
+TOKEN_RE = re.compile(r'[A-Za-z_]\w*(?:\s*::\s*[A-Za-z_]\w*)*|\d+')
+# aie::vector<int16, 32>, aie::accum<acc32, 16>, aie::mask<64>
+VECTOR_TYPE_RE = re.compile(r'\b(vector|accum|mask)\s*<\s*(?:(\w+)\s*,\s*)?(\d+)\s*>')
+# aie::load_v<32>(ptr), aie::broadcast<int8, 64>(x)
+LANES_RE = re.compile(r'\b(?:load_v|load_floor_v|load_unaligned_v|store_v|broadcast|zeros)\s*<\s*(?:\w+\s*,\s*)?(\d+)\s*>')
+# Camel case pieces, digits stay attached (bf16, int8)
+CAMEL_RE = re.compile(r'[A-Z]+(?![a-z])\d*|[A-Z]?[a-z]+\d*|\d+')
+
+DTYPE_ALIASES = {
+    "int8_t": "int8", "i8": "int8", "char": "int8",
+    "uint8_t": "uint8", "u8": "uint8",
+    "int16_t": "int16", "i16": "int16", "short": "int16",
+    "uint16_t": "uint16", "u16": "uint16",
+    "int32_t": "int32", "i32": "int32",
+    "uint32_t": "uint32", "u32": "uint32",
+    "bf16": "bfloat16", "float": "float32", "f32": "float32", "fp32": "float32",
+}
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from in into is it of on or that the this to with
+should following here goes implementation implements function optimized shapes
+parameters given each returns input output in out hpp api utils
+void const return if else int unsigned signed auto static inline constexpr
+include define extern template typename restrict __restrict kernel buffer size
+""".split())
+
+def _is_width(number: str) -> bool:
+    # Buffer sizes and lane counts are powers of two, other literals are noise
+    # (e.g. the example values in prompts)
+    n = int(number)
+    return n >= 8 and n & (n - 1) == 0
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizer for kernel sources and prompts that keeps AIE API structure.
+
+    Qualified names are kept whole and split into their components
+    (aie::reduce_add -> aie::reduce_add, reduce_add, reduce, add), dtype spellings
+    are normalized (int8_t, i8 -> int8, bf16 -> bfloat16) and vector types and
+    lane counts become width tokens (aie::vector<int16, 32> -> vec32,
+    int16x32), so "32 lane int16 vector" style queries match the code using it.
+    """
+    tokens = []
+    for m in VECTOR_TYPE_RE.finditer(text):
+        kind, dtype, lanes = m.groups()
+        tokens.append(f"vec{lanes}")
+        if dtype:
+            dtype = DTYPE_ALIASES.get(dtype.lower(), dtype.lower())
+            tokens.append(f"{dtype}x{lanes}")
+        if kind != "vector":
+            tokens.append(kind)
+    tokens.extend(f"vec{lanes}" for lanes in LANES_RE.findall(text))
+
+    for m in TOKEN_RE.finditer(text):
+        word = re.sub(r'\s+', '', m.group())
+        if word.isdigit():
+            if _is_width(word):
+                tokens.append(word)
+            continue
+        parts = word.split("::")
+        if len(parts) > 1:
+            tokens.append(word.lower())
+        for part in parts:
+            lower = part.lower()
+            if lower in STOPWORDS or len(lower) < 2:
+                continue
+            tokens.append(DTYPE_ALIASES.get(lower, lower))
+            subwords = [w.lower() for piece in part.split("_") for w in CAMEL_RE.findall(piece)]
+            if len(subwords) > 1:
+                tokens.extend(DTYPE_ALIASES.get(w, w) for w in subwords
+                              if w not in STOPWORDS and len(w) > 1 and (not w.isdigit() or _is_width(w)))
+    return tokens
+
+class Retriever:
+    """Common interface of the RAG backends.
+
+    search returns (document id, text, score) tuples, best first, and config
+    describes everything that changes the results (part of the RetrievalCache
+    key). Indexes record the manifest of the corpus they were built from:
+    update brings an index in line with corpus_dir by only (re)indexing added
+    and changed files and dropping removed ones, and searching an index that
+    doesn't match the corpus raises StaleIndexError.
+    """
+
+    backend = None
+    corpus_dir = CORPUS_DIR
+
+    def config(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+    def indexed_manifest(self) -> Optional[Dict[str, str]]:
+        """Manifest the index was built from, None if unknown."""
+        raise NotImplementedError
+
+    def check(self):
+        """Raises StaleIndexError if the index doesn't match corpus_dir."""
+        indexed = self.indexed_manifest()
+        if indexed is None:
+            raise StaleIndexError(f"{self.backend} index has no manifest, "
+                                  f"run scripts/update_rag_index.py --backend {self.backend}")
+        diff = diff_manifest(indexed, corpus_manifest(self.corpus_dir))
+        if any(diff.values()):
+            details = ", ".join(f"{len(names)} {kind}" for kind, names in diff.items() if names)
+            raise StaleIndexError(f"{self.backend} index is out of date with {self.corpus_dir} ({details}), "
+                                  f"run scripts/update_rag_index.py --backend {self.backend}")
+
+    def update(self, rebuild: bool = False) -> Dict[str, List[str]]:
+        """Incrementally updates the index, returns the files added, changed and
+        removed. rebuild=True reindexes everything."""
+        raise NotImplementedError
+
+    def search(self, query: str, k: int = 1) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def retrieve(self, query: str, k: int = 1) -> List[str]:
+        """Text of the top k documents for query."""
+        return [text for _, text, _ in self.search(query, k)]
+
+class BM25Index:
+    """Okapi BM25 inverted index over a small document collection.
+
+    Parameters
+    ----------
+    k1 : float, optional
+        Term frequency saturation.
+    b : float, optional
+        Document length normalization.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.texts = {}
+        self.meta = {}
+        self.lengths = {}
+        self.postings = {}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, doc_id: str, text: str, tokens: Optional[List[str]] = None, meta: Optional[Dict] = None):
+        """Indexes text under doc_id, replacing a previous document with that id.
+        meta is stored alongside the text, e.g. chunk metadata."""
+        if doc_id in self.texts:
+            self.remove(doc_id)
+        counts = Counter(tokenize(text) if tokens is None else tokens)
+        self.texts[doc_id] = text
+        self.meta[doc_id] = meta or {}
+        self.lengths[doc_id] = sum(counts.values())
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: str):
+        del self.texts[doc_id]
+        del self.meta[doc_id]
+        del self.lengths[doc_id]
+        for term in [t for t, docs in self.postings.items() if doc_id in docs]:
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, query: str, k: int = 1) -> List[Tuple[str, float]]:
+        """Top k (doc_id, score) pairs for query, ties broken by id."""
+        if not self.texts:
+            return []
+        n = len(self.texts)
+        avgdl = sum(self.lengths.values()) / n or 1.0
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Postings are rebuilt on load, only per-document term counts are stored
+        terms = {doc_id: {} for doc_id in self.texts}
+        for term, docs in self.postings.items():
+            for doc_id, tf in docs.items():
+                terms[doc_id][term] = tf
+        return {"k1": self.k1, "b": self.b,
+                "docs": {doc_id: {"text": self.texts[doc_id], "meta": self.meta[doc_id], "terms": terms[doc_id]}
+                         for doc_id in self.texts}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BM25Index":
+        index = cls(k1=data['k1'], b=data['b'])
+        for doc_id, doc in data['docs'].items():
+            index.texts[doc_id] = doc['text']
+            index.meta[doc_id] = doc.get('meta', {})
+            index.lengths[doc_id] = sum(doc['terms'].values())
+            for term, tf in doc['terms'].items():
+                index.postings.setdefault(term, {})[doc_id] = tf
+        return index
+
+def save_gzip_json(path: str, data: Dict[str, Any]):
+    pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, 'wt') as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def load_gzip_json(path: str) -> Dict[str, Any]:
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)
+
+class BM25Retriever(Retriever):
+    """Local lexical retriever over the reference kernels, no network access or
+    embedding model needed and deterministic across runs.
+
+    The index is stored as gzipped JSON at index_path together with the corpus
+    manifest. It is built on first use if missing, afterwards update reindexes
+    only the files that changed.
+
+    Parameters
+    ----------
+    corpus_dir : str, optional
+        Reference kernels to index.
+    index_path : str, optional
+        Serialized index, defaults to default_index_path("bm25", corpus_dir).
+    k1, b : float, optional
+        BM25 parameters.
+    """
+
+    backend = "bm25"
+
+    def __init__(self,
+                 corpus_dir: str = CORPUS_DIR,
+                 index_path: Optional[str] = None,
+                 k1: float = 1.5,
+                 b: float = 0.75):
+        self.corpus_dir = corpus_dir
+        self.index_path = index_path or default_index_path(self.backend, corpus_dir)
+        self.k1 = k1
+        self.b = b
+        self._index = None
+        self._manifest = None
+
+    def _load(self) -> Tuple[Optional[BM25Index], Optional[Dict[str, str]]]:
+        if not os.path.isfile(self.index_path):
+            return None, None
+        data = load_gzip_json(self.index_path)
+        index = BM25Index.from_dict(data)
+        # Parameters only affect scoring, not what is stored
+        index.k1, index.b = self.k1, self.b
+        return index, data.get('manifest')
+
+    @property
+    def index(self) -> BM25Index:
+        if self._index is None:
+            self._index, self._manifest = self._load()
+            if self._index is None:
+                self.update()
+        return self._index
+
+    def indexed_manifest(self) -> Optional[Dict[str, str]]:
+        self.index
+        return self._manifest
+
+    def documents(self, name: str, text: str):
+        """Yields the (doc_id, text, meta) entries indexed for a corpus file."""
+        yield name, text, {"path": name}
+
+    def update(self, rebuild: bool = False) -> Dict[str, List[str]]:
+        current = corpus_manifest(self.corpus_dir)
+        index, manifest = (None, None) if rebuild else self._load()
+        if index is None or manifest is None:
+            index, manifest = BM25Index(k1=self.k1, b=self.b), {}
+        diff = diff_manifest(manifest, current)
+
+        stale = set(diff['changed'] + diff['removed'])
+        for doc_id in [doc_id for doc_id, meta in index.meta.items() if meta.get('path') in stale]:
+            index.remove(doc_id)
+        for name in diff['added'] + diff['changed']:
+            with open(os.path.join(self.corpus_dir, name), 'r') as f:
+                for doc_id, text, meta in self.documents(name, f.read()):
+                    index.add(doc_id, text, meta=meta)
+
+        if any(diff.values()) or not os.path.isfile(self.index_path):
+            print(f"Updated {self.backend} index: " + ", ".join(f"{len(v)} {k}" for k, v in diff.items()))
+            save_gzip_json(self.index_path, {**index.to_dict(), "manifest": current})
+        self._index, self._manifest = index, current
+        return diff
+
+    def config(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "k1": self.k1, "b": self.b}
+
+    def search(self, query: str, k: int = 1) -> List[Tuple[str, str, float]]:
+        self.check()
+        return [(doc_id, self.index.texts[doc_id], score) for doc_id, score in self.index.search(query, k)]
+
+class LlamaIndexRetriever(Retriever):
+    """llama_index vector retriever over the reference kernels, optional backend
+    that needs llama_index and by default a remote embedding service.
+
+    The index is loaded (or built and persisted) once on first use and shared by
+    all top-k settings. Documents are identified by their path in corpus_dir,
+    so update only embeds added and changed files. The corpus manifest is kept
+    next to the persisted index in npueval_manifest.json.
+
+    Parameters
+    ----------
+    persist_dir : str, optional
+        Where the vector index is stored.
+    corpus_dir : str, optional
+        Reference kernels to index.
+    """
+
+    backend = "llama_index"
+    MANIFEST_FILE = "npueval_manifest.json"
+
+    def __init__(self, persist_dir: str = "./rag/vector_database", corpus_dir: str = CORPUS_DIR):
+        self.persist_dir = persist_dir
+        self.corpus_dir = corpus_dir
+        self._index = None
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.persist_dir, self.MANIFEST_FILE)
+
+    def _load(self):
+        from llama_index.core import StorageContext, load_index_from_storage
+        storage_context = StorageContext.from_defaults(persist_dir=self.persist_dir)
+        return load_index_from_storage(storage_context)
+
+    @property
+    def index(self):
+        if self._index is None:
+            if not os.path.exists(self.persist_dir):
+                self.update()
+            else:
+                self._index = self._load()
+        return self._index
+
+    def indexed_manifest(self) -> Optional[Dict[str, str]]:
+        if not os.path.isfile(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def _document(self, name: str):
+        from llama_index.core import Document
+        with open(os.path.join(self.corpus_dir, name), 'r') as f:
+            return Document(text=f.read(), id_=name, metadata={"file_name": name})
+
+    def update(self, rebuild: bool = False) -> Dict[str, List[str]]:
+        from llama_index.core import VectorStoreIndex
+        current = corpus_manifest(self.corpus_dir)
+        manifest = None if rebuild or not os.path.exists(self.persist_dir) else self.indexed_manifest()
+
+        if manifest is None:
+            # Indexes built before manifests were tracked don't use paths as ids
+            print("Indexing...")
+            diff = diff_manifest({}, current)
+            index = VectorStoreIndex.from_documents([self._document(name) for name in current])
+        else:
+            diff = diff_manifest(manifest, current)
+            index = self._load()
+            for name in diff['changed'] + diff['removed']:
+                index.delete_ref_doc(name, delete_from_docstore=True)
+            for name in diff['added'] + diff['changed']:
+                index.insert(self._document(name))
+
+        if manifest is None or any(diff.values()):
+            print(f"Updated {self.backend} index: " + ", ".join(f"{len(v)} {k}" for k, v in diff.items()))
+            index.storage_context.persist(persist_dir=self.persist_dir)
+            write_json_atomic(self.manifest_path, current)
+        self._index = index
+        return diff
+
+    def config(self) -> Dict[str, Any]:
+        """Settings that change retrieval results, part of the cache key."""
+        try:
+            from llama_index.core import Settings
+            embed_model = getattr(Settings.embed_model, 'model_name', type(Settings.embed_model).__name__)
+        except Exception:
+            embed_model = None
+        return {"backend": self.backend, "embed_model": embed_model}
+
+    def search(self, query: str, k: int = 1) -> List[Tuple[str, str, float]]:
+        index = self.index
+        self.check()
+        nodes = index.as_retriever(similarity_top_k=k).retrieve(query)
+        return [(node.node.node_id, node.node.text, node.score) for node in nodes]
+
+RETRIEVERS = {"bm25": BM25Retriever, "llama_index": LlamaIndexRetriever}
+
+def get_retriever(backend: str = "bm25", **kwargs) -> Retriever:
+    """Creates a retriever by backend name, "bm25" (local, whole files, default),
+    "bm25_chunks" (local, function level units within a token budget, see
+    chunking.ChunkRetriever) or "llama_index"."""
+    if backend == "bm25_chunks":
+        # chunking builds on this module
+        from .chunking import ChunkRetriever
+        return ChunkRetriever(**kwargs)
+    if backend not in RETRIEVERS:
+        raise ValueError(f"Unsupported retriever backend: {backend}, choose one of {list(RETRIEVERS)}")
+    return RETRIEVERS[backend](**kwargs)
+
+class RetrievalCache:
+    """JSON cache of retrieved context keyed on (prompt hash, corpus hash, k,
+    retriever config).
+
+    Prompts and the reference corpus are fixed for a sweep, so retrieval only
+    needs to run once per prompt and k no matter how many models and attempt
+    settings use the result. Entries computed against a different corpus are
+    dropped when the cache is opened, so editing rag/kernels invalidates it.
+
+    Parameters
+    ----------
+    path : str, optional
+        Cache file, defaults to NPUEVAL_CACHE_DIR/retrieval.json.
+    corpus_dir : str, optional
+        Reference kernels the cached contexts were retrieved from.
+    """
+
+    def __init__(self, path: Optional[str] = None, corpus_dir: str = CORPUS_DIR):
+        if path is None:
+            path = os.path.join(_cache_root(), "retrieval.json")
+        self.path = path
+        self.corpus = corpus_hash(corpus_dir)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if os.path.isfile(path):
+            with open(path, 'r') as f:
+                entries = json.load(f)
+            self.entries = {key: e for key, e in entries.items() if e['corpus'] == self.corpus}
+            self._dirty = len(self.entries) != len(entries)
+
+    def key(self, prompt: str, k: int, config: Dict[str, Any]) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        return _hash([prompt_hash, self.corpus, k, config])
+
+    def retrieve(self, retriever: Retriever, prompt: str, k: int) -> List[str]:
+        """Cached retriever.retrieve(prompt, k)."""
+        key = self.key(prompt, k, retriever.config())
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]['texts']
+        self.misses += 1
+        texts = retriever.retrieve(prompt, k)
+        self.entries[key] = {"corpus": self.corpus, "k": k, "texts": texts}
+        self._dirty = True
+        return texts
+
+    def save(self):
+        if self._dirty:
+            pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.path, self.entries)
+            self._dirty = False
+
+def precompute_contexts(tests: List[Dict[str, Any]],
+                        retriever: Retriever,
+                        ks: List[int],
+                        cache: Optional[RetrievalCache] = None) -> Dict[int, Dict[str, str]]:
+    """Retrieves context for every test prompt once per k.
+
+    Parameters
+    ----------
+    tests : List[Dict[str, Any]]
+        Dataset entries.
+    retriever : Retriever
+        Retrieval backend, see get_retriever.
+    ks : List[int]
+        Numbers of retrieved examples.
+    cache : RetrievalCache, optional
+        Cache to read from and update, saved before returning.
+
+    Returns
+    -------
+    Dict[int, Dict[str, str]]
+        {k: {kernel_name: formatted context}}, ready to append to the prompt.
+    """
+    contexts = {}
+    for k in ks:
+        contexts[k] = {}
+        for test in tests:
+            if cache is not None:
+                texts = cache.retrieve(retriever, test['prompt'], k)
+            else:
+                texts = retriever.retrieve(test['prompt'], k)
+            contexts[k][test['kernel_name']] = format_context(texts)
+    if cache is not None:
+        cache.save()
+        print(f"Retrieval cache: {cache.hits} hits, {cache.misses} misses")
+    return contexts
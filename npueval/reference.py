@@ -0,0 +1,366 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+"""Vectorized reference ops for the behavioral models of dataset/kernels.
+
+Every op works on whole arrays, loops only run over kernel taps, so test
+vectors with millions of elements can be generated in milliseconds. The
+numerics are chosen to match the scalar kernels and existing behaviorals:
+
+* integer ops accumulate exactly in int64 and saturate to the output type
+  (saturation=False wraps like plain numpy casts),
+* float ops accumulate in the type given by accumulate: "float64" (a Python
+  float loop), "float32", or "bfloat16" which rounds every product and
+  partial sum like a bfloat16 scalar kernel,
+* float to integer conversions use the AIE rounding modes of
+  aie::rounding_mode, float to bfloat16 rounds to nearest even.
+
+scripts/check_reference_ops.py checks every op against the loop based
+behaviorals of the dataset.
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+from ml_dtypes import bfloat16
+from numpy.lib.stride_tricks import sliding_window_view
+
+# aie::rounding_mode names. floor is the hardware default for srs, float to
+# integer casts in the dataset round to nearest even (conv_even).
+ROUNDING_MODES = ("floor", "ceil", "symmetric_floor", "symmetric_ceil", "positive_inf",
+                  "negative_inf", "symmetric_inf", "symmetric_zero", "conv_even", "conv_odd")
+ACCUMULATORS = ("int", "float64", "float32", "bfloat16")
+
+DTypeLike = Union[str, type, np.dtype]
+
+def as_dtype(dtype: DTypeLike) -> np.dtype:
+    if isinstance(dtype, str) and dtype == "bfloat16":
+        return np.dtype(bfloat16)
+    return np.dtype(dtype)
+
+def _is_int(dtype: np.dtype) -> bool:
+    return np.issubdtype(dtype, np.integer)
+
+def _accumulator(dtype: np.dtype, accumulate: Optional[str]) -> str:
+    if accumulate is None:
+        return "int" if _is_int(dtype) else "float64"
+    if accumulate not in ACCUMULATORS:
+        raise ValueError(f"Unsupported accumulator {accumulate}, choose one of {ACCUMULATORS}")
+    return accumulate
+
+def _acc_dtype(accumulate: str) -> np.dtype:
+    return {"int": np.dtype(np.int64), "float64": np.dtype(np.float64),
+            "float32": np.dtype(np.float32), "bfloat16": np.dtype(bfloat16)}[accumulate]
+
+def round_to_int(x: np.ndarray, rounding: str = "conv_even") -> np.ndarray:
+    """Rounds a float array to integral values with an AIE rounding mode.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Float input, computed in float64.
+    rounding : str
+        One of ROUNDING_MODES. floor/ceil round down/up, symmetric_floor and
+        symmetric_ceil towards/away from zero. The others round to nearest,
+        ties go up (positive_inf), down (negative_inf), away from zero
+        (symmetric_inf), towards zero (symmetric_zero), to even (conv_even)
+        or to odd (conv_odd).
+
+    Returns
+    -------
+    np.ndarray
+        float64 array of integral values.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if rounding == "floor":
+        return np.floor(x)
+    if rounding == "ceil":
+        return np.ceil(x)
+    if rounding == "symmetric_floor":
+        return np.trunc(x)
+    if rounding == "symmetric_ceil":
+        return np.where(x >= 0, np.ceil(x), np.floor(x))
+    if rounding == "symmetric_zero":
+        return np.where(x >= 0, np.ceil(x - 0.5), np.floor(x + 0.5))
+    if rounding == "symmetric_inf":
+        return np.where(x >= 0, np.floor(x + 0.5), np.ceil(x - 0.5))
+    if rounding == "positive_inf":
+        return np.floor(x + 0.5)
+    if rounding == "negative_inf":
+        return np.ceil(x - 0.5)
+    if rounding == "conv_even":
+        return np.rint(x)
+    if rounding == "conv_odd":
+        floor = np.floor(x)
+        tie = (x - floor) == 0.5
+        return np.where(tie, np.where(np.mod(floor, 2) == 1, floor, floor + 1), np.rint(x))
+    raise ValueError(f"Unsupported rounding mode {rounding}, choose one of {ROUNDING_MODES}")
+
+def saturate(x: np.ndarray, dtype: DTypeLike) -> np.ndarray:
+    """Clips x to the range of integer type dtype."""
+    info = np.iinfo(as_dtype(dtype))
+    return np.clip(x, info.min, info.max)
+
+def cast(x: np.ndarray, dtype: DTypeLike, rounding: str = "conv_even", saturation: bool = True) -> np.ndarray:
+    """Converts x to dtype the way an AIE kernel would.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Input array of any numeric type, including bfloat16.
+    dtype : str, type or np.dtype
+        Output type, "bfloat16" is accepted.
+    rounding : str
+        Rounding mode for float to integer conversions, see round_to_int.
+    saturation : bool
+        Clip to the range of an integer output type instead of wrapping.
+        NaNs become 0.
+
+    Returns
+    -------
+    np.ndarray
+        x converted to dtype.
+    """
+    dtype = as_dtype(dtype)
+    x = np.asarray(x)
+    if not _is_int(dtype):
+        if x.dtype.name == "bfloat16" and dtype != np.float32:
+            x = x.astype(np.float32)
+        return x.astype(dtype)
+    if not _is_int(x.dtype):
+        x = round_to_int(x, rounding)
+        x = np.nan_to_num(x, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    if saturation:
+        x = saturate(x, dtype)
+    elif not _is_int(x.dtype):
+        x = x.astype(np.int64)
+    return x.astype(dtype)
+
+def srs(x: np.ndarray, shift: int, dtype: DTypeLike, rounding: str = "floor", saturation: bool = True) -> np.ndarray:
+    """Shift-round-saturate of integer accumulators, x / 2**shift rounded with
+    an AIE rounding mode and converted to dtype. Computed exactly in int64.
+    """
+    x = np.asarray(x).astype(np.int64)
+    if shift == 0:
+        return cast(x, dtype, saturation=saturation)
+    floor = x >> shift
+    rem = x - (floor << shift)
+    half = np.int64(1) << (shift - 1)
+    up = {
+        "floor": np.zeros_like(x, dtype=bool),
+        "ceil": rem != 0,
+        "symmetric_floor": (x < 0) & (rem != 0),
+        "symmetric_ceil": (x >= 0) & (rem != 0),
+        "symmetric_inf": (rem > half) | ((rem == half) & (x >= 0)),
+        "symmetric_zero": (rem > half) | ((rem == half) & (x < 0)),
+        "positive_inf": rem >= half,
+        "negative_inf": rem > half,
+        "conv_even": (rem > half) | ((rem == half) & (floor & 1 == 1)),
+        "conv_odd": (rem > half) | ((rem == half) & (floor & 1 == 0)),
+    }
+    if rounding not in up:
+        raise ValueError(f"Unsupported rounding mode {rounding}, choose one of {ROUNDING_MODES}")
+    return cast(floor + up[rounding], dtype, saturation=saturation)
+
+def relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, np.zeros((), dtype=x.dtype))
+
+def _windows(x: np.ndarray, window: int, stride: int, ndim: int) -> np.ndarray:
+    """View of shape out_shape + (window,) * ndim over the last ndim axes."""
+    view = sliding_window_view(x, (window,) * ndim, axis=tuple(range(-ndim, 0)))
+    return view[(Ellipsis,) + (slice(None, None, stride),) * ndim + (slice(None),) * ndim]
+
+def _finish(acc: np.ndarray, bias, apply_relu: bool, accumulate: str, out_dtype: np.dtype,
+            rounding: str, saturation: bool) -> np.ndarray:
+    if bias is not None:
+        if accumulate == "bfloat16":
+            acc = (acc.astype(np.float32) + np.float32(np.asarray(bias, dtype=np.float32))).astype(bfloat16)
+        elif accumulate == "int":
+            acc = acc + np.int64(int(bias))
+        else:
+            acc = acc + np.asarray(bias).astype(acc.dtype)
+    if apply_relu:
+        acc = relu(acc)
+    return cast(acc, out_dtype, rounding=rounding, saturation=saturation)
+
+def _correlate(x: np.ndarray, kernel: np.ndarray, stride: int, ndim: int, bias, apply_relu: bool,
+               out_dtype: Optional[DTypeLike], accumulate: Optional[str], rounding: str,
+               saturation: bool) -> np.ndarray:
+    x = np.asarray(x)
+    kernel = np.asarray(kernel)
+    out_dtype = x.dtype if out_dtype is None else as_dtype(out_dtype)
+    accumulate = _accumulator(x.dtype, accumulate)
+    acc_dtype = _acc_dtype(accumulate)
+    compute = np.float32 if accumulate == "bfloat16" else acc_dtype
+
+    k = kernel.shape[0]
+    out_shape = tuple((n - k) // stride + 1 for n in x.shape[-ndim:])
+    if any(n <= 0 for n in out_shape):
+        raise ValueError(f"Kernel of size {k} doesn't fit input of shape {x.shape}")
+    xs = x.astype(compute)
+    ks = kernel.astype(compute)
+    acc = np.zeros(x.shape[:-ndim] + out_shape, dtype=acc_dtype)
+    # One vectorized multiply-accumulate per kernel tap, in the order of the
+    # scalar loop so sequential rounding is reproduced
+    for tap in np.ndindex(*kernel.shape):
+        index = tuple(slice(t, t + (n - 1) * stride + 1, stride) for t, n in zip(tap, out_shape))
+        prod = xs[(Ellipsis,) + index] * ks[tap]
+        if accumulate == "bfloat16":
+            acc = (acc.astype(np.float32) + prod.astype(bfloat16).astype(np.float32)).astype(bfloat16)
+        else:
+            acc += prod
+    return _finish(acc, bias, apply_relu, accumulate, out_dtype, rounding, saturation)
+
+def conv1d(x: np.ndarray, kernel: np.ndarray, stride: int = 1, bias=None, relu: bool = False,
+           out_dtype: Optional[DTypeLike] = None, accumulate: Optional[str] = None,
+           rounding: str = "conv_even", saturation: bool = True) -> np.ndarray:
+    """1D convolution (cross-correlation, no padding) of the last axis of x.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Input vector, leading axes are treated as a batch.
+    kernel : np.ndarray
+        1D kernel.
+    stride : int
+        Window stride, the output has (len(x) - len(kernel)) // stride + 1 elements.
+    bias : scalar, optional
+        Added after the accumulation.
+    relu : bool
+        Apply ReLU after the bias.
+    out_dtype : str, type or np.dtype, optional
+        Output type, defaults to the type of x.
+    accumulate : str, optional
+        Accumulator, one of ACCUMULATORS. Defaults to int for integer inputs
+        and float64 otherwise.
+    rounding : str
+        Rounding mode of the final conversion to an integer out_dtype.
+    saturation : bool
+        Saturate the final conversion to an integer out_dtype instead of wrapping.
+
+    Returns
+    -------
+    np.ndarray
+        Convolution result of type out_dtype.
+    """
+    return _correlate(x, kernel, stride, 1, bias, relu, out_dtype, accumulate, rounding, saturation)
+
+def conv2d(x: np.ndarray, kernel: np.ndarray, stride: int = 1, bias=None, relu: bool = False,
+           out_dtype: Optional[DTypeLike] = None, accumulate: Optional[str] = None,
+           rounding: str = "conv_even", saturation: bool = True) -> np.ndarray:
+    """2D convolution (cross-correlation, no padding) of the last two axes of x
+    with a square kernel, same stride along both axes. Parameters as in conv1d.
+    """
+    return _correlate(x, kernel, stride, 2, bias, relu, out_dtype, accumulate, rounding, saturation)
+
+def _pool(x: np.ndarray, window: int, stride: Optional[int], ndim: int, op: str, apply_relu: bool,
+          accumulate: str, rounding: str) -> np.ndarray:
+    x = np.asarray(x)
+    windows = _windows(x, window, window if stride is None else stride, ndim)
+    axes = tuple(range(-ndim, 0))
+    if op == "max":
+        # max is exact in the input type, bfloat16 compares through float32
+        out = windows.astype(np.float32).max(axis=axes) if x.dtype.name == "bfloat16" else windows.max(axis=axes)
+    else:
+        out = windows.astype(_acc_dtype(accumulate)).mean(axis=axes)
+    if apply_relu:
+        out = relu(out)
+    return cast(out, x.dtype, rounding=rounding)
+
+def maxpool1d(x: np.ndarray, window: int = 2, stride: Optional[int] = None, relu: bool = False) -> np.ndarray:
+    """Max pooling over the last axis, stride defaults to window. ReLU is
+    applied to the pooled values, the output has the type of x."""
+    return _pool(x, window, stride, 1, "max", relu, "float32", "conv_even")
+
+def maxpool2d(x: np.ndarray, window: int = 2, stride: Optional[int] = None, relu: bool = False) -> np.ndarray:
+    """Max pooling over square windows of the last two axes, see maxpool1d."""
+    return _pool(x, window, stride, 2, "max", relu, "float32", "conv_even")
+
+def avgpool1d(x: np.ndarray, window: int = 2, stride: Optional[int] = None, relu: bool = False,
+              accumulate: str = "float32", rounding: str = "conv_even") -> np.ndarray:
+    """Average pooling over the last axis, stride defaults to window. The mean
+    is computed in accumulate and converted back to the type of x, integer
+    outputs are rounded with rounding."""
+    return _pool(x, window, stride, 1, "mean", relu, accumulate, rounding)
+
+def avgpool2d(x: np.ndarray, window: int = 2, stride: Optional[int] = None, relu: bool = False,
+              accumulate: str = "float32", rounding: str = "conv_even") -> np.ndarray:
+    """Average pooling over square windows of the last two axes, see avgpool1d."""
+    return _pool(x, window, stride, 2, "mean", relu, accumulate, rounding)
+
+def _scalar(value: np.ndarray, dtype: DTypeLike, rounding: str = "conv_even", saturation: bool = True) -> np.ndarray:
+    # Reductions write a single element output buffer
+    return cast(np.reshape(value, (1,)), dtype, rounding=rounding, saturation=saturation)
+
+def reduce_sum(x: np.ndarray, out_dtype: Optional[DTypeLike] = None, accumulate: Optional[str] = None,
+               relu: bool = False, rounding: str = "conv_even", saturation: bool = True) -> np.ndarray:
+    """Sum of all elements as a 1 element array. Floats default to a float32
+    accumulator (numpy pairwise summation), integers sum exactly."""
+    x = np.asarray(x)
+    out_dtype = x.dtype if out_dtype is None else as_dtype(out_dtype)
+    accumulate = accumulate or ("int" if _is_int(x.dtype) else "float32")
+    compute = np.float32 if accumulate == "bfloat16" else _acc_dtype(_accumulator(x.dtype, accumulate))
+    total = np.sum(x.astype(compute), dtype=_acc_dtype(accumulate))
+    if relu:
+        total = max(total, total.dtype.type(0))
+    return _scalar(total, out_dtype, rounding, saturation)
+
+def reduce_max(x: np.ndarray, relu: bool = False) -> np.ndarray:
+    """Maximum element as a 1 element array of the type of x."""
+    x = np.asarray(x)
+    value = x.max()
+    if relu:
+        value = max(value, x.dtype.type(0))
+    return np.array([value], dtype=x.dtype)
+
+def reduce_min(x: np.ndarray, relu: bool = False) -> np.ndarray:
+    """Minimum element as a 1 element array of the type of x."""
+    x = np.asarray(x)
+    value = x.min()
+    if relu:
+        value = max(value, x.dtype.type(0))
+    return np.array([value], dtype=x.dtype)
+
+def argmax(x: np.ndarray) -> np.ndarray:
+    """Index of the first maximum as a 1 element uint32 array."""
+    return np.array([np.argmax(x)], dtype=np.uint32)
+
+def argmin(x: np.ndarray) -> np.ndarray:
+    """Index of the first minimum as a 1 element uint32 array."""
+    return np.array([np.argmin(x)], dtype=np.uint32)
+
+def mean(x: np.ndarray, out_dtype: Optional[DTypeLike] = None, accumulate: str = "float32") -> np.ndarray:
+    """Mean of all elements as a 1 element array."""
+    x = np.asarray(x)
+    out_dtype = x.dtype if out_dtype is None else as_dtype(out_dtype)
+    return _scalar(np.mean(x.astype(_acc_dtype(accumulate))), out_dtype)
+
+def dot(a: np.ndarray, b: np.ndarray, bias=None, relu: bool = False, out_dtype: Optional[DTypeLike] = None,
+        accumulate: Optional[str] = None, rounding: str = "conv_even", saturation: bool = True) -> np.ndarray:
+    """Dot product of two vectors as a 1 element array, bias and ReLU applied
+    after the accumulation. Integers accumulate exactly, floats in float32 by
+    default."""
+    a = np.asarray(a)
+    b = np.asarray(b)
+    out_dtype = a.dtype if out_dtype is None else as_dtype(out_dtype)
+    accumulate = accumulate or ("int" if _is_int(a.dtype) else "float32")
+    acc_dtype = _acc_dtype(_accumulator(a.dtype, accumulate))
+    if accumulate == "bfloat16":
+        prods = (a.astype(np.float32) * b.astype(np.float32)).astype(bfloat16).astype(np.float32)
+        acc = np.zeros((), dtype=bfloat16)
+        for p in prods:
+            acc = bfloat16(np.float32(acc) + p)
+        acc = np.asarray(acc)
+    else:
+        acc = np.dot(a.astype(acc_dtype), b.astype(acc_dtype))
+    return _finish(np.reshape(acc, (1,)), bias, relu, accumulate, out_dtype, rounding, saturation)
+
+def vecmat(v: np.ndarray, m: np.ndarray, out_dtype: Optional[DTypeLike] = None, accumulate: Optional[str] = None,
+           rounding: str = "conv_even", saturation: bool = True) -> np.ndarray:
+    """Vector-matrix product v @ m, m is reshaped to (len(v), -1)."""
+    v = np.asarray(v)
+    m = np.asarray(m).reshape(v.shape[0], -1)
+    out_dtype = v.dtype if out_dtype is None else as_dtype(out_dtype)
+    accumulate = _accumulator(v.dtype, accumulate if accumulate != "bfloat16" else "float32")
+    acc_dtype = _acc_dtype(accumulate)
+    return cast(v.astype(acc_dtype) @ m.astype(acc_dtype), out_dtype, rounding=rounding, saturation=saturation)
@@ -0,0 +1,137 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import errno
+import fcntl
+import shutil
+import pathlib
+import tempfile
+from typing import Optional
+
+# ioctl(FICLONE) from linux/fs.h, shares extents between files on btrfs/xfs
+_FICLONE = 0x40049409
+
+def _tmpfs_root() -> Optional[str]:
+    """Returns a tmpfs mount usable for sandboxes, if the system has one."""
+    for candidate in ("/dev/shm", os.environ.get("XDG_RUNTIME_DIR", "")):
+        if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+            return candidate
+    return None
+
+def reflink(src: str, dst: str):
+    """Copy-on-write clone of src to dst. Raises OSError if the filesystem
+    doesn't support it."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
+def stage_file(src: str, dst: str, writable: bool=False):
+    """Places src at dst with as little I/O as possible.
+
+    Read-only inputs are hardlinked, falling back to a reflink and finally to a
+    copy. Files the build may rewrite in place (writable=True) are never
+    hardlinked since that would modify the source as well.
+    """
+    if not writable:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    try:
+        reflink(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def promote(src: str, dst: str):
+    """Atomically moves src to dst. Readers see either the old or the new file,
+    never a partial one. Across filesystems the file is first copied next to dst
+    and then renamed into place."""
+    pathlib.Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    fd, tmp_dst = tempfile.mkstemp(prefix=f".{os.path.basename(dst)}.", dir=os.path.dirname(dst) or ".")
+    os.close(fd)
+    try:
+        shutil.copy2(src, tmp_dst)
+        os.replace(tmp_dst, dst)
+    except BaseException:
+        if os.path.exists(tmp_dst):
+            os.unlink(tmp_dst)
+        raise
+    os.unlink(src)
+
+class BuildSandbox:
+    """A private, uniquely named build directory for a single compile or build job.
+
+    Inputs are staged into the sandbox with hardlinks/reflinks instead of copies and
+    results are promoted out of it with atomic renames, so concurrent jobs can share
+    output directories without clobbering each other.
+
+    Parameters
+    ----------
+    root : str, optional
+        Parent directory for the sandbox. Defaults to NPUEVAL_SANDBOX_DIR, then the
+        system temp dir.
+    tmpfs : bool, optional
+        Place the sandbox on tmpfs (/dev/shm) when available.
+    prefix : str, optional
+        Prefix of the sandbox directory name.
+    keep : bool, optional
+        Don't delete the sandbox on exit, useful to inspect intermediate outputs.
+    """
+
+    def __init__(self,
+                 root: Optional[str] = None,
+                 tmpfs: bool = False,
+                 prefix: str = "build_",
+                 keep: bool = False):
+        if root is None:
+            root = os.environ.get("NPUEVAL_SANDBOX_DIR") or (_tmpfs_root() if tmpfs else None)
+        if root:
+            pathlib.Path(root).mkdir(parents=True, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=root)
+        self.keep = keep
+
+    def __enter__(self) -> "BuildSandbox":
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+    def file(self, name: str) -> str:
+        """Path of name inside the sandbox."""
+        return os.path.join(self.path, name)
+
+    def stage(self, src: str, name: Optional[str] = None, writable: bool = False) -> str:
+        """Stages src into the sandbox (see stage_file) and returns its new path."""
+        dst = self.file(name or os.path.basename(src))
+        stage_file(src, dst, writable=writable)
+        return dst
+
+    def stage_tree(self, src: str, name: Optional[str] = None) -> str:
+        """Stages a directory tree. Files are cloned rather than hardlinked since
+        build tools rewrite intermediates in place."""
+        dst = self.file(name or os.path.basename(src.rstrip(os.sep)))
+        shutil.copytree(src, dst, copy_function=lambda s, d: stage_file(s, d, writable=True))
+        return dst
+
+    def promote(self, name: str, dest_dir: str, dest_name: Optional[str] = None) -> str:
+        """Atomically moves a sandbox file into dest_dir and returns the new path."""
+        dst = os.path.join(dest_dir, dest_name or name)
+        promote(self.file(name), dst)
+        return dst
+
+    def cleanup(self):
+        if not self.keep and self.path and os.path.isdir(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
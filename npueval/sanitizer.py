@@ -0,0 +1,421 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# Token based clean up of generated kernel sources. Every step is a single
+# forward pass (str.find only ever moves past what it skipped), so the run
+# time is linear in the input whatever an LLM emits, unlike the nested
+# quantifier regexes this replaces.
+
+# Words that can precede a parameter list without being the function name
+NON_NAMES = frozenset(("__attribute__", "__declspec", "alignas", "decltype", "noexcept", "throw",
+                       "requires", "sizeof", "alignof", "static_assert"))
+# Dropped when comparing parameter types
+QUALIFIERS = frozenset(("const", "volatile", "restrict", "__restrict", "__restrict__", "__aie_dm_resource_a",
+                        "__aie_dm_resource_b"))
+TYPE_KEYWORDS = frozenset(("struct", "class", "union", "enum"))
+
+class SanitizerError(ValueError):
+    """Raised when a solution can't be turned into a compilable kernel, e.g. the
+    required function is missing."""
+
+def tokenize_cpp(text: str) -> List[Tuple[str, int, int]]:
+    """Splits C++ source into (kind, start, end) tokens.
+
+    Kinds are "comment", "pp" (a whole preprocessor directive including
+    continuation lines), "string", "char", "ident", "number" and "punct" (one
+    character, "::" and "->" are single tokens). Whitespace is skipped.
+    Unterminated comments and literals run to the end of the line or text.
+    """
+    tokens = []
+    i, n = 0, len(text)
+    line_start = True
+    while i < n:
+        c = text[i]
+        if c == "\n":
+            line_start = True
+            i += 1
+            continue
+        if c in " \t\r\f\v":
+            i += 1
+            continue
+        start = i
+        if c == "#" and line_start:
+            end = i
+            while True:
+                end = text.find("\n", end)
+                if end < 0 or text[end - 1] != "\\":
+                    break
+                end += 1
+            i = n if end < 0 else end
+            tokens.append(("pp", start, i))
+            continue
+        line_start = False
+        if c == "/" and text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+            tokens.append(("comment", start, i))
+        elif c == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            tokens.append(("comment", start, i))
+        elif c == '"' or c == "'":
+            j = i + 1
+            while j < n and text[j] != c and text[j] != "\n":
+                j += 2 if text[j] == "\\" else 1
+            i = min(j + 1, n)
+            tokens.append(("string" if c == '"' else "char", start, i))
+        elif c.isalpha() or c == "_":
+            j = i + 1
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            if j < n and text[j] == '"' and text[i:j] in ("R", "LR", "uR", "UR", "u8R"):
+                # Raw string literal R"delim( ... )delim"
+                paren = text.find("(", j)
+                line = text.find("\n", j)
+                if paren >= 0 and (line < 0 or paren < line) and paren - j <= 17:
+                    end = text.find(")" + text[j + 1:paren] + '"', paren)
+                    i = n if end < 0 else end + paren - j + 1
+                    tokens.append(("string", start, i))
+                    continue
+            i = j
+            tokens.append(("ident", start, i))
+        elif c.isdigit() or (c == "." and i + 1 < n and text[i + 1].isdigit()):
+            j = i + 1
+            while j < n and (text[j].isalnum() or text[j] in "._'" or
+                             (text[j] in "+-" and text[j - 1] in "eEpP")):
+                j += 1
+            i = j
+            tokens.append(("number", start, i))
+        else:
+            i += 2 if text.startswith(("::", "->"), i) else 1
+            tokens.append(("punct", start, i))
+    return tokens
+
+def _matching(tokens: List[Tuple[str, int, int]], text: str, skipped: Optional[set] = None) -> Dict[int, int]:
+    """Index of the closing token of every (, [ and { token.
+
+    Braces in the #else/#elif branch of a conditional opened inside a block
+    are ignored, so alternative loop headers don't unbalance the body, and
+    their token indexes are added to skipped if given. Unclosed brackets are
+    left out.
+    """
+    match = {}
+    stack = []
+    conditionals = [] # [depth at #if, in an alternative branch]
+    for k, (kind, start, end) in enumerate(tokens):
+        if kind == "pp":
+            directive = text[start + 1:end].lstrip().split(None, 1)
+            directive = directive[0] if directive else ""
+            if directive in ("if", "ifdef", "ifndef"):
+                conditionals.append([len(stack), False])
+            elif directive in ("else", "elif", "elifdef", "elifndef") and conditionals:
+                conditionals[-1][1] = conditionals[-1][0] > 0
+            elif directive == "endif" and conditionals:
+                conditionals.pop()
+            continue
+        if kind != "punct":
+            continue
+        if conditionals and conditionals[-1][1]:
+            if skipped is not None:
+                skipped.add(k)
+            continue
+        c = text[start]
+        if c in "([{":
+            stack.append((c, k))
+        elif c in ")]}":
+            opener = {")": "(", "]": "[", "}": "{"}[c]
+            # Recover from stray closers by unwinding to the matching opener
+            for depth in range(len(stack) - 1, max(-1, len(stack) - 9), -1):
+                if stack[depth][0] == opener:
+                    match[stack[depth][1]] = k
+                    del stack[depth:]
+                    break
+    return match
+
+def code_structure(text: str, tokens: Optional[List[Tuple[str, int, int]]] = None) -> List[Tuple[str, int, int]]:
+    """The (kind, start, end) tokens that shape a C++ source: preprocessor
+    directives as "#" and the braces and semicolons outside comments, literals
+    and the alternative branches _matching ignores, as the character itself."""
+    tokens = tokenize_cpp(text) if tokens is None else tokens
+    skipped = set()
+    _matching(tokens, text, skipped)
+    structure = []
+    for k, (kind, start, end) in enumerate(tokens):
+        if kind == "pp":
+            structure.append(("#", start, end))
+        elif kind == "punct" and text[start] in "{};" and k not in skipped:
+            structure.append((text[start], start, end))
+    return structure
+
+def _split_params(tokens, text, lo, hi) -> List[List[str]]:
+    params, current, depth = [], [], 0
+    for kind, start, end in tokens[lo:hi]:
+        if kind == "comment":
+            continue
+        word = text[start:end]
+        if kind == "punct" and word in "(<[{":
+            depth += 1
+        elif kind == "punct" and word in ")>]}":
+            depth -= 1
+        elif kind == "punct" and word == "," and depth == 0:
+            params.append(current)
+            current = []
+            continue
+        current.append(word)
+    if current:
+        params.append(current)
+    if params == [["void"]]:
+        return []
+    return params
+
+def _param_type(param: List[str]) -> str:
+    """Type of a parameter, without its name, default value and qualifiers."""
+    if "=" in param:
+        param = param[:param.index("=")]
+    # Drop the trailing name, unless the parameter is only a type
+    if len(param) > 1 and (param[-1][0].isalpha() or param[-1][0] == "_") and param[-1] not in ("int", "char", "float", "double"):
+        param = param[:-1]
+    return " ".join(word for word in param if word not in QUALIFIERS)
+
+def parse_units(text: str, tokens: Optional[List[Tuple[str, int, int]]] = None) -> List[Dict[str, Any]]:
+    """Top level declarations of a C++ source, in order.
+
+    Each unit is a dict with kind ("function", "extern_c", "namespace",
+    "declaration", "type", "pp", "comment" or "stray"), its character span
+    start/end and, for functions, name and params (list of parameter token
+    lists). extern "C" and namespace blocks have their units in children and
+    the spans of their header and closing brace in open/close.
+    """
+    tokens = tokenize_cpp(text) if tokens is None else tokens
+    match = _matching(tokens, text)
+    root = []
+    containers = [] # (unit, closing token index)
+    scope = root
+    k, n = 0, len(tokens)
+    header = None # token index where the current declaration starts
+    while k < n:
+        kind, start, end = tokens[k]
+        if containers and k == containers[-1][1]:
+            unit, _ = containers.pop()
+            unit['close'] = (start, end)
+            unit['end'] = end
+            scope = containers[-1][0]['children'] if containers else root
+            header = None
+            k += 1
+            continue
+        if header is None and kind in ("pp", "comment"):
+            scope.append({"kind": kind, "start": start, "end": end})
+            k += 1
+            continue
+        if header is None:
+            header = k
+        word = text[start:end]
+        if kind != "punct":
+            k += 1
+            continue
+        if word == ";":
+            scope.append({"kind": "declaration", "start": tokens[header][1], "end": end})
+            header = None
+            k += 1
+            continue
+        if word == "}":
+            # Stray closing brace at this level
+            scope.append({"kind": "stray", "start": tokens[header][1], "end": end})
+            header = None
+            k += 1
+            continue
+        if word in "([" and k in match:
+            k = match[k] + 1
+            continue
+        if word != "{":
+            k += 1
+            continue
+
+        head = [(hk, text[hs:he]) for hk, hs, he in tokens[header:k] if hk != "comment"]
+        words = [w for _, w in head]
+        close = match.get(k)
+        container = None
+        if len(head) == 2 and words[0] == "extern" and head[1][0] == "string":
+            container = "extern_c"
+        elif words and "namespace" in words[:2] and "(" not in words and "=" not in words:
+            container = "namespace"
+        if container and close is not None:
+            unit = {"kind": container, "start": tokens[header][1], "end": tokens[close][2],
+                    "open": (tokens[header][1], end), "children": []}
+            scope.append(unit)
+            containers.append((unit, close))
+            scope = unit['children']
+            header = None
+            k += 1
+            continue
+
+        if close is None:
+            # Unbalanced, the rest of the text is one unit
+            scope.append({"kind": "stray", "start": tokens[header][1], "end": len(text)})
+            break
+        is_type = any(w in TYPE_KEYWORDS for w in words[:3])
+        # Parameter list: the first top level ( after a name that isn't an
+        # attribute, e.g. __attribute__((noinline)) void f(int)
+        paren, name = None, ""
+        i = header
+        while i < k and not is_type:
+            kind_i, s_i, e_i = tokens[i]
+            if kind_i == "punct" and text[s_i:e_i] == "=" and "operator" not in words:
+                break
+            if kind_i == "punct" and text[s_i:e_i] == "(" and i in match:
+                prev = i - 1
+                while prev >= header and tokens[prev][0] == "comment":
+                    prev -= 1
+                prev_word = text[tokens[prev][1]:tokens[prev][2]] if prev >= header else ""
+                if prev >= header and tokens[prev][0] == "ident" and prev_word not in NON_NAMES:
+                    paren, name = i, prev_word
+                    break
+                i = match[i]
+            i += 1
+        if paren is not None:
+            scope.append({"kind": "function", "start": tokens[header][1], "end": tokens[close][2], "body": start,
+                          "name": name, "params": _split_params(tokens, text, paren + 1, match[paren])})
+            header = None
+            k = close + 1
+            continue
+        # Braced initializer or type definition, the declaration ends at ;
+        k = close + 1
+        if k >= n or text[tokens[k][1]:tokens[k][2]] != ";":
+            # A class body can be followed by declarators
+            while k < n and text[tokens[k][1]:tokens[k][2]] not in (";", "{", "}"):
+                k += 1
+        if k < n and text[tokens[k][1]:tokens[k][2]] == ";":
+            scope.append({"kind": "type" if is_type else "declaration", "start": tokens[header][1], "end": tokens[k][2]})
+            header = None
+            k += 1
+        else:
+            # No ; after the braces, the declaration ends there. Carrying it into
+            # the next brace group would rescan it for every following {
+            scope.append({"kind": "stray", "start": tokens[header][1], "end": tokens[close][2]})
+            header = None
+            k = close + 1
+    if header is not None and header < n:
+        scope.append({"kind": "stray", "start": tokens[header][1], "end": len(text)})
+    return root
+
+def functions(units: List[Dict[str, Any]]):
+    """Yields the function units, including those in extern "C" and namespace blocks."""
+    stack = [iter(units)]
+    while stack:
+        unit = next(stack[-1], None)
+        if unit is None:
+            stack.pop()
+        elif unit['kind'] == "function":
+            yield unit
+        elif "children" in unit:
+            stack.append(iter(unit['children']))
+
+def required_signature(prompt: str) -> Optional[Tuple[str, List[str]]]:
+    """(name, parameter types) of the function a dataset prompt asks for,
+    the last function defined in the prompt."""
+    defined = list(functions(parse_units(prompt)))
+    if not defined:
+        return None
+    return defined[-1]['name'], [_param_type(p) for p in defined[-1]['params']]
+
+def sanitize(code: str,
+             signature: Optional[Tuple[str, List[str]]] = None,
+             wrapper: Optional[str] = None) -> Dict[str, Any]:
+    """Cleans up a generated kernel before it's compiled with the test wrapper.
+
+    Removes main(), definitions of the wrapper function (the test program
+    defines its own), and unwraps extern "C" blocks, which are dropped when
+    nothing else is left in them. If signature is given the kernel must be
+    defined with the same number of parameters, when it's defined more than
+    once the last definition is kept.
+
+    Parameters
+    ----------
+    code : str
+        Generated C++ source.
+    signature : tuple, optional
+        (name, parameter types) of the required function, see required_signature.
+    wrapper : str, optional
+        Name of the wrapper defined by the test program, e.g. relu_int8_wrapper.
+
+    Returns
+    -------
+    Dict[str, Any]
+        code (sanitized source), removed (descriptions of what was removed),
+        errors (the solution can't work, e.g. the kernel is missing) and
+        warnings (e.g. parameter types that differ from the prompt).
+    """
+    units = parse_units(code)
+    removed, errors, warnings = [], [], []
+    cuts = [] # character spans to drop
+
+    if signature is not None:
+        kernels = [f for f in functions(units) if f['name'] == signature[0]]
+        if not kernels:
+            errors.append(f"Required function {signature[0]} is not defined")
+        else:
+            matching = [f for f in kernels if len(f['params']) == len(signature[1])]
+            if not matching:
+                errors.append(f"{signature[0]} takes {len(kernels[-1]['params'])} parameters, "
+                              f"expected {len(signature[1])}: {', '.join(signature[1])}")
+            else:
+                types = [_param_type(p) for p in matching[-1]['params']]
+                for got, expected in zip(types, signature[1]):
+                    if got.replace(" ", "") != expected.replace(" ", ""):
+                        warnings.append(f"{signature[0]} parameter type {got} differs from {expected}")
+                for f in matching[:-1]:
+                    cuts.append((f['start'], f['end']))
+                    removed.append(f"duplicate definition of {f['name']}")
+
+    duplicates = set(cuts)
+
+    def visit(scope):
+        """Marks units to remove, returns True if anything in scope is kept."""
+        kept = False
+        for unit in scope:
+            if unit['kind'] == "function" and (unit['name'] == "main" or (wrapper and unit['name'] == wrapper)):
+                cuts.append((unit['start'], unit['end']))
+                removed.append(f"{unit['name']}()")
+            elif unit['kind'] == "extern_c":
+                if visit(unit['children']):
+                    cuts.append(unit['open'])
+                    cuts.append(unit['close'])
+                    removed.append('extern "C" block (unwrapped)')
+                    kept = True
+                else:
+                    cuts.append((unit['start'], unit['end']))
+                    removed.append('extern "C" block')
+            elif "children" in unit:
+                visit(unit['children'])
+                kept = True
+            elif unit['kind'] not in ("comment", "stray") and (unit['start'], unit['end']) not in duplicates:
+                kept = True
+        return kept
+    visit(units)
+
+    if cuts:
+        cuts.sort()
+        pieces, pos = [], 0
+        for start, end in cuts:
+            if start < pos:
+                continue
+            pieces.append(code[pos:start])
+            pos = end
+            # Take the rest of the line with the removed code
+            while pos < len(code) and code[pos] in " \t;":
+                pos += 1
+            if pos < len(code) and code[pos] == "\n":
+                pos += 1
+        pieces.append(code[pos:])
+        code = "".join(pieces)
+    return {"code": code.strip() + "\n", "removed": removed, "errors": errors, "warnings": warnings}
+
+def extract_function_body(src: str) -> Optional[str]:
+    """Body of the first function defined in src, without the opening brace
+    but with the closing one. None if src has no function definition."""
+    unit = next(functions(parse_units(src)), None)
+    if unit is None:
+        return None
+    return src[unit['body'] + 1:unit['end'] - 1].strip() + "\n}"
@@ -0,0 +1,70 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+from typing import Optional
+
+FENCE = "```"
+
+class CodeFenceScanner:
+    """Incremental detector for the first fenced code block of a streamed response.
+
+    Follows the same rules as AIECoder.extract_codeblock: a block opens with ```
+    and an optional alphanumeric language tag followed by a newline (otherwise the
+    code starts right after the fence), and ends at the next ```. Each character is
+    examined a constant number of times however the stream is chunked.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.code: Optional[str] = None
+        self._open = -1       # index of the opening fence
+        self._code_start = -1 # index where the code starts
+        self._pos = 0         # where the next search starts
+
+    @property
+    def closed(self) -> bool:
+        return self.code is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Adds a chunk of streamed text. Returns True once the first code block
+        is complete, its contents are then available in self.code."""
+        if self.closed or not chunk:
+            return self.closed
+        self.text += chunk
+
+        while True:
+            if self._open < 0:
+                idx = self.text.find(FENCE, self._pos)
+                if idx < 0:
+                    # The fence might be split across chunks
+                    self._pos = max(self._pos, len(self.text) - len(FENCE) + 1)
+                    return False
+                self._open = idx
+                self._pos = idx + len(FENCE)
+
+            if self._code_start < 0:
+                # Skip the language tag, need the first non-alphanumeric char to decide
+                i = self._pos
+                while i < len(self.text) and self.text[i].isascii() and self.text[i].isalnum():
+                    i += 1
+                if i == len(self.text):
+                    self._pos = i
+                    return False
+                after_fence = self._open + len(FENCE)
+                self._code_start = i + 1 if self.text[i] == "\n" else after_fence
+                self._pos = self._code_start
+
+            idx = self.text.find(FENCE, self._pos)
+            if idx < 0:
+                self._pos = max(self._code_start, len(self.text) - len(FENCE) + 1)
+                return False
+
+            if idx == self._code_start:
+                # Empty block, extract_codeblock skips those
+                self._open, self._code_start = -1, -1
+                self._pos = idx + len(FENCE)
+                continue
+
+            self.code = self.text[self._code_start:idx].strip()
+            self.text = self.text[:idx + len(FENCE)]
+            return True
@@ -0,0 +1,103 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Scaling report for the size sweep variants of npueval_sweep.jsonl (see
+# PromptConstructor.sweep). Cycles of each kernel are fit to
+#   cycles = fixed + per_element * elements
+# so the fixed overhead of a kernel call (setup, loop prologue, reduction
+# tails) can be told apart from the steady state cost per element.
+
+def fit_scaling(elements: List[int], cycles: List[float]) -> Optional[Dict[str, float]]:
+    """Least squares fit of cycles = fixed + per_element * elements.
+
+    Parameters
+    ----------
+    elements : List[int]
+        Swept sizes.
+    cycles : List[float]
+        Measured cycles at each size.
+
+    Returns
+    -------
+    Dict[str, float] or None
+        fixed, per_element, elements_per_cycle (steady state throughput) and
+        r2 of the fit, None with less than two distinct sizes.
+    """
+    x = np.asarray(elements, dtype=np.float64)
+    y = np.asarray(cycles, dtype=np.float64)
+    if len(np.unique(x)) < 2:
+        return None
+    A = np.stack([np.ones_like(x), x], axis=1)
+    (fixed, per_element), *_ = np.linalg.lstsq(A, y, rcond=None)
+    residual = y - (fixed + per_element * x)
+    total = np.sum((y - y.mean()) ** 2)
+    r2 = 1.0 - np.sum(residual ** 2) / total if total > 0 else 1.0
+    return {
+        "fixed": float(fixed),
+        "per_element": float(per_element),
+        "elements_per_cycle": float(1.0 / per_element) if per_element > 0 else float("inf"),
+        "r2": float(r2),
+    }
+
+def collect_sweep_results(tests: List[Dict[str, Any]], results_path: str) -> Dict[str, List[Tuple[int, float]]]:
+    """(elements, total_cycles) of the passing variants of each swept kernel,
+    read from the result jsons of run_functional_tests in results_path."""
+    points = {}
+    for test in tests:
+        sweep = test.get('sweep')
+        if not sweep:
+            continue
+        result_file = os.path.join(results_path, f"{test['kernel_name']}_wrapper.json")
+        if not os.path.isfile(result_file):
+            continue
+        with open(result_file, 'r') as f:
+            result = json.load(f)
+        if result.get('result') != 'Pass' or not result.get('total_cycles'):
+            continue
+        points.setdefault(sweep['base'], []).append((sweep['elements'], result['total_cycles']))
+    return {base: sorted(p) for base, p in points.items()}
+
+def scaling_report(tests: List[Dict[str, Any]], results_path: str, verbose: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Fits every swept kernel and prints a table sorted by fixed overhead share.
+
+    Parameters
+    ----------
+    tests : List[Dict[str, Any]]
+        Records of npueval_sweep.jsonl.
+    results_path : str
+        Evaluation results of those records.
+    verbose : bool
+        Print the table.
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Per base kernel the fit (see fit_scaling) plus the measured points and
+        overhead_share, the fraction of cycles spent in the fixed overhead at
+        the dataset size.
+    """
+    base_elements = {t['sweep']['base']: t['sweep']['base_elements'] for t in tests if t.get('sweep')}
+    report = {}
+    for base, points in collect_sweep_results(tests, results_path).items():
+        fit = fit_scaling([n for n, _ in points], [c for _, c in points])
+        if fit is None:
+            continue
+        n0 = base_elements[base]
+        at_base = fit['fixed'] + fit['per_element'] * n0
+        fit['overhead_share'] = fit['fixed'] / at_base if at_base > 0 else None
+        fit['points'] = points
+        report[base] = fit
+
+    if verbose:
+        print(f"{'kernel':40s} {'points':>6s} {'fixed':>10s} {'cyc/elem':>9s} {'elem/cyc':>9s} {'overhead':>9s} {'r2':>6s}")
+        for base, fit in sorted(report.items(), key=lambda kv: -(kv[1]['overhead_share'] or 0)):
+            share = f"{fit['overhead_share']:.0%}" if fit['overhead_share'] is not None else "-"
+            print(f"{base:40s} {len(fit['points']):6d} {fit['fixed']:10.0f} {fit['per_element']:9.3f} "
+                  f"{fit['elements_per_cycle']:9.2f} {share:>9s} {fit['r2']:6.3f}")
+    return report
@@ -3,18 +3,221 @@
 
 import os
 import re
+import json
 import subprocess
 import pathlib
 import shutil
+import hashlib
 import tempfile
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from .backends import get_backend
+from .diagnostics import parse_diagnostics
+from .sandbox import BuildSandbox, stage_file
+from .watchdog import StageTimeout, remaining, run_with_timeout
+
+# Headers every prompt includes (see PromptConstructor), these dominate front-end time
+PCH_HEADERS = ("<aie_api/aie.hpp>", "\"aie_kernel_utils.h\"")
+
+def _cache_root() -> str:
+    """Root directory for on-disk build caches, overridable with NPUEVAL_CACHE_DIR."""
+    return os.environ.get("NPUEVAL_CACHE_DIR",
+                          os.path.join(os.path.expanduser("~"), ".cache", "npueval"))
+
+@lru_cache(maxsize=None)
+def _clang_version(compiler_path: str, mtime_ns: int, size: int) -> str:
+    result = subprocess.run([compiler_path, "--version"], capture_output=True, text=True)
+    return result.stdout
+
+def toolchain_fingerprint(compiler_path: str) -> str:
+    """Identifies a compiler install by its version string and binary stat, so
+    caches keyed on it are invalidated when the toolchain is rebuilt or replaced."""
+    st = os.stat(compiler_path)
+    version = _clang_version(compiler_path, st.st_mtime_ns, st.st_size)
+    return hashlib.sha256(f"{compiler_path}|{st.st_mtime_ns}|{st.st_size}|{version}".encode()).hexdigest()
+
+def _write_atomic(path: str, text: str):
+    """Writes text to path through a temporary file in the same directory, so
+    concurrent readers see either no file or the whole file."""
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+def precompiled_header(base_command: List[str], cache_dir: Optional[str]=None,
+                       timeout: Optional[float]=None) -> Optional[str]:
+    """Returns a precompiled header for PCH_HEADERS built with base_command, building
+    it on first use.
+
+    Entries are keyed on the compiler command (binary and device flags), the header
+    set and the toolchain fingerprint. A failed build is recorded in the entry, so
+    later compiles fall back right away instead of retrying it.
+
+    Parameters
+    ----------
+    base_command : List[str]
+        Compiler binary followed by the device compile flags, as used by aie_compiler.
+    cache_dir : str, optional
+        Where to keep the PCH cache, defaults to NPUEVAL_CACHE_DIR/pch.
+    timeout : float, optional
+        Seconds before the PCH build is killed and StageTimeout is raised. A
+        timeout isn't recorded as a failure.
+
+    Returns
+    -------
+    pch : str or None
+        Path to the .pch file, or None if it could not be built.
+    """
+    cache_dir = cache_dir or os.path.join(_cache_root(), "pch")
+    key = hashlib.sha256(json.dumps({
+        "command": base_command,
+        "headers": PCH_HEADERS,
+        "toolchain": toolchain_fingerprint(base_command[0]),
+    }).encode()).hexdigest()[:32]
+
+    entry = os.path.join(cache_dir, key)
+    pch = os.path.join(entry, "aie_headers.pch")
+    failed = os.path.join(entry, "failed.log")
+    if os.path.isfile(pch):
+        return pch
+    if os.path.isfile(failed):
+        return None
+
+    # The header has to outlive the build, clang validates it when loading the PCH
+    pathlib.Path(entry).mkdir(parents=True, exist_ok=True)
+    header = os.path.join(entry, "aie_headers.h")
+    if not os.path.isfile(header):
+        _write_atomic(header, "".join(f"#include {h}\n" for h in PCH_HEADERS))
+
+    # Private output per build, concurrent builders (threads included) each
+    # write their own file and the last rename wins
+    fd, tmp_pch = tempfile.mkstemp(prefix=".aie_headers.", suffix=".pch", dir=entry)
+    os.close(fd)
+    try:
+        run_with_timeout([*base_command, "-x", "c++-header", header, "-o", tmp_pch], timeout, "compile",
+                         check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        os.replace(tmp_pch, pch)
+    except subprocess.CalledProcessError as e:
+        _write_atomic(failed, e.output or "")
+        return None
+    finally:
+        if os.path.exists(tmp_pch):
+            os.unlink(tmp_pch)
+    return pch
+
+def _base_command(compiler: str, dev: str) -> List[str]:
+    """Compiler binary followed by the single core compile flags for dev."""
+    if compiler=="peano":
+        peano_dir = os.environ.get("PEANO_INSTALL_DIR", "")
+        if not peano_dir:
+            raise EnvironmentError("PEANO_INSTALL_DIR environment variable is not set.")
+    
+    if compiler=="peano":
+        if dev=="npu1":
+            compile_flags = os.environ['PEANOWRAP2_FLAGS'].split(' ')
+        elif dev=="npu2":
+            compile_flags = os.environ['PEANOWRAP2P_FLAGS'].split(' ')
+        else:
+            raise Exception(f"Unsupported device: {dev}")
+        return [f"{peano_dir}/bin/clang++", *compile_flags]
+    elif compiler=="chess":
+        if dev=="npu1":
+            compile_flags = os.environ['CHESSCCWRAP2_FLAGS'].split(' ')
+        elif dev=="npu2":
+            compile_flags = os.environ['CHESSCCWRAP2P_FLAGS'].split(' ')
+        else:
+            raise Exception(f"Unsupported device: {dev}")
+        return ["xchesscc_wrapper", *compile_flags]
+    else:
+        raise Exception(f"Unsupported single core compiler: {compiler}, choose 'peano' or 'chess'.")
+
+def aie_syntax_check(src: str,
+                     kernel_name: str="kernel",
+                     compiler: str="peano",
+                     dev="npu1",
+                     use_pch: bool=False,
+                     timeout: Optional[float]=None) -> Dict:
+    """Fast screening tier: runs only the clang front-end (-fsyntax-only) on src.
+
+    This parses and type checks the kernel, including template instantiation of
+    the aie_api calls, but skips code generation for the AIE target. Most broken
+    LLM solutions are rejected here at a fraction of the cost of a full compile.
+    The chess wrapper has no front-end only mode, for it the check is skipped.
+
+    Parameters
+    ----------
+    src : str
+        Source code written as C++
+    kernel_name : str
+        Name given to the temporary source file
+    compiler : str
+        Which compiler to use in backend, valid options are: peano, chess.
+    dev : str
+        NPU device, options are "npu1" and "npu2".
+    use_pch : bool
+        Parse against the cached aie_api precompiled header, see precompiled_header.
+    timeout : float, optional
+        Seconds before the front-end is killed and StageTimeout is raised.
+
+    Returns
+    -------
+    result : dict
+        success (bool), skipped (bool), log (str), diagnostics (list of parsed clang
+        diagnostics, see parse_diagnostics) and elapsed time in seconds.
+    """
+    backend = get_backend()
+    if not backend.hardware:
+        return backend.syntax_check(src, kernel_name=kernel_name, compiler=compiler, dev=dev, use_pch=use_pch,
+                                    timeout=timeout)
+
+    start = time.perf_counter()
+    if compiler != "peano":
+        return {'success': True, 'skipped': True, 'log': "", 'diagnostics': [], 'elapsed': 0.0}
+
+    base_command = _base_command(compiler, dev)
+    with BuildSandbox(prefix=f"{kernel_name}_") as sandbox:
+        src_file = sandbox.file(kernel_name + ".cc")
+        with open(src_file, "w") as f:
+            f.write(src)
+
+        command = [*base_command, "-fsyntax-only", "-w", src_file]
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            if use_pch:
+                pch = precompiled_header(base_command, timeout=remaining(deadline))
+                if pch:
+                    command[len(base_command):len(base_command)] = ["-include-pch", pch]
+
+            result = run_with_timeout(command, remaining(deadline), "compile", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        except StageTimeout:
+            # Report the deadline of the whole check, not what was left of it
+            raise StageTimeout("compile", timeout) from None
+
+    return {
+        'success': result.returncode == 0,
+        'skipped': False,
+        'log': result.stdout,
+        'diagnostics': parse_diagnostics(result.stdout),
+        'elapsed': time.perf_counter() - start,
+    }
 
 def aie_compiler(src: str,
                  kernel_name: str="kernel",
-                 output_dir: str="output", 
+                 output_dir: Optional[str]="output", 
                  compiler: str="peano", 
                  dev="npu1", 
                  generate_assembly: bool=False,
-                 verbose_output: bool=False) -> str:
+                 verbose_output: bool=False,
+                 use_pch: bool=False,
+                 syntax_check: bool=False,
+                 timeout: Optional[float]=None) -> str:
     """Function that calls a single kernel AIE compiler. The resulting .o file 
     gets stored in output_dir - by default ./output/kernel.o
     
@@ -24,9 +227,12 @@ def aie_compiler(src: str,
         Source code written as C++
     kernel_name : str
         Name given to outputs files
-    output_dir : str
+    output_dir : str or None
         Directory to store compilation outputs, relative to current working dir,
-        by default the kernel .o file will be stored in ./output/kernel.o
+        by default the kernel .o file will be stored in ./output/kernel.o. The
+        compile itself runs in a private BuildSandbox and outputs are moved here
+        with atomic renames, so concurrent compiles never see partial files. If
+        None, outputs are discarded (e.g. when only the compile log is needed).
     compiler : str
         Which compiler to use in backend, valid options are: peano, chess.
     dev : str
@@ -40,55 +246,59 @@ def aie_compiler(src: str,
         If true will generate extra outputs. You might want this disabled to save
         LLM tokens. If set to False it will concisely only produce error messages
         and not output anything on successful compiles.
+    use_pch : bool
+        If True (peano only), compile against a cached precompiled header of the
+        aie_api headers, see precompiled_header. The PCH is built on first use and
+        falls back to a regular compile if it cannot be built.
+    syntax_check : bool
+        If True, screen the source with aie_syntax_check first and only generate
+        the object if it passes. Failing sources return the front-end log.
+    timeout : float, optional
+        Seconds for the whole compile (screening, assembly and object) after
+        which the compiler is killed and StageTimeout is raised.
 
     Returns
     -------
     result : str
         Result message or log of errors in the case of a failure. 
     """
+    backend = get_backend()
+    if not backend.hardware:
+        return backend.compile(src, kernel_name=kernel_name, output_dir=output_dir, compiler=compiler, dev=dev,
+                               generate_assembly=generate_assembly, verbose_output=verbose_output,
+                               use_pch=use_pch, syntax_check=syntax_check, timeout=timeout)
+
+    deadline = time.monotonic() + timeout if timeout else None
+    if syntax_check:
+        check = aie_syntax_check(src, kernel_name=kernel_name, compiler=compiler, dev=dev, use_pch=use_pch,
+                                 timeout=timeout)
+        if not check['success']:
+            return check['log']
+
+    base_command = _base_command(compiler, dev)
+
+    sandbox = BuildSandbox(prefix=f"{kernel_name}_")
+    tmp_src_file = sandbox.file(kernel_name + ".cc")
+    output_object = sandbox.file(kernel_name + ".o")
 
-    if compiler=="peano":
-        peano_dir = os.environ.get("PEANO_INSTALL_DIR", "")
-        if not peano_dir:
-            raise EnvironmentError("PEANO_INSTALL_DIR environment variable is not set.")
-    
-    # Create output dir if it doesn't exist
-    pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
-    
-    tmp_src_file = os.path.join(os.getcwd(), output_dir, kernel_name + ".cc")
-    output_object = os.path.join(os.getcwd(), output_dir, kernel_name + ".o")
-    
     with open(tmp_src_file, "w") as f:
         f.write(src)
 
-    if compiler=="peano":
-        if dev=="npu1":
-            compile_flags = os.environ['PEANOWRAP2_FLAGS'].split(' ')
-        elif dev=="npu2":
-            compile_flags = os.environ['PEANOWRAP2P_FLAGS'].split(' ')
-        else:
-            raise Exception(f"Unsupported device: {dev}")
-        base_command = [f"{peano_dir}/bin/clang++", *compile_flags]
-    elif compiler=="chess":
-        if dev=="npu1":
-            compile_flags = os.environ['CHESSCCWRAP2_FLAGS'].split(' ')
-        elif dev=="npu2":
-            compile_flags = os.environ['CHESSCCWRAP2P_FLAGS'].split(' ')
-        else:
-            raise Exception(f"Unsupported device: {dev}")
-        base_command = ["xchesscc_wrapper", *compile_flags]
-    else:
-        raise Exception(f"Unsupported single core compiler: {compiler}, choose 'peano' or 'chess'.")
-
     try:
         # Generate assembly
         if generate_assembly:
-            output_assembly = os.path.join(os.getcwd(), output_dir, kernel_name + ".s")
+            output_assembly = sandbox.file(kernel_name + ".s")
             asm_command = [*base_command, "-S", "-fverbose-asm", "-fstack-size-section", "-c", tmp_src_file, "-o", output_assembly]
-            subprocess.check_output(asm_command, stderr=subprocess.STDOUT, text=True)
+            run_with_timeout(asm_command, remaining(deadline), "compile", check=True,
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
         
         # Compile kernel
         full_command = [*base_command, "-c", tmp_src_file, "-o", output_object]
+
+        if use_pch and compiler=="peano":
+            pch = precompiled_header(base_command, timeout=remaining(deadline))
+            if pch:
+                full_command[len(base_command):len(base_command)] = ["-include-pch", pch]
         
         if not verbose_output:
             # suppress warnings only show errors
@@ -97,18 +307,50 @@ def aie_compiler(src: str,
         if verbose_output:
             full_command.append('-v')
 
-        result = subprocess.check_output(full_command, stderr=subprocess.STDOUT, text=True)
+        run_with_timeout(full_command, remaining(deadline), "compile", check=True,
+                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except StageTimeout:
+        # Report the deadline of the whole compile, not what was left of it
+        raise StageTimeout("compile", timeout) from None
     except subprocess.CalledProcessError as e:
         return e.output
-    
+    finally:
+        # Keep the source for inspection even if the compile failed
+        if output_dir is not None:
+            for ext in (".cc", ".s", ".o"):
+                if os.path.isfile(sandbox.file(kernel_name + ext)):
+                    sandbox.promote(kernel_name + ext, os.path.join(os.getcwd(), output_dir))
+        sandbox.cleanup()
+
+    if output_dir is None:
+        return "Compilation successful."
     return f"Compilation successful.\nObject file generated at {output_dir}/{kernel_name}.o"
 
+def graph_signature(mlir_file: str, compiler_backend: str="peano") -> str:
+    """Returns the cache key for the graph-level artifacts of an MLIR design.
+
+    The MLIR text already pins the device (``aie.device(npu1_1col)`` vs ``npu2``),
+    the buffer shapes and the kernel object name, so two designs with the same text
+    lower to the same routing, DMA programming and NPU instruction stream. The
+    compiler backend and toolchain location are folded in since they change the
+    lowered core code.
+    """
+    with open(mlir_file, "rb") as f:
+        mlir = f.read()
+    h = hashlib.sha256(mlir)
+    h.update(compiler_backend.encode())
+    h.update(os.environ.get("PEANO_INSTALL_DIR", "").encode())
+    return h.hexdigest()
+
 def build_single_kernel_app(mlir_file: str,
                             kernel_file: str,
                             xclbin_name: str="app",
                             output_dir: str="output",
                             workdir: str=None,
-                            compiler_backend: str= "peano"):
+                            compiler_backend: str= "peano",
+                            graph_cache: str=None,
+                            tmpfs: bool=False,
+                            timeout: float=None):
     """Calls aiecc.py as a subprocesses. Specifically for building a single kernel app,
     which is why it takes exactly 1 kernel object as a parameter.
 
@@ -123,26 +365,43 @@ def build_single_kernel_app(mlir_file: str,
         Name of the final xclbin name. It will also generate an instruction sequence .txt
         of the same name as xclbin_name.
     workdir : str or None, optional
-        By default the subprocess will run in a temp dir, but if you want to see intermediary
-        outputs set this to a different path.
+        By default the subprocess will run in a private BuildSandbox that is removed
+        afterwards. If you want to see intermediary outputs set this to a path, the
+        sandbox is then created (and kept) inside it.
     compiler_backend : str, optional
         Choose compiler backend, defaults to peano.
+    graph_cache : str or None, optional
+        Directory used to cache the NPU instruction stream of an MLIR design (see
+        graph_signature). The first build of a design runs the full aiecc.py flow
+        and stores the instruction stream, later builds of the same design reuse it
+        and skip the NPU instruction pass. Only that pass is skipped: aiecc.py
+        doesn't build incrementally, so lowering, the core link against the new
+        kernel object, the CDO and the xclbin packaging run every time. Set to ""
+        to use the default location under NPUEVAL_CACHE_DIR. Disabled by default.
+    tmpfs : bool, optional
+        Run the build in a sandbox on tmpfs (/dev/shm) when available.
+    timeout : float or None, optional
+        Seconds before aiecc.py and its subprocesses are killed and StageTimeout
+        is raised.
 
     Returns
     -------
     returncode : int
         0 if process finished successfully
     """
-    if not workdir:
-        tmp_workdir = tempfile.TemporaryDirectory(suffix=None, prefix="build_", dir=".")
-        workdir = tmp_workdir.name
-    else:
-        tmp_workdir = None
+    backend = get_backend()
+    if not backend.hardware:
+        return backend.build(mlir_file, kernel_file, xclbin_name=xclbin_name, output_dir=output_dir,
+                             workdir=workdir, compiler_backend=compiler_backend, graph_cache=graph_cache,
+                             tmpfs=tmpfs, timeout=timeout)
+
+    sandbox = BuildSandbox(root=workdir, tmpfs=tmpfs, keep=bool(workdir))
+    workdir = sandbox.path
 
     try:
-        # Copy kernel.o and aie.mlir to the work directory
-        shutil.copy2(kernel_file, os.path.join(workdir, pathlib.Path(kernel_file).parts[-1]))
-        shutil.copy2(mlir_file, os.path.join(workdir, os.path.basename(mlir_file)))
+        # Link kernel.o and aie.mlir into the sandbox, aiecc only reads them
+        sandbox.stage(kernel_file)
+        sandbox.stage(mlir_file)
 
         # Check if peano dir is set
         peano_dir = os.environ.get("PEANO_INSTALL_DIR", "")
@@ -162,6 +421,20 @@ def build_single_kernel_app(mlir_file: str,
                        "--aie-generate-npu",
                        "--no-compile-host",
                        "--peano", f"{os.environ['PEANO_INSTALL_DIR']}"]
+
+        # Graph cache: reuse the instruction stream of an identical design so
+        # aiecc skips the NPU instruction pass. The instruction stream only
+        # depends on the design, the core is linked against the new kernel
+        # object by the rest of the flow.
+        cache_entry = None
+        cache_hit = False
+        if graph_cache is not None:
+            cache_entry = os.path.join(graph_cache or os.path.join(_cache_root(), "graphs"),
+                                       graph_signature(mlir_file, compiler_backend))
+            cache_hit = os.path.isfile(os.path.join(cache_entry, "insts.bin"))
+            if cache_hit:
+                insts_flags = ("--aie-generate-npu-insts", "--aie-generate-npu")
+                aiecc_flags = [f for f in aiecc_flags if f not in insts_flags]
         
         command = ["aiecc.py",
                    *aiecc_flags,
@@ -170,23 +443,37 @@ def build_single_kernel_app(mlir_file: str,
                    f"{os.path.basename(mlir_file)}"]
 
         # Outputs of build should be xclbin_name.xclbin and xclbin_name.bin
-        result = subprocess.run(command, cwd=workdir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
-        print(f"{xclbin_name}.xclbin, {xclbin_name}.bin built")
+        result = run_with_timeout(command, timeout, "build", check=True, cwd=workdir,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        print(f"{xclbin_name}.xclbin, {xclbin_name}.bin built{' (cached graph)' if cache_hit else ''}")
         
-        # Return the paths to the generated files
-        xclbin_path = os.path.join(workdir, f"{xclbin_name}.xclbin")
-        instr_path = os.path.join(workdir, f"{xclbin_name}.bin")
-
-        xclbin_output = os.path.join(output_dir, f"{xclbin_name}.xclbin")
-        instr_output = os.path.join(output_dir, f"{xclbin_name}.bin")
+        # Copies in both directions, a hardlink would share the inode between the
+        # cache entry and output_dir/xclbin_name.bin
+        if cache_entry and cache_hit:
+            sandbox.stage(os.path.join(cache_entry, "insts.bin"), f"{xclbin_name}.bin", writable=True)
+        elif cache_entry:
+            _store_graph(cache_entry, sandbox.file(f"{xclbin_name}.bin"))
 
-        # Create output dir if it doesn't exist
-        pathlib.Path(xclbin_output).parent.mkdir(parents=True, exist_ok=True)
-        
-        shutil.copy2(xclbin_path, xclbin_output)
-        shutil.copy2(instr_path, instr_output)
+        # Move the generated files to output_dir, readers never see partial files
+        sandbox.promote(f"{xclbin_name}.xclbin", output_dir)
+        sandbox.promote(f"{xclbin_name}.bin", output_dir)
         
         return result
         
     except subprocess.CalledProcessError as e:
         raise Exception("Build failed:", e.stderr)
+    finally:
+        sandbox.cleanup()
+
+def _store_graph(cache_entry: str, instr_path: str):
+    """Populates a graph cache entry. The entry is assembled next to its final
+    location and renamed into place so concurrent builds never see a partial entry."""
+    parent = os.path.dirname(cache_entry)
+    pathlib.Path(parent).mkdir(parents=True, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging_", dir=parent)
+    try:
+        stage_file(instr_path, os.path.join(staging, "insts.bin"), writable=True)
+        os.rename(staging, cache_entry)
+    except OSError:
+        # Another build populated the entry first
+        shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,204 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# AIE2 event trace packets, as written to the trace buffer by the trace unit
+# of a tile and converted to json by mlir-aie's parse_trace.py. The
+# simulated backend encodes its cycle model into these packets so the trace
+# goes through the same files and cycle extraction as on hardware, see
+# SimulatedExecutor.
+#
+# A packet is a header word followed by 7 payload words. The header holds
+# the packet id in bits 4-0, the packet type (0 core, 1 mem, 2 shim, 3
+# memtile) in bits 13-12, the row in bits 20-16, the column in bits 27-21
+# and odd parity in bit 31. The payload is a byte stream, most significant
+# byte of each word first, of frames:
+#
+#   Start      11110000 + 7 bytes      absolute timer
+#   Single0    0eeetttt                slot e, t cycles since the last frame
+#   Single1    100eeett + 1 byte       10-bit t
+#   Single2    101eeett + 2 bytes      18-bit t
+#   Multiple0  1100tttt + 1 byte       mask of active slots
+#   Multiple1  110100tt + 2 bytes      10-bit t, then the mask
+#   Multiple2  110101tt + 3 bytes      18-bit t, then the mask
+#   Repeat0    1110nnnn                previous frame n more times
+#   Repeat1    111101nn + 1 byte       10-bit n
+#   Event_Sync 11111110
+#   Filler     11111111
+#
+# A frame sets the slots that are active from its time on, until the next
+# frame. Multiple frames with an empty mask mark that no event is active.
+
+PAYLOAD_WORDS = 7
+
+# Core events in trace slots 0-7, the defaults of
+# aie.utils.trace.configure_packet_tracing_aie2 used by iron.build_app
+CORE_EVENT_SLOTS = ("INSTR_EVENT_0", "INSTR_EVENT_1", "INSTR_VECTOR", "PORT_RUNNING_0",
+                    "PORT_RUNNING_1", "INSTR_LOCK_ACQUIRE_REQ", "INSTR_LOCK_RELEASE_REQ", "LOCK_STALL")
+
+START, EVENT_SYNC, FILLER = 0xF0, 0xFE, 0xFF
+MAX_DELTA = (1 << 18) - 1
+
+def _parity(word: int) -> int:
+    return bin(word & 0x7FFFFFFF).count("1") % 2
+
+def packet_header(col: int, row: int, pkt_type: int = 0, pkt_id: int = 1) -> int:
+    """Header word of a trace packet, bit 31 makes the number of set bits odd."""
+    word = (pkt_id & 0x1F) | ((pkt_type & 0x3) << 12) | ((row & 0x1F) << 16) | ((col & 0x7F) << 21)
+    return word | ((1 - _parity(word)) << 31)
+
+def parse_header(word: int) -> Optional[Dict[str, int]]:
+    """Fields of a packet header word, None if it isn't one."""
+    if bin(word).count("1") % 2 != 1 or (word >> 5) & 0x7F or (word >> 14) & 0x3 or (word >> 28) & 0x7:
+        return None
+    return {"id": word & 0x1F, "type": (word >> 12) & 0x3, "row": (word >> 16) & 0x1F, "col": (word >> 21) & 0x7F}
+
+def _frame(delta: int, slots: Sequence[int]) -> List[int]:
+    """Shortest frame for the active slots, delta cycles after the previous frame."""
+    if len(slots) == 1:
+        slot = slots[0]
+        if delta < 1 << 4:
+            return [(slot << 4) | delta]
+        if delta < 1 << 10:
+            return [0x80 | (slot << 2) | (delta >> 8), delta & 0xFF]
+        return [0xA0 | (slot << 2) | (delta >> 16), (delta >> 8) & 0xFF, delta & 0xFF]
+    mask = sum(1 << slot for slot in slots)
+    if delta < 1 << 4:
+        return [0xC0 | delta, mask]
+    if delta < 1 << 10:
+        return [0xD0 | (delta >> 8), delta & 0xFF, mask]
+    return [0xD4 | (delta >> 16), (delta >> 8) & 0xFF, delta & 0xFF, mask]
+
+def encode_trace(changes: Sequence[Tuple[int, Sequence[int]]], col: int, row: int,
+                 pkt_type: int = 0, pkt_id: int = 1) -> List[int]:
+    """Encodes a tile's trace into packet words.
+
+    Parameters
+    ----------
+    changes : Sequence[Tuple[int, Sequence[int]]]
+        (cycle, active slots) in time order, each entry holds until the next one.
+    col, row : int
+        Tile the trace belongs to, as in the packet header.
+    pkt_type, pkt_id : int
+        Packet type and id of the trace flow.
+
+    Returns
+    -------
+    List[int]
+        32-bit words, whole packets padded with filler bytes.
+    """
+    stream, last = [], None
+    for cycle, slots in changes:
+        if last is None or cycle - last > MAX_DELTA:
+            stream += [START, *cycle.to_bytes(7, "big")]
+            last = cycle
+        stream += _frame(cycle - last, sorted(slots))
+        last = cycle
+
+    packet_bytes = 4 * PAYLOAD_WORDS
+    stream += [FILLER] * (-len(stream) % packet_bytes)
+    words = []
+    for i in range(0, len(stream), packet_bytes):
+        payload = stream[i:i + packet_bytes]
+        words.append(packet_header(col, row, pkt_type, pkt_id))
+        words += [int.from_bytes(bytes(payload[j:j + 4]), "big") for j in range(0, packet_bytes, 4)]
+    return words
+
+def _decode_frames(stream: List[int]) -> List[Tuple[int, List[int]]]:
+    """(cycle, active slots) of a tile's payload byte stream."""
+    changes, cycle, previous = [], 0, None
+    i = 0
+    while i < len(stream):
+        byte = stream[i]
+        if byte == START:
+            cycle = int.from_bytes(bytes(stream[i + 1:i + 8]), "big")
+            i += 8
+            continue
+        if byte in (EVENT_SYNC, FILLER):
+            i += 1
+            continue
+        if byte & 0xF0 == 0xE0 or byte & 0xFC == 0xF4:
+            # Repeat0/Repeat1
+            count = byte & 0xF if byte & 0xF0 == 0xE0 else ((byte & 0x3) << 8) | stream[i + 1]
+            i += 1 if byte & 0xF0 == 0xE0 else 2
+            if previous is not None:
+                for _ in range(count):
+                    cycle += previous[0]
+                    changes.append((cycle, previous[1]))
+            continue
+
+        if byte & 0x80 == 0:
+            delta, slots, size = byte & 0xF, [(byte >> 4) & 0x7], 1
+        elif byte & 0xE0 == 0x80:
+            delta, slots, size = ((byte & 0x3) << 8) | stream[i + 1], [(byte >> 2) & 0x7], 2
+        elif byte & 0xE0 == 0xA0:
+            delta = ((byte & 0x3) << 16) | (stream[i + 1] << 8) | stream[i + 2]
+            slots, size = [(byte >> 2) & 0x7], 3
+        else:
+            if byte & 0xF0 == 0xC0:
+                delta, size = byte & 0xF, 2
+            elif byte & 0xFC == 0xD0:
+                delta, size = ((byte & 0x3) << 8) | stream[i + 1], 3
+            elif byte & 0xFC == 0xD4:
+                delta, size = ((byte & 0x3) << 16) | (stream[i + 1] << 8) | stream[i + 2], 4
+            else:
+                raise ValueError(f"Unknown trace frame {byte:#04x}")
+            mask = stream[i + size - 1]
+            slots = [slot for slot in range(8) if mask >> slot & 1]
+        cycle += delta
+        changes.append((cycle, slots))
+        previous = (delta, slots)
+        i += size
+    return changes
+
+def decode_trace(words: Sequence[int], slot_names: Sequence[str] = CORE_EVENT_SLOTS) -> List[Dict]:
+    """Converts trace packet words to the json events parse_trace.py writes.
+
+    Only core packets (type 0) are decoded, every tile gets its own pid. An
+    event is a 'B' when its slot becomes active and an 'E' when it stops.
+    """
+    streams: Dict[Tuple[int, int], List[int]] = {}
+    words = list(words)
+    i = 0
+    while i < len(words):
+        header = parse_header(words[i])
+        if header is None:
+            i += 1
+            continue
+        payload = words[i + 1:i + 1 + PAYLOAD_WORDS]
+        if header['type'] == 0:
+            stream = streams.setdefault((header['col'], header['row']), [])
+            for word in payload:
+                stream += list(word.to_bytes(4, "big"))
+        i += 1 + PAYLOAD_WORDS
+
+    events = []
+    for pid, ((col, row), stream) in enumerate(sorted(streams.items())):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"core_trace for tile{col},{row}"}})
+        active = set()
+        for cycle, slots in _decode_frames(stream):
+            for slot in sorted(active - set(slots)):
+                events.append({"name": slot_names[slot], "ph": "E", "ts": cycle, "pid": pid, "tid": slot, "args": {}})
+            for slot in sorted(set(slots) - active):
+                events.append({"name": slot_names[slot], "ph": "B", "ts": cycle, "pid": pid, "tid": slot, "args": {}})
+            active = set(slots)
+    return events
+
+def write_trace_words(words: Sequence[int], trace_name: str):
+    """Writes trace words as hex lines, the text format of aie.utils.xrt.write_out_trace
+    (empty words of the trace buffer are left out)."""
+    with open(trace_name, "w") as f:
+        f.write("\n".join(f"{word:08x}" for word in words if word != 0))
+
+def read_trace_words(trace_name: str) -> List[int]:
+    with open(trace_name, "r") as f:
+        return [int(line, 16) for line in f if line.strip()]
+
+def trace_file_to_json(trace_file: str, output_name: str, slot_names: Sequence[str] = CORE_EVENT_SLOTS) -> bool:
+    """Decodes a trace file written by write_out_trace to parse_trace.py json."""
+    with open(output_name, "w") as f:
+        json.dump(decode_trace(read_trace_words(trace_file), slot_names), f)
+    print(f"Trace written to {output_name}")
+    return True
@@ -1,49 +1,75 @@
 # Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
 # SPDX-License-Identifier: MIT
 
-from CppHeaderParser import CppHeader
 import numpy as np
 import subprocess
 import json
 import re
 import os
+import tempfile
 from pathlib import Path
+from typing import Any
+
+from .sanitizer import SanitizerError, required_signature, sanitize
+from .vectors import load_test_vectors
+
+def write_json_atomic(path: str, data: Any):
+    """Writes data as JSON to path via a temporary file and rename, so a crash
+    never leaves a truncated result behind for resume logic to trust."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def solution_name(test: dict) -> str:
+    """Name of the solution file of a test. Sweep variants with a shared
+    prompt (see PromptConstructor.sweep) use the solution of their base kernel."""
+    sweep = test.get('sweep') or {}
+    return sweep['base'] if sweep.get('shared') else test['kernel_name']
 
 def get_kernel_code(test: dict, solutions_path: str = None) -> str:
     """Fetch the kernel code from the provided solution path, if none provided default 
-    to canonical solution."""
+    to canonical solution.
+
+    Solutions are cleaned up with sanitizer.sanitize (main(), copies of the
+    test wrapper and extern "C" blocks are removed), SanitizerError is raised
+    if the kernel function of the prompt isn't defined."""
     if not solutions_path:
         return test['prompt'] + test['canonical_solution']
     
-    with open(os.path.join(solutions_path, f"{test['kernel_name']}.json"), 'r') as sol_file:
+    with open(os.path.join(solutions_path, f"{solution_name(test)}.json"), 'r') as sol_file:
         solution = json.load(sol_file)
         if not solution.get('code'):
             print(f"No code available in {solutions_path} for {test['kernel_name']}")
             return None
 
-        srccode = solution['code']
-        
-        # if gpt decides to be too helpful and adds a main()... remove it
-        srccode = re.sub(r'int\s+main\s*\([^)]*\)\s*{[^{}]*({[^{}]*}[^{}]*)*}', '', srccode, flags=re.DOTALL)
-        
-        # cppheaderparser will complain if we don't remove trailing comments
-        srccode = srccode.split('// extern "C"')[0]
-        
-        return srccode
+    sanitized = sanitize(solution['code'],
+                         signature=required_signature(test['prompt']),
+                         wrapper=f"{test['kernel_name']}_wrapper")
+    for warning in sanitized['warnings']:
+        print(f"Warning: {warning}")
+    if sanitized['errors']:
+        raise SanitizerError("; ".join(sanitized['errors']))
+    return sanitized['code']
 
-def extract_buffers(test):
+def extract_buffers(test, base_dir=None):
     """Specific helper for the AIEval dataset - parses the test dictionary and returns
     input buffers, output buffers and RTPs as separate lists.
+
+    Test vectors can be inline lists, npz sidecar references or offsets into a
+    memory mapped blob (see npueval.vectors), blob arrays are returned as
+    read-only zero-copy views. Relative sidecar paths are looked up in base_dir,
+    the packaged dataset directory and the working directory.
     """
-    input_buffers = []
-    for x in test['test_vectors']['inputs']:
-        array, dtype = list(x.values())
-        input_buffers.append(np.array(array, dtype=dtype))
-    
-    output_buffers = []
-    for x in test['test_vectors']['outputs']:
-        array, dtype = list(x.values())
-        output_buffers.append(np.array(array, dtype=dtype))
+    test_vectors = load_test_vectors(test, base_dir)
+    input_buffers = [array for _, array in test_vectors['inputs']]
+    output_buffers = [array for _, array in test_vectors['outputs']]
 
     rtps = []
     if test['test_vectors'].get('rtps') != None:
@@ -0,0 +1,166 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import copy
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# How test vectors are stored in kernel.json/npueval.jsonl:
+#   inline -- nested JSON lists, {"in_buffer": [...], "dtype": "int8"}
+#   npz    -- numpy sidecar, {"in_buffer": {"npz": "kernel.npz", "key": "inputs_0"}, "dtype": "int8"}
+#   blob   -- one raw binary file for the whole dataset, named in test_vectors["blob"],
+#             {"in_buffer": {"offset": 4096, "shape": [1024]}, "dtype": "int8"}
+# bfloat16 data is stored as its uint16 bit pattern.
+VECTOR_FORMATS = ("inline", "npz", "blob")
+BLOB_ALIGNMENT = 64
+DATASET_DIR = Path(__file__).parent.parent / "dataset"
+
+def vector_format(fmt: Optional[str] = None) -> str:
+    """Resolves the storage format, defaults to NPUEVAL_VECTORS or inline."""
+    fmt = fmt or os.environ.get("NPUEVAL_VECTORS", "inline")
+    if fmt not in VECTOR_FORMATS:
+        raise ValueError(f"Unsupported test vector format: {fmt}, choose one of {VECTOR_FORMATS}")
+    return fmt
+
+def numpy_dtype(name: str) -> np.dtype:
+    if name == "bfloat16":
+        from ml_dtypes import bfloat16
+        return np.dtype(bfloat16)
+    return np.dtype(name)
+
+def _storage_view(arr: np.ndarray) -> np.ndarray:
+    arr = np.require(arr, requirements='C') # unlike ascontiguousarray keeps 0-d arrays 0-d
+    if arr.dtype.name == "bfloat16":
+        return arr.view(np.uint16)
+    return arr
+
+def resolve_path(name: str, base_dir: Optional[str] = None) -> str:
+    """Locates a sidecar file: absolute paths are kept, relative ones are looked
+    up in base_dir, the packaged dataset directory and the working directory."""
+    if os.path.isabs(name):
+        return name
+    for root in (base_dir, DATASET_DIR, os.getcwd()):
+        if root is not None and os.path.isfile(os.path.join(root, name)):
+            return os.path.join(root, name)
+    raise FileNotFoundError(f"Test vector file {name} not found (base_dir={base_dir})")
+
+class BlobWriter:
+    """Appends arrays to a single binary file, each one aligned to
+    BLOB_ALIGNMENT bytes so it can be viewed straight out of a memory map."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self._file = open(path, 'wb')
+
+    def add(self, arr: np.ndarray) -> Dict[str, Any]:
+        data = _storage_view(arr)
+        padding = -self.offset % BLOB_ALIGNMENT
+        self._file.write(b"\0" * padding)
+        self.offset += padding
+        ref = {"offset": self.offset, "shape": list(arr.shape)}
+        self._file.write(data.tobytes())
+        self.offset += data.nbytes
+        return ref
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Open memory maps and npz archives by path, shared by all tests of a dataset
+_blobs = {}
+_npz = {}
+
+def blob_view(path: str, offset: int, shape: List[int], dtype: str) -> np.ndarray:
+    """Read-only zero-copy view of an array stored in a blob."""
+    path = os.path.abspath(path)
+    if path not in _blobs:
+        _blobs[path] = np.memmap(path, dtype=np.uint8, mode='r')
+    dt = numpy_dtype(dtype)
+    nbytes = int(np.prod(shape, dtype=np.int64)) * dt.itemsize
+    return _blobs[path][offset:offset + nbytes].view(dt).reshape(shape)
+
+def load_vector(value: Any, dtype: str, test_vectors: Dict[str, Any], base_dir: Optional[str] = None) -> np.ndarray:
+    """Array for one test vector entry in any of the storage formats."""
+    if not isinstance(value, dict):
+        return np.array(value, dtype=numpy_dtype(dtype))
+    if "npz" in value:
+        path = os.path.abspath(resolve_path(value['npz'], base_dir))
+        if path not in _npz:
+            _npz[path] = np.load(path)
+        return _npz[path][value['key']].view(numpy_dtype(dtype))
+    return blob_view(resolve_path(test_vectors['blob'], base_dir), value['offset'], value['shape'], dtype)
+
+def _entries(test_vectors: Dict[str, Any]):
+    for kind in ("inputs", "outputs"):
+        for i, entry in enumerate(test_vectors.get(kind, [])):
+            name = next(k for k in entry if k != "dtype")
+            yield kind, i, name, entry
+
+def is_inline(test: Dict[str, Any]) -> bool:
+    """True if all inputs/outputs of test are stored as JSON lists."""
+    tv = test['test_vectors']
+    return "blob" not in tv and not any(isinstance(entry[name], dict) for _, _, name, entry in _entries(tv))
+
+def resolve_vector_paths(test: Dict[str, Any], base_dir: str) -> Dict[str, Any]:
+    """Makes the sidecar references of test absolute, relative to base_dir, so
+    the record can be used from any working directory. Modifies test in place."""
+    tv = test['test_vectors']
+    if isinstance(tv.get('blob'), str):
+        tv['blob'] = os.path.join(base_dir, tv['blob'])
+    for _, _, name, entry in _entries(tv):
+        if isinstance(entry[name], dict) and "npz" in entry[name]:
+            entry[name]['npz'] = os.path.join(base_dir, entry[name]['npz'])
+    return test
+
+def load_test_vectors(test: Dict[str, Any], base_dir: Optional[str] = None) -> Dict[str, List[Tuple[str, np.ndarray]]]:
+    """{"inputs": [(name, array)], "outputs": [(name, array)]} of a test."""
+    tv = test['test_vectors']
+    arrays = {"inputs": [], "outputs": []}
+    for kind, _, name, entry in _entries(tv):
+        arrays[kind].append((name, load_vector(entry[name], entry['dtype'], tv, base_dir)))
+    return arrays
+
+def store_test_vectors(test: Dict[str, Any],
+                       arrays: Dict[str, List[Tuple[str, np.ndarray]]],
+                       fmt: str,
+                       npz_path: Optional[str] = None,
+                       npz_arrays: Optional[Dict[str, np.ndarray]] = None,
+                       blob: Optional[BlobWriter] = None,
+                       key_prefix: str = "") -> Dict[str, Any]:
+    """Copy of test with its inputs/outputs stored in format fmt.
+
+    For npz the arrays are added to npz_arrays (written by the caller with
+    write_npz) and referenced by the basename of npz_path, for blob they are
+    appended to the BlobWriter. RTPs stay inline.
+    """
+    test = copy.copy(test)
+    tv = {k: v for k, v in test['test_vectors'].items() if k != "blob"}
+    for kind in ("inputs", "outputs"):
+        entries = []
+        for i, (name, arr) in enumerate(arrays[kind]):
+            if fmt == "inline":
+                value = arr.tolist()
+            elif fmt == "npz":
+                key = f"{key_prefix}{kind}_{i}"
+                npz_arrays[key] = arr
+                value = {"npz": os.path.basename(npz_path), "key": key}
+            else:
+                value = blob.add(arr)
+            entries.append({name: value, "dtype": str(arr.dtype)})
+        tv[kind] = entries
+    if fmt == "blob":
+        tv['blob'] = os.path.basename(blob.path)
+    test['test_vectors'] = tv
+    return test
+
+def write_npz(path: str, arrays: Dict[str, np.ndarray]):
+    np.savez(path, **{key: _storage_view(arr) for key, arr in arrays.items()})
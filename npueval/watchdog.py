@@ -0,0 +1,132 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import pickle
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+# Deadlines for the stages of run_functional_test. A generated kernel that
+# never finishes (an infinite loop, a FIFO acquire that is never matched)
+# or a compiler that hangs shouldn't stall a whole sweep: the stage is
+# killed, the result is recorded as 'Timeout' and the next kernel runs.
+#
+# Seconds per stage, None disables the deadline, overridable with
+#   NPUEVAL_TIMEOUTS="compile=300,build=900,run=60"
+# The run has no deadline by default: enforcing one starts a worker
+# interpreter per kernel (see call_with_timeout), which costs more host
+# time than a typical run.
+DEFAULT_TIMEOUTS = {"compile": 300.0, "build": 900.0, "run": None}
+
+class StageTimeout(TimeoutError):
+    """A stage didn't finish within its deadline."""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"{stage} timed out after {timeout:g}s")
+        self.stage = stage
+        self.timeout = timeout
+
+def stage_timeouts(timeouts: Optional[Dict[str, Optional[float]]] = None) -> Dict[str, Optional[float]]:
+    """DEFAULT_TIMEOUTS updated with NPUEVAL_TIMEOUTS and then timeouts.
+    Values <= 0 disable the deadline of a stage."""
+    from .backends import parse_options
+    merged = parse_options(os.environ.get("NPUEVAL_TIMEOUTS"), DEFAULT_TIMEOUTS)
+    merged.update(timeouts or {})
+    return {stage: (seconds if seconds and seconds > 0 else None) for stage, seconds in merged.items()}
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left until a time.monotonic() deadline, None for no deadline."""
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+def _kill_group(pid: int):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def run_with_timeout(command: List[str],
+                     timeout: Optional[float],
+                     stage: str,
+                     check: bool = False,
+                     **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run that kills the whole process tree on timeout.
+
+    The command runs in a new session, so compilers that spawn their own
+    subprocesses (aiecc.py, clang drivers) are killed with it.
+
+    Raises
+    ------
+    StageTimeout
+        If the command didn't finish within timeout seconds.
+    subprocess.CalledProcessError
+        If check is True and the command failed.
+    """
+    with subprocess.Popen(command, start_new_session=True, **kwargs) as proc:
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_group(proc.pid)
+            proc.communicate()
+            raise StageTimeout(stage, timeout)
+        except BaseException:
+            _kill_group(proc.pid)
+            raise
+    if check and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, command, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(command, proc.returncode, stdout, stderr)
+
+def _worker_main(task_path: str, result_path: str):
+    """Entry point of the call_with_timeout worker process."""
+    with open(task_path, "rb") as f:
+        fn, args, kwargs = pickle.load(f)
+    try:
+        result = (True, fn(*args, **kwargs))
+    except BaseException as e:
+        result = (False, f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+    with open(result_path + ".tmp", "wb") as f:
+        pickle.dump(result, f)
+    os.replace(result_path + ".tmp", result_path)
+
+def call_with_timeout(fn: Callable, timeout: Optional[float], stage: str, *args, **kwargs) -> Any:
+    """Calls fn(*args, **kwargs), in a worker process if there is a timeout.
+
+    The NPU run blocks in the driver and can't be interrupted from Python.
+    Killing the worker instead releases its hardware context. The worker is
+    a fresh interpreter, not a fork: the pipeline and the generation engine
+    evaluate from threads, and a fork taken while another thread holds a
+    lock (XRT, logging, the import lock) can deadlock the child, which would
+    then be reported as a kernel timeout. fn, its arguments and the result
+    are pickled, so fn has to be importable (a bound method of an executor
+    is). Exceptions in the worker are raised again as RuntimeError with the
+    worker's traceback.
+    """
+    if timeout is None:
+        return fn(*args, **kwargs)
+
+    with tempfile.TemporaryDirectory(prefix=f"npueval_{stage}_") as tmp:
+        task_path = os.path.join(tmp, "task.pkl")
+        result_path = os.path.join(tmp, "result.pkl")
+        with open(task_path, "wb") as f:
+            pickle.dump((fn, args, kwargs), f)
+
+        # The worker has to find npueval even if it isn't installed
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (package_root, env.get("PYTHONPATH")) if p)
+        command = [sys.executable, "-c",
+                   "import sys; from npueval.watchdog import _worker_main; _worker_main(*sys.argv[1:])",
+                   task_path, result_path]
+        process = run_with_timeout(command, timeout, stage, env=env)
+
+        if not os.path.isfile(result_path):
+            raise RuntimeError(f"{stage} process exited with code {process.returncode}")
+        with open(result_path, "rb") as f:
+            ok, value = pickle.load(f)
+    if not ok:
+        raise RuntimeError(value)
+    return value
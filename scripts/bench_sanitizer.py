@@ -0,0 +1,174 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import json
+import multiprocessing
+import random
+import re
+import sys
+import time
+
+from npueval.sanitizer import functions, parse_units, required_signature, sanitize
+
+# Fuzz and performance check of npueval.sanitizer.
+#
+# * fuzz: the canonical solutions of the dataset are mutated (random brackets,
+#   quotes, comment markers, preprocessor lines, pasted main()/wrapper/extern
+#   "C" blocks), sanitize must never raise, never grow the code and, when the
+#   mutation left the kernel intact, keep it and remove every main().
+# * perf: sanitize on multi-megabyte inputs, both realistic (many functions)
+#   and adversarial (unclosed braces, braces without a ;, comments and strings,
+#   deep nesting).
+#   The time per MB has to stay flat as the size doubles. The regex that
+#   get_kernel_code used before is timed on the same inputs, in a subprocess
+#   since it can backtrack for minutes.
+#
+# usage: python scripts/bench_sanitizer.py [--iterations 2000] [--max-mb 8]
+
+OLD_MAIN_RE = r'int\s+main\s*\([^)]*\)\s*{[^{}]*({[^{}]*}[^{}]*)*}'
+
+NOISE = ["{", "}", "(", ")", "[", "]", ";", '"', "'", "/*", "*/", "//", "\n#if 0\n", "\n#else\n", "\n#endif\n",
+         "\\\n", 'R"x(', ')x"', "extern \"C\" {", "int main() {", "::", "<", ">"]
+
+def pasted(test):
+    wrapper = test['kernel_name'] + "_wrapper"
+    return random.choice([
+        "\nint main(int argc, char **argv) {\n  int x[4] = {0};\n  if (argc) { return 1; }\n  return 0;\n}\n",
+        f"\nextern \"C\" {{\nvoid {wrapper}() {{ }}\n}}\n",
+        "\nextern \"C\" {\n}\n",
+        "\n// extern \"C\" {\n//   void f();\n// }\n",
+        "\nnamespace helpers { inline int sq(int v) { return v * v; } }\n",
+    ])
+
+def fuzz(tests, iterations, seed):
+    random.seed(seed)
+    failures = 0
+    for it in range(iterations):
+        test = random.choice(tests)
+        sig = required_signature(test['prompt'])
+        code = test['prompt'][:-2] + test['canonical_solution']
+        intact = random.random() < 0.5
+        if intact:
+            # Only paste whole blocks around the kernel
+            mutated = pasted(test) + code + pasted(test)
+        else:
+            chars = list(code)
+            for _ in range(random.randint(1, 8)):
+                chars.insert(random.randrange(len(chars) + 1), random.choice(NOISE))
+            mutated = "".join(chars)
+        try:
+            result = sanitize(mutated, sig, test['kernel_name'] + "_wrapper")
+        except Exception as e:
+            failures += 1
+            print(f"iteration {it}: {test['kernel_name']} raised {e!r}")
+            continue
+        problems = []
+        if len(result['code'].strip()) > len(mutated.strip()):
+            problems.append("code grew")
+        if intact:
+            names = [f['name'] for f in functions(parse_units(result['code']))]
+            if result['errors'] or names.count(sig[0]) != 1:
+                problems.append(f"kernel lost: {result['errors']}")
+            if "main" in names or test['kernel_name'] + "_wrapper" in names:
+                problems.append("main/wrapper kept")
+        if problems:
+            failures += 1
+            if failures <= 5:
+                print(f"iteration {it}: {test['kernel_name']} {', '.join(problems)}")
+    return failures
+
+def realistic(test, size):
+    """Many helper functions, comments and pasted blocks around the kernel."""
+    code = test['prompt'][:-2] + test['canonical_solution']
+    parts, total, i = [], 0, 0
+    while total < size:
+        part = (f"// helper {i}\nstatic inline int helper_{i}(int a, int b) {{\n"
+                f"  /* {'x' * 40} */\n  if (a > b) {{ return a; }}\n  const char *s = \"{{}}\";\n  return b;\n}}\n")
+        if i % 50 == 0:
+            part += pasted(test)
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return "".join(parts) + code
+
+def adversarial(kind, size):
+    if kind == "unclosed_main":
+        return ("int main() { " + "{ a; " * 8) * (size // 50)
+    if kind == "unclosed_params":
+        # Worst case for the old regex, every main( scans to the end for the )
+        return "int main(" * (size // 9)
+    if kind == "unterminated_braces":
+        # Braced initializers without a ;, each one ends the declaration
+        return "int a " + "{} " * (size // 3)
+    if kind == "nested":
+        depth = size // 4
+        return "void f() " + "{ " * depth + "} " * depth
+    if kind == "unterminated_comment":
+        return "void f() { /* " + "x" * size
+    if kind == "strings":
+        return "void f() { " + '"\\"{", ' * (size // 8) + "}"
+    raise ValueError(kind)
+
+def time_sanitize(code, sig):
+    start = time.perf_counter()
+    sanitize(code, sig)
+    return time.perf_counter() - start
+
+def _old_regex(code, queue):
+    start = time.perf_counter()
+    re.sub(OLD_MAIN_RE, '', code, flags=re.DOTALL)
+    queue.put(time.perf_counter() - start)
+
+def time_old_regex(code, timeout):
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_old_regex, args=(code, queue))
+    proc.start()
+    proc.join(timeout)
+    if proc.is_alive():
+        proc.terminate()
+        proc.join()
+        return None
+    return queue.get()
+
+def perf(tests, max_mb, regex_timeout):
+    test = next((t for t in tests if t['kernel_name'] == "relu_int8"), tests[0])
+    sig = required_signature(test['prompt'])
+    sizes = []
+    mb = 0.5
+    while mb <= max_mb:
+        sizes.append(int(mb * 2**20))
+        mb *= 2
+    failures = 0
+    print(f"{'input':22s} {'MB':>6s} {'sanitize':>10s} {'s/MB':>7s} {'old regex':>10s}")
+    for kind in ("realistic", "unclosed_main", "unclosed_params", "unterminated_braces", "nested", "unterminated_comment", "strings"):
+        per_mb = []
+        for size in sizes:
+            code = realistic(test, size) if kind == "realistic" else adversarial(kind, size)
+            elapsed = time_sanitize(code, sig)
+            old = time_old_regex(code, regex_timeout) if size == sizes[0] else None
+            per_mb.append(elapsed / (len(code) / 2**20))
+            old_text = "" if size != sizes[0] else ("> %ds" % regex_timeout if old is None else f"{old:.3f}s")
+            print(f"{kind:22s} {len(code) / 2**20:6.1f} {elapsed:9.3f}s {per_mb[-1]:7.3f} {old_text:>10s}")
+        # Linear: the time per MB of the largest input within 2x of the smallest
+        if per_mb[-1] > 2 * per_mb[0] + 0.05:
+            failures += 1
+            print(f"  {kind} doesn't scale linearly")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzz and benchmark the C++ source sanitizer")
+    parser.add_argument("--dataset", default="dataset/npueval.jsonl")
+    parser.add_argument("--iterations", type=int, default=2000, help="fuzz iterations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-mb", type=float, default=8, help="largest perf input")
+    parser.add_argument("--regex-timeout", type=float, default=10, help="seconds before giving up on the old regex")
+    args = parser.parse_args()
+
+    with open(args.dataset, 'r') as f:
+        tests = [json.loads(line) for line in f]
+
+    failures = fuzz(tests, args.iterations, args.seed)
+    print(f"Fuzz: {args.iterations - failures}/{args.iterations} ok\n")
+    failures += perf(tests, args.max_mb, args.regex_timeout)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,46 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+import json
+import statistics
+
+from npueval import aie_compiler
+
+# Compile time per kernel for the canonical solutions, with and without the
+# precompiled aie_api header cache. The first PCH compile also builds the cache,
+# so it is reported separately.
+
+with open("dataset/npueval.jsonl", 'r') as f:
+    tests = [json.loads(line) for line in f]
+
+output_dir = "results/benchmark_compile"
+dev = os.environ.get('NPU', 'npu1')
+
+def time_compile(src, kernel_name, use_pch):
+    start = time.perf_counter()
+    result = aie_compiler(src, kernel_name=kernel_name, output_dir=output_dir, dev=dev, use_pch=use_pch)
+    elapsed = time.perf_counter() - start
+    if result.split('\n')[0] != 'Compilation successful.':
+        print(f"{kernel_name} failed to compile:\n{result}")
+    return elapsed
+
+# Warm up: builds the PCH and primes the filesystem cache for the headers
+first = tests[0]
+warm_src = first['prompt'][:-2] + first['canonical_solution'] + first['program_code']
+print(f"PCH build + first compile: {time_compile(warm_src, first['kernel_name'], True):.3f}s")
+time_compile(warm_src, first['kernel_name'], False)
+
+timings = {'baseline': [], 'pch': []}
+for test in tests:
+    src = test['prompt'][:-2] + test['canonical_solution'] + test['program_code']
+    baseline = time_compile(src, test['kernel_name'], False)
+    pch = time_compile(src, test['kernel_name'], True)
+    timings['baseline'].append(baseline)
+    timings['pch'].append(pch)
+    print(f"{test['kernel_name']:40s} baseline {baseline:.3f}s  pch {pch:.3f}s")
+
+for mode, values in timings.items():
+    print(f"{mode:8s} mean {statistics.mean(values):.3f}s  median {statistics.median(values):.3f}s  total {sum(values):.1f}s")
+print(f"Speedup: {sum(timings['baseline'])/sum(timings['pch']):.2f}x")
@@ -0,0 +1,148 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from npueval import run_functional_tests
+from npueval.backends import SimulatedBackend, parse_options, set_backend
+from npueval.profiling import StageTimer, directory_usage, peak_rss_mb
+
+# Host overhead of run_functional_tests: the whole dataset goes through the
+# pipeline with the simulated backend, so the toolchain and the NPU take a
+# fixed, known time (--latency, none by default) and everything else is the
+# harness: result json dumps, extract_buffers, MLIR construction, device info,
+# trace round trips. Reports the time per stage, the peak RSS of the harness
+# and of its child processes (the NPU run workers) and the files written per
+# kernel.
+#
+# The simulated backend also stands in for MLIR construction and the xrt-smi
+# device report. With --real-host those two use the real build_app and
+# xrt-smi, so the mlir and device_info stages measure them. This needs
+# mlir-aie and XRT, compile, build and run stay simulated.
+#
+# With --update-baseline the numbers are stored. Later runs fail if the
+# overhead per kernel, a stage, the peak RSS or the files per kernel
+# regress by more than --threshold against it. Baselines depend on the
+# machine, so keep them local. Don't commit them.
+#
+# usage: python scripts/benchmark_harness.py [--real-host] [--update-baseline] [--threshold 0.25]
+
+parser = argparse.ArgumentParser(description="Benchmark the host overhead of the evaluation harness")
+parser.add_argument("--dataset", default="dataset/npueval.jsonl")
+parser.add_argument("--solutions", default=None, help="solutions directory, defaults to the canonical solutions")
+parser.add_argument("--limit", type=int, default=None, help="only the first N kernels")
+parser.add_argument("--latency", default="", help="stubbed stage latencies, e.g. compile=1,build=3,run=0.1")
+parser.add_argument("--assembly", action="store_true", help="also generate and parse assembly")
+parser.add_argument("--real-host", action="store_true",
+                    help="real build_app and xrt-smi device info, needs mlir-aie and XRT")
+parser.add_argument("--results", default=None, help="keep the evaluation results here instead of a temp dir")
+parser.add_argument("--baseline", default="results/benchmark_harness_baseline.json")
+parser.add_argument("--update-baseline", action="store_true")
+parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+parser.add_argument("--min-ms", type=float, default=0.5,
+                    help="regressions smaller than this many ms per kernel are ignored as noise")
+parser.add_argument("--json", default=None, help="also write the report to this file")
+parser.add_argument("--verbose", action="store_true", help="show the harness output")
+args = parser.parse_args()
+
+with open(args.dataset, 'r') as f:
+    tests = [json.loads(line) for line in f][:args.limit]
+
+latencies = parse_options(args.latency, {"compile": 0.0, "build": 0.0, "run": 0.0})
+set_backend(SimulatedBackend(latencies=latencies, real_host=args.real_host))
+
+results_path = args.results or tempfile.mkdtemp(prefix="npueval_harness_")
+timer = StageTimer()
+start = time.perf_counter()
+with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, 'w')):
+    run_functional_tests(tests, solutions=args.solutions, results_path=results_path, overwrite=True,
+                         generate_assembly=args.assembly, timer=timer)
+wall = time.perf_counter() - start
+
+kernels = len(tests)
+usage = directory_usage(results_path)
+if not args.results:
+    shutil.rmtree(results_path, ignore_errors=True)
+
+# Stubbed time is not overhead
+stages = timer.summary(kernels)
+for name, stage in stages.items():
+    stage['overhead_ms_per_kernel'] = 1e3 * (stage['total'] - latencies.get(name, 0.0) * stage['calls']) / kernels
+stubbed = sum(latencies.get(name, 0.0) * stage['calls'] for name, stage in stages.items())
+
+report = {
+    "kernels": kernels,
+    "latencies": latencies,
+    "assembly": args.assembly,
+    "real_host": args.real_host,
+    "wall": wall,
+    "overhead_ms_per_kernel": 1e3 * (wall - stubbed) / kernels,
+    "peak_rss_mb": peak_rss_mb(),
+    "peak_rss_children_mb": peak_rss_mb(children=True),
+    "files_per_kernel": usage['files'] / kernels,
+    "bytes_per_kernel": usage['bytes'] / kernels,
+    "stages": stages,
+}
+
+print(f"{'stage':12s} {'calls':>6s} {'total s':>8s} {'ms/kernel':>10s} {'overhead':>9s}")
+for name, stage in stages.items():
+    print(f"{name:12s} {stage['calls']:6d} {stage['total']:8.3f} {stage['ms_per_kernel']:10.2f} "
+          f"{stage['overhead_ms_per_kernel']:9.2f}")
+print(f"\n{kernels} kernels in {wall:.2f}s, host overhead {report['overhead_ms_per_kernel']:.2f}ms/kernel")
+print(f"Peak RSS {report['peak_rss_mb']:.1f}MB (child processes {report['peak_rss_children_mb']:.1f}MB), "
+      f"{report['files_per_kernel']:.1f} files "
+      f"and {report['bytes_per_kernel'] / 1024:.1f}KB written per kernel")
+
+if args.json:
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=2)
+
+if args.update_baseline:
+    os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+    with open(args.baseline, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Baseline written to {args.baseline}")
+    sys.exit(0)
+
+if not os.path.isfile(args.baseline):
+    print(f"No baseline at {args.baseline}, run with --update-baseline to create one")
+    sys.exit(0)
+
+with open(args.baseline, 'r') as f:
+    baseline = json.load(f)
+config = ("kernels", "latencies", "assembly", "real_host")
+if any(baseline.get(key) != report[key] for key in config):
+    print(f"Baseline was recorded with different settings ({', '.join(config)}), not comparing")
+    sys.exit(0)
+
+def regressed(current, previous, absolute=0.0):
+    return current > previous * (1 + args.threshold) + absolute
+
+regressions = []
+if regressed(report['overhead_ms_per_kernel'], baseline['overhead_ms_per_kernel'], args.min_ms):
+    regressions.append(f"overhead {baseline['overhead_ms_per_kernel']:.2f} -> {report['overhead_ms_per_kernel']:.2f}ms/kernel")
+for name, stage in stages.items():
+    previous = baseline['stages'].get(name)
+    if previous and regressed(stage['overhead_ms_per_kernel'], previous['overhead_ms_per_kernel'], args.min_ms):
+        regressions.append(f"{name} {previous['overhead_ms_per_kernel']:.2f} -> {stage['overhead_ms_per_kernel']:.2f}ms/kernel")
+if regressed(report['peak_rss_mb'], baseline['peak_rss_mb']):
+    regressions.append(f"peak RSS {baseline['peak_rss_mb']:.1f} -> {report['peak_rss_mb']:.1f}MB")
+if regressed(report['peak_rss_children_mb'], baseline['peak_rss_children_mb']):
+    regressions.append(f"child peak RSS {baseline['peak_rss_children_mb']:.1f} -> "
+                       f"{report['peak_rss_children_mb']:.1f}MB")
+if report['files_per_kernel'] > baseline['files_per_kernel']:
+    regressions.append(f"files per kernel {baseline['files_per_kernel']:.1f} -> {report['files_per_kernel']:.1f}")
+
+if regressions:
+    print(f"\nRegressions beyond {args.threshold:.0%} of {args.baseline}:")
+    for regression in regressions:
+        print(f"  {regression}")
+    sys.exit(1)
+print(f"\nWithin {args.threshold:.0%} of {args.baseline}")
@@ -0,0 +1,56 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import sys
+import time
+import json
+import statistics
+
+from npueval import aie_compiler, aie_syntax_check
+from npueval.sanitizer import SanitizerError
+from npueval.utils import get_kernel_code
+
+# Latency of the -fsyntax-only screening tier vs a full compile, over a set of
+# generated solutions. For every candidate the screen rejects, the saving is the
+# full compile time minus the screening time.
+#
+# usage: python scripts/benchmark_syntax_check.py results/solutions/gpt-4o-mini_attempts_1
+
+solutions = sys.argv[1] if len(sys.argv) > 1 else "results/solutions/gpt-4o-mini_attempts_1"
+dev = os.environ.get('NPU', 'npu1')
+
+with open("dataset/npueval.jsonl", 'r') as f:
+    tests = [json.loads(line) for line in f]
+
+rejected, accepted = [], []
+for test in tests:
+    if not os.path.isfile(os.path.join(solutions, f"{test['kernel_name']}.json")):
+        continue
+    try:
+        code = get_kernel_code(test, solutions)
+    except SanitizerError as e:
+        print(f"{test['kernel_name']:40s} skipped: {e}")
+        continue
+    if not code:
+        continue
+    src = code + test['program_code']
+
+    check = aie_syntax_check(src, kernel_name=test['kernel_name'], dev=dev)
+
+    start = time.perf_counter()
+    aie_compiler(src, kernel_name=test['kernel_name'], output_dir=None, dev=dev)
+    full = time.perf_counter() - start
+
+    row = (test['kernel_name'], check['elapsed'], full)
+    (accepted if check['success'] else rejected).append(row)
+    status = "pass" if check['success'] else f"reject ({len(check['diagnostics'])} diagnostics)"
+    print(f"{test['kernel_name']:40s} syntax {check['elapsed']:.3f}s  full {full:.3f}s  {status}")
+
+print(f"\nCandidates: {len(rejected) + len(accepted)}, rejected by screen: {len(rejected)}")
+if rejected:
+    saved = [full - syntax for _, syntax, full in rejected]
+    print(f"Saved per rejected candidate: mean {statistics.mean(saved):.3f}s, median {statistics.median(saved):.3f}s")
+if accepted:
+    overhead = [syntax for _, syntax, _ in accepted]
+    print(f"Screen overhead per accepted candidate: mean {statistics.mean(overhead):.3f}s")
@@ -0,0 +1,51 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import sys
+
+from npueval.diagnostics import summarize_diagnostics
+
+# Checks where summarize_diagnostics reports an error on logs shaped like
+# clang's. An error in the kernel source stays at its own location even when
+# a note points at another line of the source. An error inside a header moves
+# to the innermost kernel source location of its note chain. A log prefixed
+# with a caller's own message keeps its first error.
+#
+# usage: python scripts/check_diagnostics.py
+
+SOURCE = "\n".join(f"line{i}" for i in range(1, 13))
+
+CASES = [
+    {
+        "name": "error in the source with a note in the source",
+        "log": ("kernel.cc:10:5: error: no matching function for call to 'scale'\n"
+                "kernel.cc:3:6: note: candidate function not viable: requires 2 arguments, but 3 were provided\n"),
+        "primary": "error: no matching function for call to 'scale' (kernel.cc:10:5)\n    10 | line10\n",
+        "note": "  note: candidate function not viable: requires 2 arguments, but 3 were provided (kernel.cc:3:6)",
+    },
+    {
+        "name": "error in a header instantiated from the source",
+        "log": ("/opt/aie_api/detail/add.hpp:120:12: error: static assertion failed: unsupported type\n"
+                "/opt/aie_api/aie.hpp:400:9: note: in instantiation of function template specialization requested here\n"
+                "kernel.cc:7:14: note: in instantiation of function template specialization requested here\n"),
+        "primary": "error: static assertion failed: unsupported type (kernel.cc:7:14)\n    7 | line7\n",
+        "note": "  at: static assertion failed: unsupported type (add.hpp:120:12)",
+    },
+    {
+        "name": "log prefixed with a message",
+        "log": ("Kernel compilation failed: kernel.cc:4:3: error: use of undeclared identifier 'v'\n"
+                "kernel.cc:9:1: error: expected ';' after expression\n"),
+        "primary": "error: use of undeclared identifier 'v' (kernel.cc:4:3)\n    4 | line4\n",
+        "note": "2 distinct errors",
+    },
+]
+
+failures = 0
+for case in CASES:
+    report = summarize_diagnostics(case['log'], source=SOURCE, source_file="kernel.cc")
+    if not report.startswith(case['primary']) or case['note'] not in report:
+        failures += 1
+        print(f"FAIL: {case['name']}\n{report}")
+    else:
+        print(f"ok: {case['name']}")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,110 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from npueval import aie_compiler
+from npueval.iron import build_app
+from npueval.tools import build_single_kernel_app, graph_signature
+from npueval.utils import extract_buffers
+
+# Checks that a graph cache hit doesn't reuse the core of another kernel.
+# Two different kernel objects are built against the same MLIR design, the
+# first populates the graph cache and the second hits it. The linked core
+# ELFs and the xclbins must differ, and must match an uncached build of the
+# second kernel. Also prints the build time of the hit against the uncached
+# build, the gain of skipping the NPU instruction pass. Needs the
+# peano/aiecc toolchain, not the NPU.
+#
+# usage: python scripts/check_graph_cache.py [--kernel abs_int8]
+
+parser = argparse.ArgumentParser(description="Check that graph cache hits relink the new kernel object")
+parser.add_argument("--dataset", default="dataset/npueval.jsonl")
+parser.add_argument("--kernel", default="abs_int8")
+parser.add_argument("--keep", action="store_true", help="keep the build directories")
+args = parser.parse_args()
+
+with open(args.dataset, 'r') as f:
+    test = next(t for t in map(json.loads, f) if t['kernel_name'] == args.kernel)
+dev = os.environ.get('NPU', 'npu1')
+kernel_name = test['kernel_name']
+
+def sha(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def core_elfs(workdir):
+    return {os.path.basename(path): sha(path)
+            for path in glob.glob(os.path.join(workdir, "**", "*.elf"), recursive=True)}
+
+root = tempfile.mkdtemp(prefix="npueval_graph_cache_")
+graph_cache = os.path.join(root, "graphs")
+
+in_buffers, out_buffers, rtps = extract_buffers(test)
+mlir, _ = build_app(kernel_name, in_buffers, out_buffers[0], rtps,
+                    tile_size=max(b.size for b in in_buffers), dev=dev)
+mlir_file = os.path.join(root, f"{kernel_name}.mlir")
+with open(mlir_file, "w") as f:
+    f.write(mlir)
+
+# The canonical solution and the empty kernel of the prompt, different
+# objects for the same design
+sources = {
+    "first": test['prompt'][:-2] + test['canonical_solution'] + test['program_code'],
+    "second": test['prompt'] + test['program_code'],
+}
+
+builds = {}
+for name, cache in (("first", graph_cache), ("second", graph_cache), ("uncached", None)):
+    source = sources["first" if name == "first" else "second"]
+    out_dir = os.path.join(root, name)
+    result = aie_compiler(source, kernel_name=kernel_name, output_dir=out_dir, dev=dev)
+    if result.split('\n')[0] != 'Compilation successful.':
+        print(f"{name}: compile failed\n{result}")
+        sys.exit(1)
+    workdir = os.path.join(out_dir, "work")
+    start = time.perf_counter()
+    build_single_kernel_app(mlir_file, os.path.join(out_dir, f"{kernel_name}.o"), xclbin_name=kernel_name,
+                            output_dir=out_dir, workdir=workdir, graph_cache=cache)
+    builds[name] = {"seconds": time.perf_counter() - start,
+                    "object": sha(os.path.join(out_dir, f"{kernel_name}.o")),
+                    "xclbin": sha(os.path.join(out_dir, f"{kernel_name}.xclbin")),
+                    "elfs": core_elfs(workdir)}
+    print(f"{name:9s} {builds[name]['seconds']:6.2f}s object {builds[name]['object'][:12]} "
+          f"xclbin {builds[name]['xclbin'][:12]} "
+          f"elfs {sorted(builds[name]['elfs'])}")
+
+failures = []
+if not os.path.isdir(os.path.join(graph_cache, graph_signature(mlir_file))):
+    failures.append("the first build didn't populate the graph cache")
+if builds["first"]["object"] == builds["second"]["object"]:
+    failures.append("the two kernel objects are identical, the check proves nothing")
+if not builds["second"]["elfs"]:
+    failures.append("no core ELF in the cache hit build")
+elif builds["first"]["elfs"] == builds["second"]["elfs"]:
+    failures.append("the cache hit packaged the core ELF of the first kernel")
+if builds["first"]["xclbin"] == builds["second"]["xclbin"]:
+    failures.append("the cache hit produced the xclbin of the first kernel")
+if builds["second"]["elfs"] != builds["uncached"]["elfs"]:
+    failures.append("the cache hit core ELF differs from an uncached build")
+
+saved = builds["uncached"]["seconds"] - builds["second"]["seconds"]
+print(f"Cache hit build {builds['second']['seconds']:.2f}s, uncached {builds['uncached']['seconds']:.2f}s, "
+      f"saved {saved:.2f}s ({saved / builds['uncached']['seconds']:.0%})")
+
+if not args.keep:
+    shutil.rmtree(root, ignore_errors=True)
+
+for failure in failures:
+    print(f"FAIL: {failure}")
+if failures:
+    sys.exit(1)
+print("Graph cache hits relink the new kernel object")
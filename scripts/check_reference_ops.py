@@ -0,0 +1,159 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from ml_dtypes import bfloat16
+
+from npueval import reference as ref
+from npueval.backends import load_behavioral
+
+# Equivalence check of npueval.reference against the loop based behavioral()
+# functions of dataset/kernels/*/generate.py. Every case runs on the dataset
+# shapes and on randomized shapes/strides, integer results must match
+# exactly, bfloat16 results within max_ulp units in the last place (cases
+# where the loop sums in a different order than the vectorized op). With
+# --bench the loop and vectorized versions are also timed on large inputs.
+#
+# usage: python scripts/check_reference_ops.py [--bench] [--seeds 5]
+
+def bf16(rng, *shape, scale=1.0):
+    return (rng.standard_normal(shape) * scale).astype(bfloat16)
+
+def ints(rng, low, high, *shape, dtype=np.int32):
+    return rng.integers(low, high, size=shape, dtype=dtype)
+
+# kernel -> (inputs(rng, n), reference(*inputs), max_ulp). n scales the input
+# size, the dataset size is n=1, inputs return the arguments of behavioral()
+CASES = {
+    "conv1d_int32": (lambda rng, n: (ints(rng, -10, 10, 256 * n), ints(rng, -10, 10, 3), int(rng.integers(1, 4))),
+                     lambda x, k, s: ref.conv1d(x, k, s), 0),
+    "conv1d_bfloat16": (lambda rng, n: (bf16(rng, 256 * n), bf16(rng, 2), int(rng.integers(1, 4))),
+                        lambda x, k, s: ref.conv1d(x, k, s), 0),
+    "conv1d_bias_relu_bfloat16": (lambda rng, n: (bf16(rng, 256 * n), bf16(rng, 3), bfloat16(rng.standard_normal() + 1), 2),
+                                  lambda x, k, b, s: ref.conv1d(x, k, s, bias=b, relu=True, accumulate="bfloat16"), 0),
+    "conv1d_k2_s1_bias_relu_bfloat16": (lambda rng, n: (bf16(rng, 256 * n, scale=2), bf16(rng, 2), bfloat16(rng.standard_normal())),
+                                        lambda x, k, b: ref.conv1d(x, k, 1, bias=b, relu=True, accumulate="float32"), 1),
+    "conv1d_k2_s2_bias_int16": (lambda rng, n: (ints(rng, -100, 100, 128 * n, dtype=np.int16), ints(rng, -100, 100, 2, dtype=np.int16),
+                                                np.int16(rng.integers(-100, 100))),
+                                lambda x, k, b: ref.conv1d(x, k, 2, bias=b), 0),
+    "conv1d_k4_s1_bias_relu_bfloat16": (lambda rng, n: (bf16(rng, 256 * n), bf16(rng, 4), bfloat16(rng.standard_normal() + 1)),
+                                        lambda x, k, b: ref.conv1d(x, k, 1, bias=b, relu=True), 0),
+    "conv2d_int32": (lambda rng, n: (ints(rng, -10, 10, 16 * n, 16 * n), ints(rng, -10, 10, 3, 3), int(rng.integers(1, 3))),
+                     lambda x, k, s: ref.conv2d(x, k, s), 0),
+    "conv2d_bfloat16": (lambda rng, n: (bf16(rng, 16 * n, 16 * n, scale=2), bf16(rng, 2, 2), int(rng.integers(1, 3))),
+                        lambda x, k, s: ref.conv2d(x, k, s, accumulate="float32"), 1),
+    "conv2d_k2_s1_bias_relu_bfloat16": (lambda rng, n: (bf16(rng, 16 * n, 16 * n), bf16(rng, 2, 2), bfloat16(rng.standard_normal())),
+                                        lambda x, k, b: ref.conv2d(x, k, 1, bias=b, relu=True), 1),
+    "conv2d_k4_s2_bias_relu_bfloat16": (lambda rng, n: (bf16(rng, 16 * n, 16 * n), bf16(rng, 4, 4), bfloat16(rng.standard_normal() + 1), 2),
+                                        lambda x, k, b, s: ref.conv2d(x, k, s, bias=b, relu=True, accumulate="float32"), 1),
+    "avgpool1d_bfloat16": (lambda rng, n: (bf16(rng, 1024 * n, scale=2), 2, 2),
+                           lambda x, w, s: ref.avgpool1d(x, w, s), 0),
+    "avgpool1d_relu_bfloat16": (lambda rng, n: (bf16(rng, 256 * n, scale=3),),
+                                lambda x: ref.avgpool1d(x, 4, relu=True), 0),
+    "avgpool2d_bfloat16": (lambda rng, n: (bf16(rng, 32 * n, 32 * n, scale=2),),
+                           lambda x: ref.avgpool2d(x, 2, accumulate="bfloat16"), 0),
+    "avgpool2d_relu_bfloat16": (lambda rng, n: (bf16(rng, 32 * n, 32 * n, scale=4),),
+                                lambda x: ref.avgpool2d(x, 2, relu=True), 0),
+    "maxpool1d_uint8": (lambda rng, n: (ints(rng, 0, 255, 1024 * n, dtype=np.uint8), 2, 2),
+                        lambda x, w, s: ref.maxpool1d(x, w, s), 0),
+    "maxpool2d_bfloat16": (lambda rng, n: (bf16(rng, 32 * n, 32 * n, scale=2),),
+                           lambda x: ref.maxpool2d(x, 2), 0),
+    "maxpool2d_relu_bfloat16": (lambda rng, n: (bf16(rng, 32 * n, 32 * n, scale=3),),
+                                lambda x: ref.maxpool2d(x, 2, relu=True), 0),
+    "maxpool2d_relu_int8": (lambda rng, n: (ints(rng, -128, 128, 16 * n, 16 * n, dtype=np.int8),),
+                            lambda x: ref.maxpool2d(x, 2, relu=True), 0),
+    "dotproduct_int32": (lambda rng, n: (ints(rng, -10, 10, 256 * n), ints(rng, -10, 10, 256 * n)),
+                         lambda a, b: ref.dot(a, b), 0),
+    "dotproduct_bias_relu_int8": (lambda rng, n: (ints(rng, -20, 20, 256 * n, dtype=np.int8), ints(rng, -20, 20, 256 * n, dtype=np.int8),
+                                                  np.int8(rng.integers(-10, 10))),
+                                  lambda a, b, bias: ref.dot(a, b, bias=bias, relu=True), 0),
+    "vectormatrix_mult_int32": (lambda rng, n: (ints(rng, -10, 10, 16), ints(rng, -10, 10, 256)),
+                                lambda v, m: ref.vecmat(v, m), 0),
+    "reduce_add_relu_int8": (lambda rng, n: (ints(rng, -40, 40, 128 * n, dtype=np.int8),),
+                             lambda x: ref.reduce_sum(x, relu=True), 0),
+    "reducemin_bfloat16": (lambda rng, n: (bf16(rng, 64 * n),),
+                           lambda x: ref.reduce_min(x), 0),
+    "argmax_bfloat16": (lambda rng, n: (bf16(rng, 64 * n),), lambda x: ref.argmax(x), 0),
+    "argmax_int32": (lambda rng, n: (ints(rng, -32768, 32768, 256 * n),), lambda x: ref.argmax(x), 0),
+    "argmin_bfloat16": (lambda rng, n: (bf16(rng, 256 * n),), lambda x: ref.argmin(x), 0),
+    "cast_bfloat16_to_int8": (lambda rng, n: (bf16(rng, 256 * n, scale=70),),
+                              lambda x: ref.cast(x, np.int8), 0),
+    "cast_bfloat16_to_float32": (lambda rng, n: (bf16(rng, 512 * n),), lambda x: ref.cast(x, np.float32), 0),
+    "cast_float32_to_bfloat16": (lambda rng, n: ((rng.standard_normal(256 * n) * 5).astype(np.float32),),
+                                 lambda x: ref.cast(x, "bfloat16"), 0),
+    "cast_int8_to_int32": (lambda rng, n: (ints(rng, -128, 128, 256 * n, dtype=np.int8),),
+                           lambda x: ref.cast(x, np.int32), 0),
+    "relu_bfloat16_cast_uint8": (lambda rng, n: (bf16(rng, 256 * n, scale=128),),
+                                 lambda x: ref.cast(ref.relu(x), np.uint8), 0),
+}
+
+def ulp_distance(a, b):
+    """Distance in representable values between two bfloat16/float32 arrays."""
+    bits = {2: np.int16, 4: np.int32}[a.dtype.itemsize]
+    def ordered(x):
+        i = x.view(bits).astype(np.int64)
+        return np.where(i < 0, np.iinfo(bits).min - i, i)
+    return np.abs(ordered(a) - ordered(b))
+
+def compare(expected, actual, max_ulp):
+    expected = np.ravel(np.asarray(expected))
+    actual = np.ravel(np.asarray(actual))
+    if expected.shape != actual.shape:
+        return f"shape {actual.shape} != {expected.shape}"
+    if expected.dtype != actual.dtype:
+        return f"dtype {actual.dtype} != {expected.dtype}"
+    if np.issubdtype(expected.dtype, np.integer):
+        mismatches = int(np.count_nonzero(expected != actual))
+        return f"{mismatches} mismatches" if mismatches else None
+    ulps = ulp_distance(expected, actual)
+    if ulps.max() > max_ulp:
+        return f"{int(np.count_nonzero(ulps > max_ulp))} elements off by more than {max_ulp} ulp (max {int(ulps.max())})"
+    return None
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check npueval.reference against the dataset behaviorals")
+    parser.add_argument("--seeds", type=int, default=5, help="random inputs per kernel and size")
+    parser.add_argument("--bench", action="store_true", help="time loop vs vectorized versions on large inputs")
+    parser.add_argument("--bench-scale", type=int, default=16, help="input size multiplier for --bench")
+    parser.add_argument("kernels", nargs="*", help="kernels to check, defaults to all")
+    args = parser.parse_args()
+
+    failures = 0
+    for kernel in args.kernels or CASES:
+        inputs, reference, max_ulp = CASES[kernel]
+        behavioral = load_behavioral(kernel)
+        errors, ulp_diffs = [], 0
+        for seed in range(args.seeds):
+            for n in (1, 2, 3):
+                rng = np.random.default_rng(seed)
+                case = inputs(rng, n)
+                expected, actual = behavioral(*case), reference(*case)
+                error = compare(expected, actual, max_ulp)
+                if error:
+                    errors.append(f"seed {seed} n {n}: {error}")
+                elif max_ulp:
+                    ulp_diffs += int(np.count_nonzero(np.ravel(np.asarray(expected)) != np.ravel(np.asarray(actual))))
+        line = f"{kernel:36s} {'FAIL' if errors else 'ok'}"
+        if ulp_diffs:
+            line += f" ({ulp_diffs} elements within {max_ulp} ulp)"
+        if args.bench:
+            case = inputs(np.random.default_rng(0), args.bench_scale)
+            _, loop = timed(behavioral, *case)
+            _, vectorized = timed(reference, *case)
+            line += f"  loop {loop * 1e3:9.2f}ms  vectorized {vectorized * 1e3:7.2f}ms  x{loop / max(vectorized, 1e-9):.0f}"
+        print(line)
+        for error in errors[:3]:
+            print(f"    {error}")
+        failures += bool(errors)
+
+    print(f"\n{len(args.kernels or CASES) - failures}/{len(args.kernels or CASES)} kernels match")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,39 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import random
+import sys
+
+from npueval.trace import CORE_EVENT_SLOTS, decode_trace, encode_trace, parse_header
+
+# Checks that npueval.trace decodes the packets it encodes: random event
+# timelines, with frame deltas of every width and gaps that need a new
+# Start frame, must come back as the same 'B'/'E' events.
+#
+# usage: python scripts/check_trace.py [--cases 500]
+
+cases = int(sys.argv[sys.argv.index("--cases") + 1]) if "--cases" in sys.argv else 500
+random.seed(0)
+
+def expected_events(changes):
+    events, active = [], set()
+    for cycle, slots in changes:
+        events += [(CORE_EVENT_SLOTS[s], "E", cycle) for s in sorted(active - set(slots))]
+        events += [(CORE_EVENT_SLOTS[s], "B", cycle) for s in sorted(set(slots) - active)]
+        active = set(slots)
+    return events
+
+failures = 0
+for case in range(cases):
+    cycle, changes = random.randint(0, 1000), []
+    for _ in range(random.randint(1, 30)):
+        cycle += random.choice([1, 5, 15, 16, 300, 1023, 1024, 70000, 262143, 262144, 10**7])
+        changes.append((cycle, random.sample(range(8), random.randint(0, 3))))
+    words = encode_trace(changes, col=1, row=2)
+    header = parse_header(words[0])
+    decoded = [(e['name'], e['ph'], e['ts']) for e in decode_trace(words) if e['ph'] != "M"]
+    if header != {"id": 1, "type": 0, "row": 2, "col": 1} or decoded != expected_events(changes):
+        failures += 1
+        print(f"FAIL: case {case}, {changes}")
+print(f"{cases - failures}/{cases} trace round trips")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,96 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import sys
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal OpenAI-compatible chat completions server for exercising the generation
+# engine without an API key. It answers every request with a fixed kernel after an
+# artificial latency and can inject 429s/500s to test retry handling.
+#
+# usage: python scripts/mock_openai_server.py --port 8000 --latency 0.5 --error-rate 0.1
+#        AIECoder(model="mock", base_url="http://localhost:8000/v1", api_key="mock")
+
+RESPONSE = """```cpp
+#include <aie_api/aie.hpp>
+
+void kernel(int8_t *in_buffer, int8_t *out_buffer) {
+    for (int i = 0; i < 1024; i++) {
+        out_buffer[i] = in_buffer[i];
+    }
+}
+```
+"""
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--port", type=int, default=8000)
+parser.add_argument("--latency", type=float, default=0.5, help="seconds per completion")
+parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429/500")
+args = parser.parse_args()
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, request, prompt_tokens, completion_tokens):
+        """Server-sent events, one chunk per line of the response followed by a usage chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": request.get("model", "mock")}
+        try:
+            for line in (RESPONSE + "\nThis kernel copies the input to the output.\n").splitlines(keepends=True):
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": line}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(args.latency / 10)
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                     "total_tokens": prompt_tokens + completion_tokens}
+            self.wfile.write(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading early
+            pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(args.latency)
+
+        if random.random() < args.error_rate:
+            status = random.choice([429, 500])
+            self._send(status, {"error": {"message": "injected failure", "type": "mock", "code": status}})
+            return
+
+        prompt_tokens = sum(len(m["content"]) for m in request.get("messages", [])) // 4
+        completion_tokens = len(RESPONSE) // 4
+        if request.get("stream"):
+            self._stream(request, prompt_tokens, completion_tokens)
+            return
+        self._send(200, {
+            "id": f"chatcmpl-mock-{random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0,
+                         "message": {"role": "assistant", "content": RESPONSE},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens,
+                      "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+print(f"Mock OpenAI server listening on http://localhost:{args.port}/v1")
+ThreadingHTTPServer(("", args.port), Handler).serve_forever()
@@ -0,0 +1,28 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import json
+
+from npueval.metrics import roofline_report
+
+# Throughput of the passing kernels of an evaluation run relative to the
+# nominal vector and tile memory peaks (see npueval.metrics), and whether
+# each kernel is compute bound or data movement bound. The peaks are AIE2
+# (npu1) figures for every device.
+#
+# usage: python scripts/roofline_report.py --results results/evaluations/<model>
+
+parser = argparse.ArgumentParser(description="Roofline report of an evaluation run")
+parser.add_argument("--dataset", default="dataset/npueval.jsonl")
+parser.add_argument("--results", default="results/evaluations/canonical")
+parser.add_argument("--json", default=None, help="also write the report to this file")
+args = parser.parse_args()
+
+with open(args.dataset, 'r') as f:
+    tests = [json.loads(line) for line in f]
+
+report = roofline_report(tests, args.results)
+if args.json:
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=2)
@@ -2,87 +2,63 @@
 # SPDX-License-Identifier: MIT
 
 import json
-import pathlib
 import os
 
-from npueval.aiecoder import AIECoder
+from npueval.cache import ResponseCache
+from npueval.engine import GenerationEngine
 
 #os.environ["OPENAI_API_KEY"] = "sk-xxx"
 
 with open("dataset/npueval.jsonl", 'r') as f:
     tests = [json.loads(line) for line in f]
 
-def generate_one_completion(prompt, model="gpt-4.1", base_url=None, temperature=0.0, top_p=1.0, attempts=1):
-    coder = AIECoder(model=model, temperature=temperature, top_p=top_p, base_url=base_url, attempts=attempts)
-    response = coder(prompt)
-    
-    result = {
-        "code": coder.extract_codeblock(response['response']),
-        "stats": {"token_usage": response['token_usage'],
-                  "history": response['history']}
-    }
-
-    return result
+# Identical requests are served from disk, use mode="replay" to reproduce offline
+cache = ResponseCache(mode="readwrite")
 
+# Per-provider limits, adjust to your account tier
+engine = GenerationEngine(limits={"openai": {"concurrency": 16, "tpm": 2_000_000}}, cache=cache)
 
 # Proprietary models
 N = [1, 2] # 1 - no compile just first pass, 2+ - retry with compiler
 models = ["gpt-4o-mini", "gpt-4.1"]
+jobs = []
 for MODEL in models:
     for attempts in N:
-        print(f"{MODEL} N={attempts}")
         solutions_path = f"results/solutions/{MODEL}_attempts_{attempts}"
-        pathlib.Path(solutions_path).mkdir(parents=True, exist_ok=True)
-        for idx, test in enumerate(tests):
-            if os.path.isfile(f"{solutions_path}/{test['kernel_name']}.json"):
-                print(f"{solutions_path}/{test['kernel_name']}.json already exists, skipping...")
-                continue
-            print(f"Generating solution for {test['kernel_name']}")
-            response = generate_one_completion(test['prompt'], model=MODEL, attempts=attempts, temperature=0, top_p=1.0)
-            with open(f"{solutions_path}/{test['kernel_name']}.json", 'w') as file:
-                json.dump(response, file, indent=4)
+        for test in tests:
+            jobs.append({"prompt": test['prompt'], "model": MODEL, "attempts": attempts,
+                         "temperature": 0, "top_p": 1.0,
+                         "output_path": f"{solutions_path}/{test['kernel_name']}.json"})
+engine.run_sync(jobs)
 
-# With RAG (basic llama-index retriever)
-from llama_index.core import (
-    StorageContext,
-    load_index_from_storage,
-    VectorStoreIndex,
-    SimpleDirectoryReader
-)
-    
-PERSIST_DIR = "./rag/vector_database"
+# With RAG, local BM25 retriever over function level units of rag/kernels
+# use get_retriever("bm25") for whole files or get_retriever("llama_index") for
+# the original llama-index vector retriever
+from npueval.rag import RetrievalCache, get_retriever, precompute_contexts
 
-num_retrieved = [1] # change this to increase number of retrieved kernel examples
-for MODEL in models:
-    for attempts in N:
-        for k in num_retrieved:
-            print(f"{MODEL} N={attempts} k={k}")
-            
-            if not os.path.exists(PERSIST_DIR):
-                print("Indexing...")
-                documents = SimpleDirectoryReader("rag/kernels", recursive=True).load_data()
-                index = VectorStoreIndex.from_documents(documents)
-                index.storage_context.persist(persist_dir=PERSIST_DIR)
-            else:
-                storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-                index = load_index_from_storage(storage_context)
-            
-            retriever = index.as_retriever(similarity_top_k=k)
-            
-            solutions_path = f"results/solutions/{MODEL}_attempts_{attempts}_rag_{k}"
-            pathlib.Path(solutions_path).mkdir(parents=True, exist_ok=True)
-            for idx, test in enumerate(tests):
-                if os.path.isfile(f"{solutions_path}/{test['kernel_name']}.json"):
-                    print(f"{solutions_path}/{test['kernel_name']}.json already exists, skipping...")
-                    continue
-                print(f"Generating solution for {test['kernel_name']}")
-                nodes = retriever.retrieve(test['prompt'])
-                context_string = "Reference vectorized code:\n"
-                for node in nodes:
-                    context_string += node.node.text
-            
-                prompt_with_context = test['prompt'] + "\n" + context_string
-                #print(prompt_with_context)
-                response = generate_one_completion(prompt_with_context, model=MODEL, attempts=attempts, temperature=0, top_p=1.0)
-                with open(f"{solutions_path}/{test['kernel_name']}.json", 'w') as file:
-                    json.dump(response, file, indent=4)
+num_retrieved = [1] # change this to increase number of retrieved code units
+max_context_tokens = 2048 # retrieved units are packed into this budget
+retriever_backend = "bm25_chunks"
+
+# Results of different retrievers and budgets go to different directories, so
+# resuming never mixes them. Directories named *_rag_{k} hold results of the
+# original llama-index retriever, where k counted whole files.
+rag_tag = f"rag_{retriever_backend}_{max_context_tokens}tok"
+
+# Index is loaded once, retrieval runs once per prompt and k and is cached on
+# disk until rag/kernels changes
+retriever = get_retriever(retriever_backend, max_tokens=max_context_tokens)
+contexts = precompute_contexts(tests, retriever, num_retrieved, cache=RetrievalCache())
+
+jobs = []
+for k in num_retrieved:
+    for test in tests:
+        prompt_with_context = test['prompt'] + "\n" + contexts[k][test['kernel_name']]
+
+        for MODEL in models:
+            for attempts in N:
+                solutions_path = f"results/solutions/{MODEL}_attempts_{attempts}_{rag_tag}_{k}"
+                jobs.append({"prompt": prompt_with_context, "model": MODEL, "attempts": attempts,
+                             "temperature": 0, "top_p": 1.0,
+                             "output_path": f"{solutions_path}/{test['kernel_name']}.json"})
+engine.run_sync(jobs)
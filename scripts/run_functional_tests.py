@@ -18,12 +18,13 @@ for attempts in N:
         results_path = f"results/evaluations/{MODEL}_attempts_{attempts}"
         run_functional_tests(tests, solutions, results_path=results_path)
 
-# RAG
+# RAG, same retriever settings as run_completions.py
 num_retrieved = [1]
+rag_tag = "rag_bm25_chunks_2048tok"
 for attempts in N:
     for MODEL in models:
         for k in num_retrieved:
             print(f"{MODEL} N={attempts} k={k}")
-            solutions = f"results/solutions/{MODEL}_attempts_{attempts}_rag_{k}/"
-            results_path = f"results/evaluations/{MODEL}_attempts_{attempts}_rag_{k}"
+            solutions = f"results/solutions/{MODEL}_attempts_{attempts}_{rag_tag}_{k}/"
+            results_path = f"results/evaluations/{MODEL}_attempts_{attempts}_{rag_tag}_{k}"
             run_functional_tests(tests, solutions, results_path=results_path)
@@ -0,0 +1,29 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+# Generates and evaluates in one go: each completion is compiled and run on the
+# NPU as soon as it arrives. Same results layout as run_completions.py followed
+# by run_functional_tests.py, rerun to resume an interrupted sweep.
+
+import json
+
+from npueval.cache import ResponseCache
+from npueval.engine import GenerationEngine
+from npueval.pipeline import Pipeline
+
+#os.environ["OPENAI_API_KEY"] = "sk-xxx"
+
+with open("dataset/npueval.jsonl", 'r') as f:
+    tests = [json.loads(line) for line in f]
+
+cache = ResponseCache(mode="readwrite")
+engine = GenerationEngine(limits={"openai": {"concurrency": 16, "tpm": 2_000_000}}, cache=cache)
+
+N = [1, 2]
+models = ["gpt-4o-mini", "gpt-4.1"]
+configs = [{"name": f"{MODEL}_attempts_{attempts}", "model": MODEL, "attempts": attempts,
+            "temperature": 0, "top_p": 1.0}
+           for MODEL in models for attempts in N]
+
+pipeline = Pipeline(tests, configs, engine=engine, max_queue=8)
+pipeline.run_sync()
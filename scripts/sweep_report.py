@@ -0,0 +1,46 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import json
+
+from npueval import run_functional_tests
+from npueval.sweep import scaling_report
+
+# Runs the size sweep variants (cd dataset && make SWEEP=default) and fits
+# cycles vs elements per kernel to separate fixed overhead from per-element cost.
+#
+# With --solutions, every variant of a kernel with a shared prompt is evaluated
+# with that kernel's solution from the regular dataset run, so the fit is one
+# generated kernel across sizes. Kernels whose size is built into the prompt
+# would need a solution per size, they are only evaluated with --per-size, which
+# expects <kernel>_n<elements>.json solutions generated from npueval_sweep.jsonl.
+#
+# usage: python scripts/sweep_report.py [--solutions results/solutions/<model>] [--per-size] [--skip-run]
+
+parser = argparse.ArgumentParser(description="Cycles vs elements scaling of the sweep variants")
+parser.add_argument("--dataset", default="dataset/npueval_sweep.jsonl")
+parser.add_argument("--solutions", default=None, help="solutions directory, defaults to the canonical solutions")
+parser.add_argument("--per-size", action="store_true",
+                    help="also evaluate variants without a shared prompt, using one solution per size")
+parser.add_argument("--results", default="results/evaluations/sweep")
+parser.add_argument("--skip-run", action="store_true", help="only report on existing results")
+parser.add_argument("--json", default=None, help="also write the report to this file")
+args = parser.parse_args()
+
+with open(args.dataset, 'r') as f:
+    tests = [json.loads(line) for line in f]
+
+if args.solutions and not args.per_size:
+    shared = [t for t in tests if t['sweep'].get('shared')]
+    print(f"{len(shared)} of {len(tests)} variants share their kernel's prompt, "
+          f"the others need a solution per size (--per-size)")
+    tests = shared
+
+if not args.skip_run:
+    run_functional_tests(tests, solutions=args.solutions, results_path=args.results)
+
+report = scaling_report(tests, args.results)
+if args.json:
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=2)
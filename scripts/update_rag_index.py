@@ -0,0 +1,27 @@
+# Copyright (C) 2025 Advanced Micro Devices, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+
+from npueval.rag import CORPUS_DIR, get_retriever
+
+# Brings the RAG indexes in line with rag/kernels after adding, editing or
+# removing reference kernels. Only changed files are reindexed (re-embedded for
+# llama_index), queries against an out of date index raise StaleIndexError.
+#
+# usage: python scripts/update_rag_index.py [--backend bm25 bm25_chunks llama_index] [--rebuild]
+
+parser = argparse.ArgumentParser(description="Incrementally update the RAG indexes")
+parser.add_argument("--backend", nargs="+", default=["bm25", "bm25_chunks"],
+                    choices=["bm25", "bm25_chunks", "llama_index"])
+parser.add_argument("--corpus-dir", default=CORPUS_DIR)
+parser.add_argument("--rebuild", action="store_true", help="reindex every file")
+args = parser.parse_args()
+
+for backend in args.backend:
+    retriever = get_retriever(backend, corpus_dir=args.corpus_dir)
+    diff = retriever.update(rebuild=args.rebuild)
+    print(f"{backend}: " + ", ".join(f"{len(names)} {kind}" for kind, names in diff.items()))
+    for kind, names in diff.items():
+        for name in names:
+            print(f"  {kind}: {name}")